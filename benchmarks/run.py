@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+"""
+Measures pyspec's own overhead on synthetic suites (see benchmarks/suites.py).
+
+Run from the project root:
+
+    python -m benchmarks.run all [SCENARIO...] [--memory] [--output results.json]
+
+Each scenario runs in a fresh Python process, so imports, caches & peak memory
+never carry over from one scenario to the next. The time taken by each phase of
+a run is measured separately:
+- collect:  finding & importing the spec files, which declares every group & test
+- register: declaring the same groups & tests again in memory, without imports
+- pub_sub:  publishing every collected group to a new Runner over pub_sub
+- run:      running every group with Runner.run_all, recording results as events
+- format:   writing the recorded results out as verbose text
+
+Results are written as JSON, so runs before & after a change can be compared
+with `--compare`.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from contextlib import contextmanager
+import click
+from benchmarks.suites import SCENARIOS, DEFAULT_SCENARIOS, EVENT_NAME, test_count, write_suite
+
+PHASES = ('collect', 'register', 'pub_sub', 'run', 'format')
+
+@click.group()
+def benchmarks():
+    """
+    Self-benchmarks for pyspec's collection, registration, dispatch & output.
+    """
+
+@benchmarks.command('all')
+@click.argument('scenarios', nargs=-1, type=click.Choice(sorted(SCENARIOS)))
+@click.option('--memory', is_flag=True, help='also measure the peak memory of each phase')
+@click.option('--output', type=click.Path(dir_okay=False), help='write results to this file')
+@click.option(
+    '--compare',
+    type=click.Path(exists=True, dir_okay=False),
+    help='results from an earlier run to check for regressions against'
+)
+@click.option(
+    '--tolerance',
+    type=float,
+    default=.1,
+    help='how much slower a phase may get before --compare reports it, as a fraction'
+)
+def all_scenarios(scenarios, memory, output, compare, tolerance):
+    """
+    Runs each SCENARIO (or the default, quick scenarios) & reports the time taken
+    by each phase.
+    """
+    results = {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'scenarios': [measure_in_process(name, memory) for name in scenarios or DEFAULT_SCENARIOS],
+    }
+    text = json.dumps(results, indent=2)
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as output_file:
+            output_file.write(text + '\n')
+    else:
+        click.echo(text)
+
+    click.echo(summary(results), err=True)
+
+    if compare:
+        with open(compare, encoding='utf-8') as compare_file:
+            regressions = find_regressions(json.load(compare_file), results, tolerance)
+
+        for regression in regressions:
+            click.echo(regression, err=True)
+
+        if regressions:
+            sys.exit(1)
+
+@benchmarks.command()
+@click.argument('scenario', type=click.Choice(sorted(SCENARIOS)))
+@click.option('--memory', is_flag=True, help='trace memory & record the peak of each phase')
+def worker(scenario, memory):
+    """
+    Measures a single SCENARIO in this process & prints the results as JSON.
+    """
+    click.echo(json.dumps(measure(scenario, memory)))
+
+def measure_in_process(scenario, memory):
+    """
+    Measures a scenario in a fresh Python process. Times come from a run without
+    tracing, since tracemalloc slows everything down; peak memory for each phase
+    comes from a second, traced run if `memory` is set.
+    """
+    result = _worker_result(scenario, False)
+
+    if memory:
+        traced = _worker_result(scenario, True)
+
+        for name, measured in traced['phases'].items():
+            result['phases'][name]['peak_bytes'] = measured['peak_bytes']
+
+    return result
+
+def _worker_result(scenario, memory):
+    command = [sys.executable, '-m', 'benchmarks.run', 'worker', scenario]
+
+    if memory:
+        command.append('--memory')
+
+    output = subprocess.run(command, check=True, stdout=subprocess.PIPE).stdout
+
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+def measure(scenario, memory=False):
+    """
+    Measures every phase of a scenario in this process.
+
+    Returns:
+    - A dict holding the `scenario`, its number of `tests`, the `ns` (& with
+      `memory`, the `peak_bytes`) for each of its `phases` & the process's
+      `max_rss_kb` once done
+    """
+    # imported here so collecting pyspec itself isn't part of any phase
+    from pub_sub import stable
+    from pyspec.lib.describe import Describe
+    from pyspec.lib.runner import runner
+    from pyspec.lib.reporter import Recorder, TextReporter, replay
+    from pyspec.cli.run_tests import RunTests
+
+    directory = tempfile.mkdtemp(prefix='pyspec-benchmark-')
+    phases = {}
+
+    if memory:
+        tracemalloc.start()
+
+    try:
+        write_suite(scenario, directory)
+        run_tests = RunTests(stable.event(EVENT_NAME))
+
+        with phase(phases, 'collect'):
+            groups = run_tests.explore(os.path.relpath(directory, RunTests.CWD))
+
+        with phase(phases, 'register'):
+            register(Describe, SCENARIOS[scenario])
+
+        with phase(phases, 'pub_sub'):
+            topic = stable.event(f'{EVENT_NAME} events').topic('new test group')
+            runner(stable.event(f'{EVENT_NAME} events'))
+
+            for group in groups:
+                topic.pub(group)
+
+        recorder = Recorder()
+
+        with phase(phases, 'run'):
+            run_tests.runner.run_all({'verbose': False, 'muted': True, 'reporter': recorder})
+
+        with phase(phases, 'format'):
+            replay(recorder.events, TextReporter(True, io.StringIO()))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+        if memory:
+            tracemalloc.stop()
+
+    return {
+        'scenario': scenario,
+        'tests': test_count(scenario),
+        'phases': phases,
+        'max_rss_kb': max_rss_kb(),
+    }
+
+@contextmanager
+def phase(phases, name):
+    """
+    Records the nanoseconds spent in the `with` block under `phases[name]`, &
+    the peak memory traced during it if tracemalloc is tracing
+    """
+    tracing = tracemalloc.is_tracing()
+
+    if tracing:
+        tracemalloc.reset_peak()
+        started_memory, _ = tracemalloc.get_traced_memory()
+
+    started = time.perf_counter_ns()
+    yield
+    phases[name] = {'ns': time.perf_counter_ns() - started}
+
+    if tracing:
+        phases[name]['peak_bytes'] = tracemalloc.get_traced_memory()[1] - started_memory
+
+def register(describe_class, settings):
+    """
+    Declares a scenario's groups & tests in memory, the same way its spec files do
+    """
+    expected = 2 if settings['fail'] else 1
+    groups = []
+
+    for group_number in range(settings['files'] * settings['groups']):
+        group = describe_class(f'group {group_number}')
+        groups.append(group)
+
+        for level in range(settings['depth'] + 1):
+            if level:
+                group = group.describe(f'level {level}')
+
+            for test_number in range(settings['tests']):
+                group.it(f'test {test_number}').expect(lambda: 1).to(_equal, expected)
+
+    return groups
+
+def _equal(caller, actual, expected):
+    if actual() != expected[0]:
+        raise AssertionError(expected[0], actual())
+
+    return caller
+
+def max_rss_kb():
+    """
+    Returns the peak resident memory of this process in kilobytes, or None where
+    the resource module isn't available
+    """
+    try:
+        import resource # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # macOS reports bytes, everything else kilobytes
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+def summary(results):
+    """
+    Returns a human-readable table of the time taken by each phase
+    """
+    lines = ['', f'{"scenario":<16}{"tests":>10}' + ''.join(f'{name:>12}' for name in PHASES)]
+
+    for result in results['scenarios']:
+        lines.append(
+            f'{result["scenario"]:<16}{result["tests"]:>10}'
+            + ''.join(f'{result["phases"][name]["ns"] / 10 ** 6:>10.1f}ms' for name in PHASES)
+        )
+
+    return '\n'.join(lines)
+
+def find_regressions(before, after, tolerance):
+    """
+    Returns a line for each phase of each scenario in `after` that took more
+    than `tolerance` longer than in `before`
+    """
+    earlier = {result['scenario']: result for result in before['scenarios']}
+    regressions = []
+
+    for result in after['scenarios']:
+        if result['scenario'] not in earlier:
+            continue
+
+        for name, measured in result['phases'].items():
+            was = earlier[result['scenario']]['phases'].get(name)
+
+            if was and measured['ns'] > was['ns'] * (1 + tolerance):
+                regressions.append(
+                    f'{result["scenario"]} {name}: {was["ns"] / 10 ** 6:.1f}ms -> '
+                    f'{measured["ns"] / 10 ** 6:.1f}ms '
+                    f'({(measured["ns"] / was["ns"] - 1) * 100:+.1f}%)'
+                )
+
+    return regressions
+
+if __name__ == '__main__':
+    benchmarks() # pylint: disable=no-value-for-parameter
@@ -0,0 +1,82 @@
+"""
+Synthetic spec suites used to measure pyspec's own overhead. Each scenario is
+written out as real spec files, so collecting them goes through the same
+imports, `describe` & `it` calls as any project's specs.
+"""
+
+import os
+
+# every scenario: the number of spec files, top-level groups per file, levels
+# of nesting below each top-level group, tests per group & whether tests fail
+SCENARIOS = {
+    'trivial-10k': {'files': 10, 'groups': 10, 'depth': 0, 'tests': 100, 'fail': False},
+    'trivial-100k': {'files': 100, 'groups': 10, 'depth': 0, 'tests': 100, 'fail': False},
+    'trivial-1m': {'files': 1000, 'groups': 10, 'depth': 0, 'tests': 100, 'fail': False},
+    'deep-nesting': {'files': 1, 'groups': 10, 'depth': 50, 'tests': 20, 'fail': False},
+    'many-files': {'files': 2000, 'groups': 1, 'depth': 0, 'tests': 5, 'fail': False},
+    'mass-failures': {'files': 10, 'groups': 10, 'depth': 0, 'tests': 100, 'fail': True},
+}
+
+# scenarios ran when none are chosen, kept small enough to finish in seconds
+DEFAULT_SCENARIOS = ('trivial-10k', 'deep-nesting', 'many-files', 'mass-failures')
+
+EVENT_NAME = 'pyspec self benchmark'
+
+def test_count(scenario):
+    """
+    Returns the number of tests in a scenario
+    """
+    settings = SCENARIOS[scenario]
+
+    return settings['files'] * settings['groups'] * (settings['depth'] + 1) * settings['tests']
+
+def write_suite(scenario, directory):
+    """
+    Writes the spec files for a scenario into `directory` & returns their paths
+    """
+    settings = SCENARIOS[scenario]
+    paths = []
+
+    for file_number in range(settings['files']):
+        path = os.path.join(directory, f'synthetic_{file_number:05}_spec.py')
+
+        with open(path, 'w', encoding='utf-8') as spec_file:
+            spec_file.write(spec_source(settings))
+
+        paths.append(path)
+
+    return paths
+
+def spec_source(settings):
+    """
+    Returns the source of a single synthetic spec file
+    """
+    expected = 2 if settings['fail'] else 1
+    lines = [
+        'import pyspec',
+        'from pub_sub import stable',
+        '',
+        'C = pyspec.Comparisons',
+        f'PUB_SUB = stable.event({EVENT_NAME!r})',
+        '',
+    ]
+
+    for group_number in range(settings['groups']):
+        name = f'GROUP_{group_number}'
+        lines.append(f'{name} = pyspec.describe({f"group {group_number}"!r}, PUB_SUB)')
+
+        for level in range(settings['depth'] + 1):
+            if level:
+                lines.append(f'{name}_{level} = {name}_{level - 1}.describe({f"level {level}"!r})')
+            else:
+                lines.append(f'{name}_0 = {name}')
+
+            for test_number in range(settings['tests']):
+                lines.append(
+                    f'{name}_{level}.it({f"test {test_number}"!r})'
+                    f'.expect(lambda: 1).to(C.eq, {expected})'
+                )
+
+        lines.append('')
+
+    return '\n'.join(lines)
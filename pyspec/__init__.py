@@ -1,5 +1,35 @@
-from . import cli
-from .lib.describe import describe
-from .lib.comparisons import Comparisons
+"""
+PySpec, a barebones BDD style test runner for python.
 
-comparisons = Comparisons()
+`describe`, `Comparisons` & `comparisons` are imported on first use, as is the
+`cli` package, so running the `pyspec` command only imports what the chosen
+subcommand needs.
+"""
+
+import importlib
+
+# kept in step with setup.py
+__version__ = '1.1.0'
+
+# every name is made by __getattr__ on first use, which pylint can't see
+__all__ = ['cli', 'describe', 'Comparisons', 'comparisons'] # pylint: disable=undefined-all-variable
+
+def __getattr__(name):
+    if name in ('cli', 'lib'):
+        return importlib.import_module(f'.{name}', __name__)
+
+    if name == 'describe':
+        from .lib.describe import describe # pylint: disable=import-outside-toplevel
+        value = describe
+    elif name == 'Comparisons':
+        from .lib.comparisons import Comparisons # pylint: disable=import-outside-toplevel
+        value = Comparisons
+    elif name == 'comparisons':
+        value = __getattr__('Comparisons')()
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    # cached, so later lookups don't come back here
+    globals()[name] = value
+
+    return value
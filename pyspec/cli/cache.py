@@ -0,0 +1,216 @@
+"""
+A persistent, project-local cache of spec file results. Used by incremental runs
+to replay the last results of any spec file whose source, & the source of every
+project module it depends on, hasn't changed since it was last ran.
+"""
+
+import os
+import sys
+import json
+import hashlib
+from types import ModuleType
+
+CACHE_DIR = '.pyspec_cache'
+# bumped whenever the layout of cached payloads changes, discarding older caches
+CACHE_VERSION = 7
+# the run parameters that change what a spec file's results hold: the stack
+# traces kept for failed tests & the memory measured for each test
+CACHED_SETTINGS = ('tb', 'tb_limit', 'memory')
+
+def project_dependencies(module, root, imports=None):
+    """
+    Collects the source files of all project modules the given module depends
+    on: those it imported, as recorded by SpecImporter, & those found in its
+    globals, then the same for every project module found. Modules imported
+    before the importer recorded them are still found by their globals. A
+    module is part of the project if its source file is inside `root` & not
+    inside an installed package.
+
+    Accepts:
+    - module    (ModuleType)    the module to collect dependencies for
+    - root      (STRING)        the project's root directory
+    - [imports] (DICT)          the names of the modules imported by each module,
+                                see SpecImporter.imports
+
+    Returns:
+    - A sorted list of absolute paths to the source files depended upon
+    """
+    imports = imports or {}
+    found = {}
+    pending = [module]
+
+    while pending:
+        current = pending.pop()
+        imported = [
+            sys.modules[name] for name in imports.get(current.__name__, ())
+            if name in sys.modules
+        ]
+
+        for value in imported + list(vars(current).values()):
+            if isinstance(value, ModuleType):
+                dependency = value
+            else:
+                try:
+                    dependency = sys.modules.get(getattr(value, '__module__', None))
+                # objects with a custom __getattr__ may raise anything
+                except Exception: # pylint: disable=broad-except
+                    dependency = None
+
+            if dependency is None or dependency is module:
+                continue
+
+            path = _project_file(dependency, root)
+
+            if path is not None and path not in found:
+                found[path] = dependency
+                pending.append(dependency)
+
+    return sorted(found)
+
+def _project_file(module, root):
+    path = getattr(module, '__file__', None)
+
+    if not isinstance(path, str) or not path.endswith('.py'):
+        return None
+
+    path = os.path.abspath(path)
+
+    if not path.startswith(root + os.sep) or 'site-packages' in path:
+        return None
+
+    return path
+
+class ResultsCache:
+    """
+    Results from previous runs, keyed by spec file path relative to the project
+    root & stored as JSON in the project's `.pyspec_cache` directory.
+
+    On initialization, accepts:
+    - root          (STRING)    the project root that holds the cache directory
+    - [name]        (STRING)    the name of the cache file, optional
+    - [settings]    (DICT)      the run parameters that change what a spec file's
+                                results hold, such as how stack traces are kept;
+                                results recorded with other settings aren't replayed
+
+    Every file is fingerprinted by its content hash. The modification time &
+    size last seen with each hash are kept too, so unchanged files don't need
+    to be read again to be checked.
+    """
+
+    def __init__(self, root, name='results.json', settings=None):
+        self.root = root
+        self.path = os.path.join(root, CACHE_DIR, name)
+        # compared as read back from JSON
+        self.settings = json.loads(json.dumps(settings or {}))
+        self._hashes = {}
+
+        data = self._load()
+        self.files = data.get('files', {})
+        self.specs = data.get('specs', {})
+
+    def lookup(self, spec_file):
+        """
+        Returns the payload recorded for the given spec file, or None if the
+        spec file or any of its dependencies changed since it was recorded, or
+        it was recorded with other settings.
+        """
+        entry = self.specs.get(self._key(spec_file))
+
+        if entry is None or entry['settings'] != self.settings:
+            return None
+
+        if self.file_hash(spec_file) != entry['hash']:
+            return None
+
+        for dependency, digest in entry['dependencies'].items():
+            if self.file_hash(os.path.join(self.root, dependency)) != digest:
+                return None
+
+        return entry['payload']
+
+    def record(self, spec_file, payload):
+        """
+        Stores the payload from running a spec file, along with the hashes of the
+        spec file & of each dependency listed in the payload.
+        """
+        self.specs[self._key(spec_file)] = {
+            'hash': self.file_hash(spec_file),
+            'settings': self.settings,
+            'dependencies': {
+                self._key(dependency): self.file_hash(dependency)
+                for dependency in payload['dependencies']
+            },
+            # profiles & timings belong to the run that measured them, so they
+            # aren't replayed
+            'payload': {
+                key: value for key, value in payload.items()
+                if key not in ('profiles', 'import_time', 'duration')
+            },
+        }
+
+        return self
+
+    def save(self):
+        """
+        Writes the cache to disk, replacing the previous cache file in one step
+        so an interrupted run never leaves a partially written cache behind.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + '.tmp'
+
+        with open(temp_path, 'w', encoding='utf-8') as cache_file:
+            json.dump({
+                'version': CACHE_VERSION,
+                'files': self.files,
+                'specs': self.specs,
+            }, cache_file)
+
+        os.replace(temp_path, self.path)
+
+        return self
+
+    def file_hash(self, path):
+        """
+        Returns the content hash for the file at `path`, or None if it can't be
+        read. Each file is hashed at most once per cache instance.
+        """
+        if path in self._hashes:
+            return self._hashes[path]
+
+        key = self._key(path)
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._hashes[path] = None
+            return None
+
+        known = self.files.get(key)
+
+        if known is not None and known[0] == stat.st_mtime_ns and known[1] == stat.st_size:
+            digest = known[2]
+        else:
+            with open(path, 'rb') as source:
+                digest = hashlib.sha256(source.read()).hexdigest()
+
+            self.files[key] = [stat.st_mtime_ns, stat.st_size, digest]
+
+        self._hashes[path] = digest
+
+        return digest
+
+    def _key(self, path):
+        return os.path.relpath(path, self.root)
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as cache_file:
+                data = json.load(cache_file)
+        # a missing or corrupt cache is treated as empty
+        except (OSError, ValueError):
+            return {}
+
+        if not isinstance(data, dict) or data.get('version') != CACHE_VERSION:
+            return {}
+
+        return data
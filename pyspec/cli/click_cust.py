@@ -2,13 +2,21 @@
 A module with custom classes for modifying Click
 """
 
+import os
+import sys
 import traceback
 import click
+from pyspec.lib.options import REPORT_FORMATS, parse_size
+
+# exit codes, alongside click's own 2 for usage errors
+TESTS_FAILED = 1
+INTERNAL_ERROR = 3
 
 class ErrorHandlingGroup(click.Group):
     """
     Wrapping the entire click command group in a try:except statement
-    to handle errors more gracefully
+    to handle errors more gracefully. The error is written out & the process
+    exits with INTERNAL_ERROR, so a run that broke never looks like a pass.
     """
     
     def __call__(self, *args, **kwargs):
@@ -17,6 +25,116 @@ class ErrorHandlingGroup(click.Group):
         except Exception as err:
             click.echo(err)
             click.echo(traceback.format_exc())
+            sys.exit(INTERNAL_ERROR)
+
+class JobsType(click.ParamType):
+    """
+    A positive number of worker processes, or `auto` to use one worker per
+    available CPU
+    """
+
+    name = 'jobs'
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, int):
+            return value
+
+        if value == 'auto':
+            return os.cpu_count() or 1
+
+        try:
+            jobs = int(value)
+        except ValueError:
+            self.fail(f'{value} is not a number of jobs or "auto"', param, ctx)
+
+        if jobs < 1:
+            self.fail(f'{value} is not a positive number of jobs', param, ctx)
+
+        return jobs
+
+class SizeType(click.ParamType):
+    """
+    A number of bytes, optionally followed by a unit: B, KB, MB or GB
+    """
+
+    name = 'size'
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, int):
+            return value
+
+        try:
+            size = parse_size(value)
+        except ValueError:
+            self.fail(f'{value} is not a size, such as 512MB', param, ctx)
+
+        if size < 1:
+            self.fail(f'{value} is not a positive size', param, ctx)
+
+        return size
+
+class ShardType(click.ParamType):
+    """
+    A shard of a run split across machines, given as `INDEX/TOTAL` such as `3/12`,
+    with INDEX counted from 1. Converted to a dict holding the `index` & `total`.
+    """
+
+    name = 'shard'
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, dict):
+            return value
+
+        try:
+            index, total = (int(part) for part in value.split('/'))
+        except ValueError:
+            self.fail(f'{value} is not a shard, such as 3/12', param, ctx)
+
+        if total < 1 or not 1 <= index <= total:
+            self.fail(f'{value} is not a shard from 1/TOTAL to TOTAL/TOTAL', param, ctx)
+
+        return {'index': index, 'total': total}
+
+class KeywordType(click.ParamType):
+    """
+    A keyword expression selecting tests by name, see pyspec.lib.selection.
+    It is checked here but passed on as the string it was given.
+    """
+
+    name = 'expression'
+
+    def convert(self, value, param, ctx):
+        # only imported when a keyword is given
+        # pylint: disable=import-outside-toplevel
+        from pyspec.lib.selection import SelectionError, parse
+
+        try:
+            parse(value)
+        except SelectionError as err:
+            self.fail(str(err), param, ctx)
+
+        return value
+
+class ReportType(click.ParamType):
+    """
+    A report file to write, given as `FORMAT=PATH` such as `junit=report.xml`,
+    where FORMAT is one of REPORT_FORMATS. Converted to a dict holding the
+    `format` & the absolute `path`.
+    """
+
+    name = 'report'
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, dict):
+            return value
+
+        report_format, _, path = value.partition('=')
+
+        if report_format not in REPORT_FORMATS or not path:
+            formats = ' or '.join(REPORT_FORMATS)
+            self.fail(f'{value} is not a report, such as junit=report.xml ({formats})', param, ctx)
+
+        return {'format': report_format, 'path': os.path.abspath(path)}
 
 class NoRunnerError(Exception):
     def __init__(self, module_name):
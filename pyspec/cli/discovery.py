@@ -0,0 +1,192 @@
+"""
+Recursive discovery of spec files. Directories are walked with os.scandir,
+skipping version control, virtualenv & dependency directories, & the file names
+found in each directory are kept in a manifest keyed by the directory's
+modification time, so later runs only list directories that changed.
+"""
+
+import os
+import json
+import time
+from fnmatch import fnmatch
+
+INCLUDE = ('*_spec.py',)
+# directories that never hold a project's specs
+EXCLUDE = (
+    '.git', '.hg', '.svn', '.tox', '.nox', '.venv', 'venv', 'node_modules', '__pycache__',
+    '.pyspec_cache', '.mypy_cache', '.pytest_cache', '*.egg-info',
+)
+MANIFEST_VERSION = 1
+# a directory changed this soon before it was listed may change again without its
+# modification time moving on, on filesystems with coarse timestamps
+RACY_NS = 2 * 10 ** 9
+
+class Discovery:
+    """
+    Finds spec files below a directory, in every nested directory.
+
+    On initialization, accepts:
+    - root          (STRING)    the project root, holding the manifest in its
+                                `.pyspec_cache` directory; patterns are matched
+                                against paths relative to it
+    - [include]     (LIST)      glob patterns a file's name or relative path must
+                                match to be a spec file, optional
+    - [exclude]     (LIST)      glob patterns for files & directories to skip, matched
+                                against their name or relative path, optional; these
+                                are added to the built in EXCLUDE patterns
+    - [manifest]    (STRING)    the manifest file name, or None to always walk every
+                                directory, optional
+
+    A directory's modification time only changes when entries are added to it,
+    removed from it or renamed, so a directory with the same modification time
+    as in the manifest has the same files & subdirectories. Its subdirectories
+    are still checked, since a change deeper in the tree doesn't reach it.
+    Directories modified less than RACY_NS before they were listed are always
+    listed again, as are directories outside the root, which the manifest
+    doesn't keep.
+    """
+
+    def __init__(self, root, include=None, exclude=None, manifest='discovery.json'):
+        self.root = root
+        self.include = tuple(include or INCLUDE)
+        self.exclude = EXCLUDE + tuple(exclude or ())
+        self.path = None if manifest is None else os.path.join(root, '.pyspec_cache', manifest)
+        self.directories = self._load()
+        self._changed = False
+
+    def find(self, directory):
+        """
+        Returns the absolute paths of every spec file below `directory`, sorted
+        by path, saving the manifest if anything changed since it was saved.
+        """
+        spec_files = []
+        pending = [os.path.abspath(directory)]
+
+        while pending:
+            current = pending.pop()
+            files, subdirectories = self._entries(current)
+            spec_files.extend(os.path.join(current, name) for name in files)
+            pending.extend(os.path.join(current, name) for name in subdirectories)
+
+        if self._changed:
+            self.save()
+
+        return sorted(spec_files)
+
+    def save(self):
+        """
+        Writes the manifest to disk in one step
+        """
+        if self.path is None:
+            return self
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f'{self.path}.{os.getpid()}.tmp'
+
+        with open(temp_path, 'w', encoding='utf-8') as manifest:
+            json.dump({
+                'version': MANIFEST_VERSION,
+                'include': list(self.include),
+                'exclude': list(self.exclude),
+                'directories': self.directories,
+            }, manifest)
+
+        os.replace(temp_path, self.path)
+        self._changed = False
+
+        return self
+
+    def _entries(self, directory):
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return [], []
+
+        key = _manifest_key(directory, self.root)
+
+        if key is None:
+            return self._scan(directory)
+
+        known = self.directories.get(key)
+
+        if known is not None and known[0] == mtime and known[1] - mtime >= RACY_NS:
+            return known[2], known[3]
+
+        scanned = time.time_ns()
+        files, subdirectories = self._scan(directory)
+        self.directories[key] = [mtime, scanned, files, subdirectories]
+        self._changed = True
+
+        return files, subdirectories
+
+    def _scan(self, directory):
+        files = []
+        subdirectories = []
+
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return files, subdirectories
+
+        # a directory holding pyvenv.cfg is a virtualenv, whatever its name
+        if any(entry.name == 'pyvenv.cfg' for entry in entries):
+            return files, subdirectories
+
+        for entry in entries:
+            relative = os.path.relpath(entry.path, self.root)
+
+            if self._matches(entry.name, relative, self.exclude):
+                continue
+
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.name)
+                elif entry.is_file() and self._matches(entry.name, relative, self.include):
+                    files.append(entry.name)
+            except OSError:
+                continue
+
+        return files, subdirectories
+
+    @staticmethod
+    def _matches(name, relative, patterns):
+        return any(fnmatch(name, pattern) or fnmatch(relative, pattern) for pattern in patterns)
+
+    def _load(self):
+        if self.path is None:
+            return {}
+
+        try:
+            with open(self.path, encoding='utf-8') as manifest:
+                data = json.load(manifest)
+        # a missing or corrupt manifest is treated as empty
+        except (OSError, ValueError):
+            return {}
+
+        if (
+                not isinstance(data, dict)
+                or data.get('version') != MANIFEST_VERSION
+                or data.get('include') != list(self.include)
+                or data.get('exclude') != list(self.exclude)
+        ):
+            return {}
+
+        # manifests written by earlier versions may hold directories outside
+        # the root, which are never looked up
+        return {
+            key: entry for key, entry in data.get('directories', {}).items()
+            if not _outside(key)
+        }
+
+def _manifest_key(directory, root):
+    # a directory's path relative to the root, or None for one outside it
+    try:
+        key = os.path.relpath(directory, root)
+    # on Windows, a path on another drive has no relative path
+    except ValueError:
+        return None
+
+    return None if _outside(key) else key
+
+def _outside(relative):
+    return relative == os.pardir or relative.startswith(os.pardir + os.sep)
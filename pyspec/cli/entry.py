@@ -1,13 +1,31 @@
 #!/usr/bin/env python
 """
 entry point for the pyspec program
+
+Only the modules needed to parse arguments are imported here. Each command
+imports what it runs when it is called, so `--version`, `--help` & a single
+spec file run by `one` don't pay for the rest of pyspec.
 """
 
+import os
+import functools
 import click
-from pyspec.cli.run_tests import RunTests
-from pyspec.cli.click_cust import ErrorHandlingGroup
+from pyspec import __version__
+from pyspec.cli.click_cust import (
+    ErrorHandlingGroup, JobsType, SizeType, ShardType, KeywordType, ReportType, TESTS_FAILED
+)
+from pyspec.lib.options import TB_STYLES, GRANULARITIES, PROFILE_DIR
 
-run_tests = RunTests()
+# pylint: disable=import-outside-toplevel
+
+@functools.lru_cache(maxsize=None)
+def get_run_tests():
+    """
+    Returns the RunTests instance shared by every command, creating it on first use
+    """
+    from pyspec.cli.run_tests import RunTests
+
+    return RunTests()
 
 msg = (
     'PySpec: version %(version)s\n'
@@ -15,8 +33,288 @@ msg = (
     'a barebones BDD style test runner for python'
 )
 
+def traceback_options(command):
+    """
+    Adds the options controlling how stack traces of failed tests are written
+    """
+    command = click.option(
+        '--tb-limit',
+        type=click.IntRange(min=0),
+        default=None,
+        help='keep at most this many of the innermost frames from each failed test'
+    )(command)
+
+    return click.option(
+        '--tb',
+        type=click.Choice(TB_STYLES),
+        default='long',
+        help='how to write stack traces: with source lines, one line per frame, or not at all'
+    )(command)
+
+def discovery_options(command):
+    """
+    Adds the options for choosing which files are found as spec files
+    """
+    command = click.option(
+        '--exclude',
+        multiple=True,
+        metavar='GLOB',
+        help='skip files & directories matching this pattern, by name or relative path; repeatable'
+    )(command)
+
+    return click.option(
+        '--include',
+        multiple=True,
+        metavar='GLOB',
+        help='find spec files matching this pattern instead of *_spec.py; repeatable'
+    )(command)
+
+def report_option(command):
+    """
+    Adds the option for writing machine-readable reports
+    """
+    return click.option(
+        '--report',
+        type=ReportType(),
+        multiple=True,
+        metavar='FORMAT=PATH',
+        help='also write each result to a jsonl or junit file as it finishes, '
+        'such as junit=report.xml; repeatable'
+    )(command)
+
+def exit_with_results(results):
+    """
+    Ends the current command with TESTS_FAILED as its exit code if any test
+    failed, or else returns the results
+    """
+    if results is not None and results.stats.number_of_failed_tests:
+        click.get_current_context().exit(TESTS_FAILED)
+
+    return results
+
+def keyword_option(command):
+    """
+    Adds the option for selecting tests by name
+    """
+    return click.option(
+        '--keyword', '-k',
+        type=KeywordType(),
+        default=None,
+        help="only run tests whose description path matches this expression, "
+        "such as \"cache and not 'slow test'\""
+    )(command)
+
+def last_failed_options(command):
+    """
+    Adds the options for running the tests that failed last time
+    """
+    command = click.option(
+        '--failed-first', '--ff',
+        is_flag=True,
+        help='run the spec files & test groups with tests that failed last time first'
+    )(command)
+
+    return click.option(
+        '--last-failed', '--lf',
+        is_flag=True,
+        help='only run the tests that failed last time, or every test if none did'
+    )(command)
+
+def last_failed_settings(last_failed, failed_first):
+    """
+    Returns the `failures` run parameter for the options given
+    """
+    return {'last_failed': last_failed, 'failed_first': failed_first}
+
+def maxfail_options(command):
+    """
+    Adds the options for stopping a run once enough tests have failed
+    """
+    command = click.option(
+        '--maxfail',
+        type=click.IntRange(min=1),
+        default=None,
+        metavar='N',
+        help='stop the run once N tests have failed, skipping every test not yet started'
+    )(command)
+
+    return click.option(
+        '--exitfirst', '-x',
+        is_flag=True,
+        help='stop the run at the first failed test, the same as --maxfail 1'
+    )(command)
+
+def maxfail_setting(exitfirst, maxfail):
+    """
+    Returns the `maxfail` run parameter for the options given
+    """
+    return 1 if exitfirst else maxfail
+
+def shard_options(command):
+    """
+    Adds the options for running one shard of a run split across machines
+    """
+    command = click.option(
+        '--shard-durations',
+        type=click.Path(dir_okay=False),
+        default=None,
+        help='the JSON file of spec file run times to balance shards by, which '
+        'sharded runs never write to; without it, shards are split by a hash of each path'
+    )(command)
+
+    return click.option(
+        '--shard',
+        type=ShardType(),
+        default=None,
+        metavar='INDEX/TOTAL',
+        help='only run this share of the spec files, such as 3/12 for the third of twelve'
+    )(command)
+
+def shard_settings(shard, shard_durations):
+    """
+    Returns the `shard` run parameter for the shard options given
+    """
+    if shard is None:
+        return None
+
+    durations = None if shard_durations is None else os.path.abspath(shard_durations)
+
+    return dict(shard, durations=durations)
+
+def durations_option(command):
+    """
+    Adds the option for listing the slowest tests & groups after a run
+    """
+    return click.option(
+        '--durations',
+        type=click.IntRange(min=0),
+        default=None,
+        metavar='N',
+        help='list the N slowest tests & groups after the run, or all of them if N is 0'
+    )(command)
+
+def import_times_option(command):
+    """
+    Adds the option for listing the spec files that took longest to import
+    """
+    return click.option(
+        '--import-times',
+        type=click.IntRange(min=0),
+        default=None,
+        metavar='N',
+        help='list the N spec files that took longest to import, or all of them if N is 0'
+    )(command)
+
+def profile_options(command):
+    """
+    Adds the options for profiling tests, groups or the whole run
+    """
+    command = click.option(
+        '--profile-top',
+        type=click.IntRange(min=1),
+        default=20,
+        metavar='N',
+        help='number of functions to list in the profile table'
+    )(command)
+    command = click.option(
+        '--profile-slower-than',
+        type=click.FloatRange(min=0),
+        default=None,
+        metavar='MS',
+        help='sample instead of using cProfile & only keep calls that took at least MS milliseconds'
+    )(command)
+
+    return click.option(
+        '--profile',
+        type=click.Choice(GRANULARITIES),
+        default=None,
+        help=f'profile each test, each group or the whole run, writing profiles to {PROFILE_DIR}'
+    )(command)
+
+def profile_settings(profile, profile_slower_than, profile_top):
+    """
+    Returns the `profile` run parameter for the profiling options given
+    """
+    if profile is None:
+        return None
+
+    return {
+        'granularity': profile,
+        'threshold': None if profile_slower_than is None else int(profile_slower_than * 10 ** 6),
+        'top': profile_top,
+    }
+
+def memory_options(command):
+    """
+    Adds the options for measuring the memory used by each test
+    """
+    command = click.option(
+        '--memory-top',
+        type=click.IntRange(min=0),
+        default=10,
+        metavar='N',
+        help='number of tests to list by peak memory, or all of them if N is 0'
+    )(command)
+    command = click.option(
+        '--memory-budget',
+        type=SizeType(),
+        default=None,
+        help='fail any test using more than this much memory at its peak, such as 512MB'
+    )(command)
+
+    return click.option(
+        '--memory',
+        is_flag=True,
+        help='measure the peak & retained memory of each test with tracemalloc'
+    )(command)
+
+def memory_settings(memory, memory_budget, memory_top):
+    """
+    Returns the `memory` run parameter for the memory options given; giving a
+    budget turns memory accounting on
+    """
+    if not memory and memory_budget is None:
+        return None
+
+    return {
+        'budget': memory_budget,
+        'top': memory_top,
+    }
+
+def benchmark_options(command):
+    """
+    Adds the options for where benchmark baselines are kept
+    """
+    command = click.option(
+        '--update-baselines',
+        is_flag=True,
+        help='replace the baseline of every benchmark ran with its new measurement'
+    )(command)
+
+    return click.option(
+        '--baselines',
+        type=click.Path(dir_okay=False),
+        default=None,
+        help=(
+            'the JSON file benchmark baselines are kept in, '
+            '.pyspec_cache/pyspec_baselines.json by default; give a path outside '
+            '.pyspec_cache to commit them'
+        )
+    )(command)
+
+def benchmark_settings(baselines, update_baselines):
+    """
+    Returns the `benchmarks` run parameter for the benchmark options given
+    """
+    return {
+        'path': None if baselines is None else os.path.abspath(baselines),
+        'update': update_baselines,
+    }
+
 @click.group(cls=ErrorHandlingGroup)
-@click.version_option(message=msg)
+# given explicitly, since click otherwise looks the version up with pkg_resources,
+# which is slower to import than the rest of the CLI
+@click.version_option(version=__version__, message=msg)
 def entry_point():
     """
     CLI companion tool for the Pyspec testing library.
@@ -25,22 +323,166 @@ def entry_point():
 @entry_point.command('all')
 @click.argument('path')
 @click.option('--verbose', '-v', is_flag=True, help='turns on verbose mode')
-def all_tests(path, verbose):
+@click.option(
+    '--jobs', '-j',
+    type=JobsType(),
+    default='1',
+    help='number of worker processes to run spec files across, or "auto" for one per CPU'
+)
+@click.option(
+    '--incremental',
+    is_flag=True,
+    help='replay cached results for spec files whose sources have not changed'
+)
+@discovery_options
+@shard_options
+@keyword_option
+@last_failed_options
+@maxfail_options
+@traceback_options
+@report_option
+@durations_option
+@import_times_option
+@profile_options
+@memory_options
+@benchmark_options
+def all_tests(
+        path, verbose, jobs, incremental, include, exclude, shard, shard_durations,
+        keyword, last_failed, failed_first, exitfirst, maxfail, tb, tb_limit, report, durations,
+        import_times, memory, memory_budget, memory_top, baselines, update_baselines, **profile
+):
     """
     Runs all tests in a given directory. PATH must be relative to the current $PWD.
-    This command will only find files in the given directory that end in `_spec.py`.
+    This command finds files ending in `_spec.py` in the given directory & every
+    directory nested in it, skipping version control, virtualenv & dependency
+    directories. Exits with 1 if any test failed.
     """
-    return run_tests.all_tests(path, verbose)
+    results = get_run_tests().all_tests(
+        path, verbose, jobs=jobs, incremental=incremental, tb=tb, tb_limit=tb_limit,
+        durations=durations, profile=profile_settings(**profile),
+        memory=memory_settings(memory, memory_budget, memory_top),
+        benchmarks=benchmark_settings(baselines, update_baselines),
+        include=include or None, exclude=exclude or None, import_times=import_times,
+        shard=shard_settings(shard, shard_durations), maxfail=maxfail_setting(exitfirst, maxfail),
+        keyword=keyword, failures=last_failed_settings(last_failed, failed_first),
+        reports=report or None
+    )
+
+    return exit_with_results(results)
 
 @entry_point.command()
 @click.argument('module')
 @click.option('--verbose', '-v', is_flag=True, help='turns on verbose mode')
-def one(module, verbose):
+@keyword_option
+@last_failed_options
+@maxfail_options
+@traceback_options
+@report_option
+@durations_option
+@import_times_option
+@profile_options
+@memory_options
+@benchmark_options
+def one(
+        module, verbose, keyword, last_failed, failed_first, exitfirst, maxfail, tb, tb_limit,
+        report, durations, import_times, memory, memory_budget, memory_top, baselines,
+        update_baselines, **profile
+):
     """
     Runs the specific test file given as a module name. MODULE must be just the file
-    name, without any file type extensions.
+    name, without any file type extensions. Exits with 1 if any test failed.
     """
-    return run_tests.one_file(module, verbose)
+    results = get_run_tests().one_file(
+        module, verbose, tb=tb, tb_limit=tb_limit, durations=durations,
+        profile=profile_settings(**profile),
+        memory=memory_settings(memory, memory_budget, memory_top),
+        benchmarks=benchmark_settings(baselines, update_baselines),
+        import_times=import_times, maxfail=maxfail_setting(exitfirst, maxfail),
+        keyword=keyword, failures=last_failed_settings(last_failed, failed_first),
+        reports=report or None
+    )
+
+    return exit_with_results(results)
+
+@entry_point.command('merge-reports')
+@click.argument('output', type=ReportType())
+@click.argument(
+    'sources',
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, dir_okay=False)
+)
+def merge_reports(output, sources):
+    """
+    Combines reports written by `--report`, such as one per shard, into one.
+    OUTPUT is the report to write, given as FORMAT=PATH like `--report`, & every
+    SOURCES file must be a report of the same format. Results cut short by an
+    interrupted run are kept up to the last complete one.
+    """
+    from pyspec.lib.report_files import merge
+
+    count = merge(output['format'], output['path'], sources)
+    click.echo(f'Merged {count} test results into {output["path"]}')
+
+    return count
+
+@entry_point.command()
+@click.argument('path')
+@click.option('--verbose', '-v', is_flag=True, help='turns on verbose mode')
+@click.option(
+    '--interval',
+    type=float,
+    default=.05,
+    help='seconds to wait between checks for changed files'
+)
+@discovery_options
+@traceback_options
+def watch(path, verbose, interval, include, exclude, tb, tb_limit):
+    """
+    Runs all tests in a given directory, then keeps running & re-runs any spec file
+    when it, or a module from your project that it imports, is saved. PATH must be
+    relative to the current $PWD. Stop watching with Ctrl-C.
+    """
+    parms = {
+        'verbose': verbose,
+        'muted': False,
+        'tb': tb,
+        'tb_limit': tb_limit,
+        'include': include or None,
+        'exclude': exclude or None
+    }
+
+    from pyspec.cli.watch import Watcher
+
+    return Watcher(get_run_tests(), path, parms, interval).watch()
+
+@entry_point.command()
+@click.argument('path')
+@click.option(
+    '--iterations', '-n',
+    type=click.IntRange(min=3),
+    default=5,
+    help='number of times to run each test group, the first is a warm-up'
+)
+@click.option(
+    '--threshold',
+    type=SizeType(),
+    default='1KB',
+    help='the least growth per run reported as a leak, such as 1KB'
+)
+def leaks(path, iterations, threshold):
+    """
+    Finds test groups that leak memory. Runs each top-level test group in a given
+    directory several times, collecting garbage & measuring the memory still held
+    after each run, then lists the groups whose retained memory keeps growing along
+    with the source lines that allocated it. PATH must be relative to the current $PWD.
+    """
+    from pyspec.cli.leaks import LeakFinder, leaks_string
+
+    findings = LeakFinder(get_run_tests(), path, iterations, threshold).find()
+    click.echo(leaks_string(findings, iterations))
+
+    return findings
 
 @entry_point.command()
 @click.argument('path')
@@ -48,10 +490,10 @@ def one(module, verbose):
 def list(path, verbose):
     """
     Lists all test groups available in in a given directory. PATH must be relative
-    to the current $PWD. This command will only find files in the given directory
-    that end in `_spec.py`.
+    to the current $PWD. This command finds files ending in `_spec.py` in the given
+    directory & every directory nested in it.
     """
-    res = run_tests.explore(path)
+    res = get_run_tests().explore(path)
     num = 0
 
     click.echo('')
@@ -62,11 +504,6 @@ def list(path, verbose):
     req = input('\nWhich test group would you like to run? ')
     req_int = int(req)
     print('')
-    results_str = res[req_int].run(verbose)
-
-    for line in results_str:
-        click.echo(line)
-
-        return True
+    res[req_int].run(verbose)
 
-    return False
+    return True
@@ -0,0 +1,150 @@
+"""
+Load spec files as real modules. Each spec file is given a module spec with a
+stable name taken from its path relative to the project root (so
+`tests/unit/example_spec.py` becomes `tests.unit.example_spec`) & registered in
+sys.modules, so a spec or helper that imports another spec file by that name
+gets the module already loaded instead of running it a second time.
+"""
+
+import os
+import sys
+import time
+import hashlib
+import builtins
+import importlib.util
+from contextlib import contextmanager
+
+def module_name(path, root):
+    """
+    Returns the module name a spec file is loaded as: its dotted path relative
+    to `root`, or for a file outside `root`, its file name prefixed with a hash
+    of its directory, so files with the same name in different places never
+    share a module
+    """
+    path = os.path.abspath(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+
+    try:
+        relative = os.path.relpath(path, root)
+    # on Windows, a path on another drive has no relative path
+    except ValueError:
+        relative = None
+
+    if relative is None or relative.startswith(os.pardir + os.sep):
+        digest = hashlib.sha1(os.path.dirname(path).encode()).hexdigest()[:8]
+
+        return f'_pyspec_{digest}_{stem}'
+
+    return os.path.splitext(relative)[0].replace(os.sep, '.')
+
+class SpecImporter:
+    """
+    Imports spec files for a test run, timing each import.
+
+    Every call to `load` runs the spec file again, since running it is what
+    declares its test groups to the current Runner. The exception is a spec file
+    already imported by another spec file since `begin` was last called, which
+    is reused rather than declaring its groups twice.
+
+    On initialization, accepts:
+    - root      (STRING)    the project root module names are relative to
+
+    The `import_times` attribute holds a `(path, duration)` tuple, in
+    nanoseconds, for each spec file loaded since `begin` was last called.
+    The `imports` attribute maps the name of each module that ran an import
+    statement while a spec file loaded to the names of the modules it
+    imported, including those already imported elsewhere, & those holding
+    names imported with `from module import name`.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.import_times = []
+        self.imports = {}
+        self._modules_before = {}
+
+    def begin(self):
+        """
+        Starts a new collection pass, forgetting earlier import times
+        """
+        self.import_times = []
+        self._modules_before = dict(sys.modules)
+
+        return self
+
+    def load(self, path):
+        """
+        Imports the spec file at `path` & returns its module. Bytecode is read
+        from & written to `__pycache__` as for any other import.
+        """
+        path = os.path.abspath(path)
+        name = module_name(path, self.root)
+        existing = sys.modules.get(name)
+
+        # imported by another spec file during this pass
+        if (
+                existing is not None
+                and existing is not self._modules_before.get(name)
+                and getattr(existing, '__file__', None) == path
+        ):
+            return existing
+
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        started = time.perf_counter_ns()
+        sys.modules[name] = module
+        # ran again, so what it imported last time may have changed
+        self.imports.pop(name, None)
+
+        try:
+            with self._recording_imports():
+                spec.loader.exec_module(module)
+        except BaseException:
+            # a spec file that failed to import shouldn't be found by later imports
+            if sys.modules.get(name) is module:
+                del sys.modules[name]
+            raise
+        finally:
+            self.import_times.append((path, time.perf_counter_ns() - started))
+
+        return module
+
+    @contextmanager
+    def _recording_imports(self):
+        original = builtins.__import__
+
+        def recording_import(name, importer_globals=None, importer_locals=None, fromlist=(),
+                             level=0):
+            imported = original(name, importer_globals, importer_locals, fromlist, level)
+            self._record(name, importer_globals, fromlist, level)
+
+            return imported
+
+        builtins.__import__ = recording_import
+
+        try:
+            yield
+        finally:
+            builtins.__import__ = original
+
+    def _record(self, name, importer_globals, fromlist, level):
+        importer = (importer_globals or {}).get('__name__')
+
+        if importer is None:
+            return
+
+        if level:
+            try:
+                name = importlib.util.resolve_name(
+                    '.' * level + name,
+                    importer_globals.get('__package__')
+                )
+            except (ImportError, ValueError):
+                return
+
+        parts = name.split('.')
+        imported = self.imports.setdefault(importer, set())
+        # importing a submodule imports every package above it, & names taken
+        # with `from` may be submodules
+        imported.update('.'.join(parts[:end]) for end in range(1, len(parts) + 1))
+        imported.update(f'{name}.{item}' for item in fromlist or () if item != '*')
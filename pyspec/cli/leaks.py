@@ -0,0 +1,117 @@
+"""
+Find test groups that leak memory by running each top-level group several times
+in the same process & checking whether the memory still held after each run,
+once garbage has been collected, keeps growing.
+"""
+
+import gc
+import tracemalloc
+from pyspec.lib.reporter import Reporter
+from pyspec.lib.memory import snapshot_filters, top_allocators, format_size
+
+# the lists kept by LeakFinder itself are left out of the allocators listed
+LEAK_FILTERS = snapshot_filters() + (tracemalloc.Filter(False, __file__),)
+
+class LeakFinder:
+    """
+    Runs every top-level test group in a directory `iterations` times, muted.
+
+    The first run of each group is a warm-up, so one-off allocations such as
+    caches filled on first use aren't mistaken for leaks. A group leaks if the
+    memory retained after every later run grows from the run before it, by at
+    least `threshold` bytes per run on average.
+
+    On initialization, accepts:
+    - run_tests     (RunTests)  used to find & import spec files
+    - test_dir_str  (STRING)    the directory to check, relative to the current $PWD
+    - [iterations]  (INTEGER)   how many times to run each group, at least 3
+    - [threshold]   (INTEGER)   the least average growth in bytes reported as a leak
+    - [allocators]  (INTEGER)   how many allocating source lines to list per leak
+    """
+
+    def __init__(self, run_tests, test_dir_str, iterations=5, threshold=1024, allocators=5):
+        if iterations < 3:
+            raise ValueError('at least 3 iterations are needed to see memory growing')
+
+        self.run_tests = run_tests
+        self.test_dir_str = test_dir_str
+        self.iterations = iterations
+        self.threshold = threshold
+        self.allocators = allocators
+
+    def find(self):
+        """
+        Checks every top-level group & returns a list of dicts, one per group,
+        holding its `description`, the `retained` bytes after each run, the
+        average `growth` per run after the warm-up, whether it `leaks` & the
+        `allocators` (`[file:line, size]`) whose memory grew the most
+        """
+        groups = [
+            group for group in self.run_tests.explore(self.test_dir_str) if not group.outer
+        ]
+        started_tracing = not tracemalloc.is_tracing()
+
+        if started_tracing:
+            tracemalloc.start()
+
+        try:
+            return [self.check(group) for group in groups]
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+    def check(self, group):
+        """
+        Runs a single top-level group `iterations` times & returns its findings,
+        see `find`
+        """
+        reporter = Reporter()
+        retained = []
+        baseline = None
+
+        for iteration in range(self.iterations):
+            group.run(reporter=reporter)
+            gc.collect()
+            retained.append(tracemalloc.get_traced_memory()[0])
+
+            if iteration == 0:
+                baseline = tracemalloc.take_snapshot()
+
+        growths = [after - before for before, after in zip(retained[1:], retained[2:])]
+        growth = sum(growths) // len(growths)
+        leaks = all(change > 0 for change in growths) and growth >= self.threshold
+
+        return {
+            'description': group.description,
+            'retained': retained,
+            'growth': growth,
+            'leaks': leaks,
+            'allocators': top_allocators(
+                baseline, tracemalloc.take_snapshot(), self.allocators, LEAK_FILTERS
+            ) if leaks else [],
+        }
+
+def leaks_string(findings, iterations):
+    """
+    Compiles the findings from LeakFinder.find into a human-readable string
+    """
+    leaking = [finding for finding in findings if finding['leaks']]
+    lines = [
+        '',
+        f'Checked {len(findings)} test group(s) over {iterations} runs each, '
+        f'{len(leaking)} leaking'
+    ]
+
+    for finding in findings:
+        if not finding['leaks']:
+            lines.append(f'{finding["description"]}: ok')
+            continue
+
+        lines.append(
+            f'{finding["description"]}: leaks {format_size(finding["growth"])} per run'
+        )
+
+        for allocator, size in finding['allocators']:
+            lines.append(f'  {format_size(size):>10}  {allocator}')
+
+    return '\n'.join(lines) + '\n'
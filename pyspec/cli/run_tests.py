@@ -1,9 +1,16 @@
 import os
 import sys
-import glob
-import importlib.machinery
-from types import ModuleType
-from pyspec.lib.runner import runner
+import time
+import functools
+from itertools import repeat
+from pyspec.lib.runner import runner, Runner
+from pyspec.lib.reporter import Recorder
+from pyspec.lib import profiling
+from pyspec.lib import last_failed
+from pyspec.cli import sharding
+from pyspec.cli.cache import CACHED_SETTINGS, ResultsCache, project_dependencies
+from pyspec.cli.discovery import Discovery
+from pyspec.cli.importer import SpecImporter
 # from pyspec.cli import click_cust
 from pub_sub import stable
 
@@ -17,30 +24,74 @@ class RunTests:
         self.results = None
         self.pub_sub = pub_sub
         self.runner = None
+        self.importer = SpecImporter(self.CWD)
 
-    def all_tests(self, test_dir_str, verbose=False, muted=False):
+    def all_tests(
+            self, test_dir_str, verbose=False, muted=False, jobs=1, incremental=False,
+            tb='long', tb_limit=None, durations=None, profile=None, memory=None,
+            benchmarks=None, include=None, exclude=None, import_times=None, shard=None,
+            maxfail=None, keyword=None, failures=None, reports=None
+    ):
         parms = {
             'verbose': verbose,
-            'muted': muted
+            'muted': muted,
+            'tb': tb,
+            'tb_limit': tb_limit,
+            'durations': durations,
+            'profile': profile,
+            'memory': memory,
+            'benchmarks': benchmarks,
+            'include': include,
+            'exclude': exclude,
+            'import_times': import_times,
+            'shard': shard,
+            'maxfail': maxfail,
+            'keyword': keyword,
+            'failures': failures,
+            'reports': reports
         }
 
+        if jobs > 1 or incremental or shard is not None:
+            return self._all_tests_by_file(test_dir_str, parms, jobs, incremental)
+
         self._publish_runner()
-        self._get_directory(test_dir_str)
+        spec_files = self.find_spec_files(test_dir_str, include, exclude)
+        # spec files without a failure to re-run aren't imported
+        self._import_spec_files(self._order_by_failures(spec_files, parms))
 
         self.pub_sub.topic('run results').sub(self._results_received)
         self.pub_sub.topic('run requested').pub(parms)
 
         return self.results
 
-    def one_file(self, file_path_str, verbose=False, muted=False):
+    def one_file(
+            self, file_path_str, verbose=False, muted=False, tb='long', tb_limit=None,
+            durations=None, profile=None, memory=None,
+            benchmarks=None, import_times=None, maxfail=None, keyword=None,
+            failures=None, reports=None
+    ):
         parms = {
             'verbose': verbose,
-            'muted': muted
+            'muted': muted,
+            'tb': tb,
+            'tb_limit': tb_limit,
+            'durations': durations,
+            'profile': profile,
+            'memory': memory,
+            'benchmarks': benchmarks,
+            'import_times': import_times,
+            'maxfail': maxfail,
+            'keyword': keyword,
+            'failures': failures,
+            'reports': reports
         }
 
         self._publish_runner()
+        self._order_by_failures([self._spec_path(file_path_str)], parms)
 
+        self.importer.begin()
         self._import_module(file_path_str)
+        self.runner.stats.import_times.extend(self.importer.import_times)
         self.pub_sub.topic('run results').sub(self._results_received)
         self.pub_sub.topic('run requested').pub(parms)
 
@@ -56,25 +107,198 @@ class RunTests:
 
         return res
 
+    def run_file(self, spec_file, parms):
+        """
+        Imports & runs a single spec file on this instance's Runner, which is
+        emptied first. Returns a plain payload holding the spec file's path, the
+        events recorded while it ran (see `Recorder`), the project modules it
+        depends on, any profile files written, the nanoseconds its import took,
+        the nanoseconds it took to import & run & whether it `stopped` early
+        (see `maxfail`), to be merged into another Runner with `Runner.merge`.
+        """
+        if self.runner is None:
+            self._publish_runner()
+
+        started = time.perf_counter_ns()
+        recorder = Recorder()
+        # report files are only written by the Runner the payload is merged into
+        recording_parms = dict(parms, reporter=recorder, reports=None)
+
+        self.runner.reset()
+        self.importer.begin()
+        module = self._import_module(spec_file, True)
+
+        self.runner.run_groups(self.runner.test_groups, recording_parms)
+
+        return {
+            'path': spec_file,
+            'events': recorder.events,
+            'dependencies': project_dependencies(module, self.CWD, self.importer.imports),
+            'profiles': profiling.take_written(),
+            'import_time': self.importer.import_times[-1][1],
+            'duration': time.perf_counter_ns() - started,
+            'stopped': self.runner.stats.stopped,
+        }
+
+    def _all_tests_by_file(self, test_dir_str, parms, jobs, incremental):
+        """
+        Runs each spec file on its own, in worker processes if `jobs` is above 1,
+        then merges the results of every file into a single Runner in spec file
+        order. When `incremental` is set, spec files whose sources are unchanged
+        since the last run replay their cached results instead of running; the
+        cache isn't used when tests are selected by `keyword` or by failures,
+        since cached results may hold a different selection, & results cached
+        with other CACHED_SETTINGS aren't replayed.
+
+        With the `shard` parameter, a dict holding a shard's `index` & the `total`
+        number of shards, only that shard's spec files run (see
+        pyspec.cli.sharding), balanced by the run times in its `durations` file
+        if one is given. The time each spec file took is recorded in a file of
+        the shard's own, or in the default durations file without `shard`.
+        Spec files are then left out or reordered by the `failures` parameter
+        (see pyspec.lib.last_failed).
+        """
+        self.runner = Runner(self.pub_sub)
+        self.pub_sub.topic('run results').sub(self._results_received)
+        self.runner.stats.start_time_tracking()
+
+        spec_files = self.find_spec_files(test_dir_str, parms['include'], parms['exclude'])
+        shard_parms = parms.get('shard') or {}
+        durations_path = os.path.join(self.CWD, sharding.DURATIONS_FILE)
+
+        if shard_parms:
+            # the durations given are only read, so every shard splits the same
+            # way whichever of them ran first
+            balanced_by = shard_parms.get('durations')
+            spec_files = sharding.select(
+                spec_files,
+                shard_parms['index'],
+                shard_parms['total'],
+                balanced_by and sharding.read_durations(os.path.join(self.CWD, balanced_by)),
+                self.CWD
+            )
+            durations_path = os.path.join(
+                self.CWD,
+                sharding.shard_durations_file(shard_parms['index'], shard_parms['total'])
+            )
+
+        spec_files = self._order_by_failures(spec_files, parms)
+        # narrowed to these spec files, so `last_failed` means some of them failed
+        selecting = parms.get('keyword') or (parms['failures'] or {}).get('last_failed')
+        cache = ResultsCache(
+            self.CWD,
+            settings={key: parms.get(key) for key in CACHED_SETTINGS}
+        ) if incremental and not selecting else None
+        cached = {}
+
+        if cache is not None:
+            for spec_file in spec_files:
+                payload = cache.lookup(spec_file)
+
+                if payload is not None:
+                    cached[spec_file] = payload
+
+        stale = [spec_file for spec_file in spec_files if spec_file not in cached]
+        ran = self._run_files(stale, parms, jobs)
+        durations = {}
+
+        for spec_file in spec_files:
+            # with maxfail, no further spec file is ran or replayed once the
+            # merged results have enough failures
+            if self.runner.stats.stopped:
+                break
+
+            if spec_file in cached:
+                payload = cached[spec_file]
+            else:
+                # files are ran in order, so the next payload is for this file
+                payload = next(ran)
+                durations[spec_file] = payload['duration']
+
+                # a spec file stopped by maxfail only has some of its results
+                if cache is not None and not payload['stopped']:
+                    cache.record(spec_file, payload)
+
+            self.runner.merge(payload, parms)
+
+        ran.close()
+
+        if cache is not None:
+            cache.save()
+
+        if durations:
+            # a shard's own file only holds the times of the files it last ran
+            sharding.record_durations(durations_path, durations, self.CWD, keep=not shard_parms)
+
+        self.runner.finish(parms)
+
+        return self.results
+
+    def _run_files(self, spec_files, parms, jobs):
+        """
+        Yields the payload for each given spec file, in order. Spec files not
+        yet started by a worker are cancelled if the generator is closed early.
+        """
+        if jobs > 1:
+            from concurrent.futures import ( # pylint: disable=import-outside-toplevel
+                ProcessPoolExecutor
+            )
+
+            executor = ProcessPoolExecutor(max_workers=jobs)
+
+            try:
+                # map yields payloads in the order the spec files were given,
+                # regardless of which worker finishes first
+                yield from executor.map(run_spec_file, spec_files, repeat(parms))
+            finally:
+                executor.shutdown(cancel_futures=True)
+        else:
+            worker = RunTests(self.pub_sub)
+
+            for spec_file in spec_files:
+                yield worker.run_file(spec_file, parms)
+
+    def _order_by_failures(self, spec_files, parms):
+        """
+        Returns the given spec files in the order to run them, leaving out those
+        without a failure to re-run, for the `failures` parameter, which is
+        narrowed to these files (see pyspec.lib.last_failed)
+        """
+        if parms.get('failures') is None:
+            return spec_files
+
+        failures = last_failed.Failures({'root': self.CWD, **parms['failures']})
+        parms['failures'] = failures.narrow(spec_files)
+
+        return failures.spec_files(spec_files)
+
     def _import_module(self, name, full_path=False):
-        ftype_name = name if name[-3:] == '.py' else name + '.py'
-        path = ftype_name if full_path else self.CWD + '/' + ftype_name
+        return self.importer.load(name if full_path else self._spec_path(name))
+
+    def _spec_path(self, name):
+        return os.path.join(self.CWD, name if name[-3:] == '.py' else name + '.py')
 
-        # using SourceFileLoader & .exec_module from this answer on SO:
-        # https://stackoverflow.com/a/19011259/4642869
-        loader = importlib.machinery.SourceFileLoader(name, path)
-        module = ModuleType(loader.name)
-        loader.exec_module(module)
+    def find_spec_files(self, test_dir_str, include=None, exclude=None):
+        """
+        Returns every spec file in the given directory & all of its nested
+        directories, sorted by path. `include` & `exclude` are optional lists of
+        glob patterns, see `Discovery`.
+        """
+        discovery = Discovery(self.CWD, include, exclude)
 
-        return module
+        return discovery.find(os.path.join(self.CWD, test_dir_str))
 
-    def _get_directory(self, test_dir_str):
-        path = self.CWD + '/' + test_dir_str + '/*_spec.py'
-        spec_files = glob.glob(path)
+    def _get_directory(self, test_dir_str, include=None, exclude=None):
+        return self._import_spec_files(self.find_spec_files(test_dir_str, include, exclude))
+
+    def _import_spec_files(self, spec_files):
+        self.importer.begin()
 
         for spec_file in spec_files:
             self._import_module(spec_file, True)
 
+        self.runner.stats.import_times.extend(self.importer.import_times)
+
         return True
 
     def _publish_runner(self):
@@ -87,3 +311,23 @@ class RunTests:
         self.results = results
 
         return bool(self.results is not None)
+
+@functools.lru_cache(maxsize=None)
+def _worker():
+    # one RunTests per worker process, so each spec file ran by the process
+    # reuses the same Runner & pub_sub subscriptions
+    return RunTests()
+
+def run_spec_file(spec_file, parms):
+    """
+    Imports & runs a single spec file, returning its payload (see
+    `RunTests.run_file`). Defined at module level so it can be sent to a worker
+    process by `RunTests.all_tests` when `jobs` is above 1.
+    """
+    payload = _worker().run_file(spec_file, parms)
+    # a worker can't tell which spec file is its last, so a whole-run profile
+    # is written after each, holding every call the worker has profiled so far
+    profiling.finish()
+    payload['profiles'].extend(profiling.take_written())
+
+    return payload
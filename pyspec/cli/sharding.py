@@ -0,0 +1,117 @@
+"""
+Split the spec files of a run across several machines. Every machine collects
+the same spec files & picks its own share, so the split needs no coordination:
+given the same files & the same durations file, every shard agrees on which
+files belong to which shard.
+
+When earlier run times of the spec files are given, files are handed out
+longest first, each to the shard with the least total time so far, so every
+shard takes about as long as the others. Otherwise each file goes to the shard
+picked by a stable hash of its path. Shards never write to the durations file
+they were split by, since a shard that did would split differently from those
+that ran before it; each records its own times in a file of its own instead.
+"""
+
+import os
+import json
+import hashlib
+
+DURATIONS_FILE = os.path.join('.pyspec_cache', 'durations.json')
+
+def shard_durations_file(index, total):
+    """
+    Returns the path, relative to the project, of the file a shard records the
+    run times of its own spec files in
+    """
+    return os.path.join('.pyspec_cache', f'durations.{index}-of-{total}.json')
+
+def select(spec_files, index, total, durations=None, root=None):
+    """
+    Returns the spec files that belong to one shard, in their original order.
+
+    Accepts:
+    - spec_files    (LIST)      the absolute paths of every spec file in the run
+    - index         (INTEGER)   the shard to select, from 1 to `total`
+    - total         (INTEGER)   the number of shards
+    - [durations]   (DICT)      earlier run times in nanoseconds, keyed by paths
+                                relative to `root`, see `read_durations`
+    - [root]        (STRING)    the project root paths are relative to, the
+                                current $PWD by default
+
+    Returns:
+    - A list of the spec files given to shard `index`
+    """
+    root = root or os.getcwd()
+    keys = {spec_file: _key(spec_file, root) for spec_file in spec_files}
+    durations = durations or {}
+
+    if any(key in durations for key in keys.values()):
+        shards = _balance(keys, total, durations)
+    else:
+        shards = {spec_file: _hash(key) % total for spec_file, key in keys.items()}
+
+    return [spec_file for spec_file in spec_files if shards[spec_file] == index - 1]
+
+def _balance(keys, total, durations):
+    known = [durations[key] for key in keys.values() if key in durations]
+    # files without a recorded time are expected to take an average time
+    average = sum(known) // len(known)
+    loads = [0] * total
+    shards = {}
+
+    # longest first, ties broken by path so every shard sorts the same way
+    ordered = sorted(keys.items(), key=lambda item: (-durations.get(item[1], average), item[1]))
+
+    for spec_file, key in ordered:
+        shard = loads.index(min(loads))
+        shards[spec_file] = shard
+        loads[shard] += durations.get(key, average)
+
+    return shards
+
+def _key(spec_file, root):
+    # paths are compared relative to the project, with forward slashes, so
+    # machines with different checkout directories or platforms agree
+    return os.path.relpath(spec_file, root).replace(os.sep, '/')
+
+def _hash(key):
+    return int(hashlib.sha1(key.encode()).hexdigest(), 16)
+
+def read_durations(path):
+    """
+    Returns the run times recorded in a durations file, or an empty dict if it
+    is missing or unreadable
+    """
+    try:
+        with open(path, encoding='utf-8') as durations_file:
+            data = json.load(durations_file)
+    # a missing or corrupt durations file is treated as empty
+    except (OSError, ValueError):
+        return {}
+
+    return data if isinstance(data, dict) else {}
+
+def record_durations(path, durations, root=None, keep=True):
+    """
+    Adds the run times of the given spec files to a durations file, keeping the
+    times already recorded for other files unless `keep` is False.
+
+    Accepts:
+    - path          (STRING)    the durations file
+    - durations     (DICT)      run times in nanoseconds, keyed by absolute path
+    - [root]        (STRING)    the project root paths are stored relative to
+    - [keep]        (BOOLEAN)   keep the times recorded for other files
+    """
+    root = root or os.getcwd()
+    recorded = read_durations(path) if keep else {}
+    recorded.update({_key(spec_file, root): duration for spec_file, duration in durations.items()})
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+
+    with open(temp_path, 'w', encoding='utf-8') as durations_file:
+        json.dump(recorded, durations_file, indent=2, sort_keys=True)
+
+    os.replace(temp_path, path)
+
+    return recorded
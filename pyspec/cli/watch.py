@@ -0,0 +1,151 @@
+"""
+Watch a test directory & re-run affected spec files whenever a spec file or a
+project module it depends on is saved, keeping one warm interpreter alive
+between runs.
+"""
+
+import os
+import sys
+import time
+import importlib
+from pyspec.lib.runner import Runner
+
+class Watcher:
+    """
+    Polls the modification times of every spec file in a directory & of every
+    project module those spec files depend on.
+
+    On initialization, accepts:
+    - run_tests     (RunTests)  used to find, import & run spec files
+    - test_dir_str  (STRING)    the directory to watch, relative to the current $PWD
+    - parms         (DICT)      the `verbose` & `muted` parameters for each run, & the
+                                `include` & `exclude` patterns for finding spec files
+    - [interval]    (FLOAT)     seconds to wait between polls, optional
+    """
+
+    def __init__(self, run_tests, test_dir_str, parms, interval=.05):
+        self.run_tests = run_tests
+        self.test_dir_str = test_dir_str
+        self.parms = parms
+        self.interval = interval
+        # the project modules each spec file depended on when it last ran
+        self.dependencies = {}
+        self.mtimes = {}
+
+    def watch(self):
+        """
+        Runs every spec file once, then re-runs affected spec files each time a
+        change is seen, until interrupted with Ctrl-C.
+        """
+        self.mtimes = self._snapshot()
+        self.run(self.spec_files())
+
+        try:
+            while True:
+                time.sleep(self.interval)
+                changed = self.poll()
+
+                if changed:
+                    self.reload(changed)
+                    self.run(self.affected(changed))
+        except KeyboardInterrupt:
+            return self
+
+    def spec_files(self):
+        """
+        Returns every spec file currently in the watched directory
+        """
+        return self.run_tests.find_spec_files(
+            self.test_dir_str,
+            self.parms.get('include'),
+            self.parms.get('exclude')
+        )
+
+    def poll(self):
+        """
+        Returns the set of watched files that were added, changed or removed
+        since the last poll.
+        """
+        mtimes = self._snapshot()
+        changed = {
+            path for path in set(mtimes) | set(self.mtimes)
+            if mtimes.get(path) != self.mtimes.get(path)
+        }
+        self.mtimes = mtimes
+
+        return changed
+
+    def affected(self, changed):
+        """
+        Returns the spec files that need to run again after the given files
+        changed, in spec file order.
+        """
+        return [
+            spec_file for spec_file in self.spec_files()
+            if spec_file in changed or changed.intersection(self.dependencies.get(spec_file, ()))
+        ]
+
+    def reload(self, changed):
+        """
+        Reloads any already imported project module whose source file changed,
+        in the order the modules were first imported. Spec files are always
+        imported fresh when they run, so they aren't reloaded here.
+        """
+        spec_files = set(self.spec_files())
+
+        for module in list(sys.modules.values()):
+            path = getattr(module, '__file__', None)
+
+            if not isinstance(path, str) or os.path.abspath(path) in spec_files:
+                continue
+
+            if os.path.abspath(path) in changed:
+                try:
+                    importlib.reload(module)
+                # a broken save shouldn't end the watch, the error will show
+                # again in the spec files that import the module
+                except Exception as err: # pylint: disable=broad-except
+                    print(f'Could not reload {path}: {err}')
+
+        return self
+
+    def run(self, spec_files):
+        """
+        Runs the given spec files & prints their combined results
+        """
+        results = Runner(self.run_tests.pub_sub)
+        results.stats.start_time_tracking()
+
+        for spec_file in spec_files:
+            try:
+                payload = self.run_tests.run_file(spec_file, self.parms)
+            # keep watching when a spec file can't even be imported
+            except Exception as err: # pylint: disable=broad-except
+                print(f'Could not run {spec_file}: {err}')
+                continue
+
+            self.dependencies[spec_file] = payload['dependencies']
+            results.merge(payload, self.parms)
+
+        # start tracking dependencies first seen in this run, without hiding
+        # changes to already tracked files saved while the run was going
+        for path, mtime in self._snapshot().items():
+            self.mtimes.setdefault(path, mtime)
+
+        return results.finish(self.parms)
+
+    def _snapshot(self):
+        paths = set(self.spec_files())
+
+        for dependencies in self.dependencies.values():
+            paths.update(dependencies)
+
+        mtimes = {}
+
+        for path in paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+
+        return mtimes
@@ -0,0 +1,74 @@
+"""
+A single event loop shared by every async test in a run. The loop runs on its
+own daemon thread, so awaitables can be handed to it from the main thread or
+from any thread running a concurrent test group.
+
+asyncio is slow to import, so it is only imported once an async test runs.
+"""
+
+import os
+import threading
+
+class SharedLoop:
+    """
+    Lazily starts an event loop on a background thread the first time it is
+    needed & keeps it running for the rest of the process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._pid = None
+
+    def get(self):
+        """
+        Returns the shared event loop, starting it if it isn't running yet. A
+        loop inherited by a forked worker process is replaced, since the thread
+        running it does not survive the fork.
+        """
+        import asyncio # pylint: disable=import-outside-toplevel
+
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name='pyspec-event-loop',
+                    daemon=True
+                )
+                self._pid = os.getpid()
+                self._thread.start()
+
+        return self._loop
+
+    def run(self, awaitable):
+        """
+        Runs the given awaitable to completion on the shared loop & returns its
+        result, re-raising any exception it raised.
+        """
+        import asyncio # pylint: disable=import-outside-toplevel
+
+        loop = self.get()
+
+        if threading.current_thread() is self._thread:
+            raise RuntimeError('cannot wait on the shared event loop from inside it')
+
+        return asyncio.run_coroutine_threadsafe(_wrap(awaitable), loop).result()
+
+async def _wrap(awaitable):
+    return await awaitable
+
+LOOP = SharedLoop()
+
+def shared_loop():
+    """
+    Returns the event loop shared by all async tests
+    """
+    return LOOP.get()
+
+def run(awaitable):
+    """
+    Runs the given awaitable on the shared event loop & returns its result
+    """
+    return LOOP.run(awaitable)
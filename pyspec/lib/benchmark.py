@@ -0,0 +1,192 @@
+"""
+Micro-benchmarks that run as tests. A benchmark test calls its target many
+times & fails if it got slower than the baseline recorded for it by more than
+a tolerance, so performance checks live in the same spec files as behaviour
+checks.
+
+Each benchmark is measured in three steps:
+- warm-up: the target is called repeatedly for a short time, so caches are
+  filled & lazy imports are done before anything is timed
+- calibration: the number of calls per round is doubled until a round takes
+  long enough for the clock's resolution not to matter
+- rounds: each round is timed with garbage collection turned off, so a
+  collection triggered by earlier code doesn't land in a single round
+
+Baselines are kept in a JSON file in the project's `.pyspec_cache` directory,
+keyed by each test's description path. To share them, such as with CI, keep
+them in a file committed along with the spec files instead, given as `path`.
+"""
+
+import os
+import gc
+import json
+import time
+import threading
+from pyspec.lib.stats import format_duration
+
+BASELINE_FILE = os.path.join('.pyspec_cache', 'pyspec_baselines.json')
+
+# the baseline settings used by the current process, see configure
+BASELINES = {'path': None, 'update': False, 'loaded': None}
+
+_LOCK = threading.Lock()
+
+class BenchmarkRegression(AssertionError):
+    """
+    Raised on a benchmark test that got slower than its baseline by more than
+    its tolerance
+    """
+
+    def __init__(self, fastest, baseline, tolerance):
+        super().__init__(
+            f'The fastest call took {format_duration(fastest)}, '
+            f'{(fastest / baseline - 1) * 100:.1f}% slower than the baseline of '
+            f'{format_duration(baseline)}; the tolerance is {tolerance * 100:.1f}%'
+        )
+
+def configure(settings):
+    """
+    Sets where baselines are kept & whether they are replaced by this run's
+    measurements, from the `benchmarks` run parameter: a dict that may hold a
+    `path` to the baseline file & `update`. None restores the defaults.
+    """
+    settings = settings or {}
+
+    with _LOCK:
+        BASELINES['path'] = settings.get('path')
+        BASELINES['update'] = settings.get('update', False)
+        BASELINES['loaded'] = None
+
+def baseline_path():
+    """
+    Returns the path of the baseline file in use
+    """
+    return BASELINES['path'] or os.path.join(os.getcwd(), BASELINE_FILE)
+
+def measure(target, warmup=.1, rounds=10, round_time=.01, disable_gc=True):
+    """
+    Measures the time taken by each call to `target`.
+
+    Accepts:
+    - target        (FUNCTION)  called with no arguments
+    - [warmup]      (FLOAT)     seconds to spend calling `target` before timing it
+    - [rounds]      (INTEGER)   how many timed rounds to run
+    - [round_time]  (FLOAT)     the least number of seconds each round should take
+    - [disable_gc]  (BOOLEAN)   turn garbage collection off while rounds are timed
+
+    Returns:
+    - A dict holding the `mean`, `stddev` & `min` nanoseconds per call across the
+      rounds, the number of `loops` (calls) per round & the number of `rounds`
+    """
+    import statistics # pylint: disable=import-outside-toplevel
+
+    warmup_ends = time.perf_counter() + warmup
+
+    target()
+    while time.perf_counter() < warmup_ends:
+        target()
+
+    loops = 1
+
+    while _time_loops(target, loops) < round_time * 10 ** 9 and loops < 2 ** 30:
+        loops *= 2
+
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+
+    if disable_gc:
+        gc.disable()
+
+    try:
+        times = [_time_loops(target, loops) / loops for _ in range(rounds)]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {
+        'mean': statistics.mean(times),
+        'stddev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'min': min(times),
+        'loops': loops,
+        'rounds': rounds,
+    }
+
+def _time_loops(target, loops):
+    calls = range(loops)
+    started = time.perf_counter_ns()
+
+    for _ in calls:
+        target()
+
+    return time.perf_counter_ns() - started
+
+def compare(caller, actual, expected): # pylint: disable=unused-argument
+    """
+    The comparison used by `Test.benchmark`: measures the test's target, stores
+    the measurement on its result & raises BenchmarkRegression if the fastest
+    call is slower than the baseline by more than the tolerance. A benchmark
+    without a baseline records one & passes.
+
+    While tracemalloc is tracing, such as with `--memory`, every allocation is
+    slowed down, so the measurement is neither recorded nor compared; it is
+    marked as `traced` instead.
+    """
+    import tracemalloc # pylint: disable=import-outside-toplevel
+
+    tolerance, settings = expected
+    measurement = measure(caller.actual, **settings)
+    key = ' > '.join(caller.description_path)
+    traced = tracemalloc.is_tracing()
+    baseline = None
+
+    if not traced:
+        with _LOCK:
+            baseline = _loaded().get(key)
+
+            if baseline is None or BASELINES['update']:
+                _save(key, dict(measurement))
+
+    measurement['baseline'] = None if baseline is None else baseline['min']
+    measurement['traced'] = traced
+    caller.result.benchmark = measurement
+
+    if baseline is not None and not BASELINES['update']:
+        if measurement['min'] > baseline['min'] * (1 + tolerance):
+            raise BenchmarkRegression(measurement['min'], baseline['min'], tolerance)
+
+    return caller
+
+def _loaded():
+    loaded = BASELINES['loaded']
+
+    if loaded is None:
+        loaded = BASELINES['loaded'] = _read(baseline_path())
+
+    return loaded
+
+def _read(path):
+    try:
+        with open(path, encoding='utf-8') as baseline_file:
+            data = json.load(baseline_file)
+    # a missing or corrupt baseline file is treated as empty
+    except (OSError, ValueError):
+        return {}
+
+    return data if isinstance(data, dict) else {}
+
+def _save(key, measurement):
+    # read the file again before writing, so baselines recorded by other worker
+    # processes in the meantime are kept
+    path = baseline_path()
+    baselines = _read(path)
+    baselines[key] = measurement
+    loaded = _loaded()
+    loaded[key] = measurement
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+
+    with open(temp_path, 'w', encoding='utf-8') as baseline_file:
+        json.dump(baselines, baseline_file, indent=2, sort_keys=True)
+
+    os.replace(temp_path, path)
@@ -59,7 +59,7 @@ class Comparisons:
             raise AssertionError(message=f'No error was raised, instead got {actual_result}')
 
         # All exceptions are caught in order to continue parsing other tests.
-        # Caught exceptions are stored at the Test instance's `err` & `stack_trace`
+        # Caught exceptions are stored on the Test instance's `result` with a summary of their frames
         # attributes & will be displayed in the test failure message
         except Exception as err: # pylint: disable=broad-except
             # disabling pylint warning on typecheck as the only test that should
@@ -3,30 +3,42 @@ Test runner for python, see runner_spec for example usage
 """
 
 import sys
-import traceback
+import time
+import inspect
+import threading
+from contextvars import ContextVar
 from pub_sub import stable
 from . import comparisons as Comparisons
+from . import aio
+from . import profiling
+from . import memory
+from . import benchmark
+from . import selection
+from .reporter import Reporter, TextReporter, stopped
+from .result import TestResult
 
 PUB_SUB = stable.event('pyspec')
 
-COLOR_GREEN = "\033[32m"
-COLOR_RED = "\033[31m"
-COLOR_RESET = "\033[0m"
+# holds the BeforeScope for the test currently running in this thread (or
+# asyncio task), so tests running at the same time never share befores
+BEFORE_SCOPE = ContextVar('before_scope', default=None)
 
-def describe(description, alt_pub_sub=None):
+def describe(description, alt_pub_sub=None, concurrency=None):
     """
     Initilizes a new test group object using Describe
 
     Accepts:
     - description   (STRING)                a string describing the test group
-    - [outer]       (Describe instance)     another test group to inherit common state
-                                            from, optional
+    - [alt_pub_sub] (pub_sub.Event)         an alternate Event to publish the new group on,
+                                            optional
+    - [concurrency] (INTEGER)               the number of threads to run the group's tests
+                                            on, optional; see Describe.concurrent
 
     Returns:
     - An instance of Describe
     """
 
-    group = Describe(description)
+    group = Describe(description, concurrency)
 
     if alt_pub_sub:
         used_pub_sub = alt_pub_sub
@@ -37,6 +49,70 @@ def describe(description, alt_pub_sub=None):
 
     return group
 
+class BeforeScope:
+    """
+    The befores seen by a single test. Each before is built the first time the
+    test accesses it & kept for the rest of that test only.
+
+    On initialization, accepts:
+    - group     (Describe)  the test group running the test
+    - befores   (DICT)      the group's resolved befores, as `(value, factory, after)`
+                            tuples by name
+    """
+
+    __slots__ = ('group', 'befores', 'values')
+
+    def __init__(self, group, befores):
+        self.group = group
+        self.befores = befores
+        self.values = {}
+
+    def __contains__(self, name):
+        return name in self.values or name in self.befores
+
+    def get(self, name):
+        """
+        Returns the test's value for a before, building it on first access
+        """
+        try:
+            return self.values[name]
+        except KeyError:
+            value, factory, _ = self.befores[name]
+            self.values[name] = value() if factory else value
+
+            return self.values[name]
+
+    def set(self, name, value):
+        """
+        Replaces the test's value for a before
+        """
+        self.values[name] = value
+
+    def tear_down(self):
+        """
+        Calls the `after` given for each before the test used, in the reverse of
+        the order they were built, with the test's value for it. Every `after`
+        is called even if one raises; the first error raised is returned.
+        """
+        error = None
+
+        for name, value in reversed(list(self.values.items())):
+            after = self.befores[name][2] if name in self.befores else None
+
+            if after is None:
+                continue
+
+            try:
+                after(value)
+            # keep tearing down the rest, the error is reported on the test
+            except Exception as err: # pylint: disable=broad-except
+                if error is None:
+                    error = err
+
+        self.values = {}
+
+        return error
+
 class Describe:
     """
     A class to describe a new test group
@@ -48,12 +124,16 @@ class Describe:
     - tests                 (LIST)      an empty list where each test function will be stored
     - [outer]               (Describe)  the outer test group, if nested, optional
     - inners                (LIST)      an empty list where any nested test groups will be stored
-    - results               (LIST)      an empty list where test results are stored by `run`
-    - base, tab, & tabplus  (STRING)    strings used to increment tabs for results printing
+    - lets & let_factories  (DICT)      values & factories set by `let`, by name
     - let                   (METHOD)    set common values to be shared between all tests in a group
+    - befores, before_factories, & before_afters
+                            (DICT)      values, factories, & teardowns set by `before`, by name
     - before                (METHOD)    set values to be re-evaluated before each test
     - it                    (METHOD)    a method used to create a new test in the group,
                                         adds an instance of Test to the self.tests list
+    - concurrent            (METHOD)    run the group's tests on a pool of threads
+    - duration              (INTEGER)   nanoseconds spent running the group & its inners,
+                                        None until the group has ran
     - [run]                 (METHOD)    a method used to run the test group & any inners,
                                         this one will only exist if it has no outer attribute
 
@@ -62,38 +142,86 @@ class Describe:
     a form of prototypical inheritance between test groups.
     """
 
-    def __init__(self, description):
+    # __dict__ is kept so spec files can still set their own attributes on a group
+    __slots__ = (
+        'description',
+        'concurrency',
+        'tests',
+        '__outer',
+        'inners',
+        'lets',
+        'let_factories',
+        'befores',
+        'before_factories',
+        'before_afters',
+        '_resolved_befores',
+        '_let_lock',
+        'duration',
+        '__dict__',
+    )
+
+    def __init__(self, description, concurrency=None):
         self.description = description
+        self.concurrency = concurrency
 
         self.tests = []
         self.__outer = None
         self.inners = []
-        self.results = []
         self.lets = {}
+        self.let_factories = {}
         self.befores = {}
+        self.before_factories = {}
+        self.before_afters = {}
+        self._resolved_befores = None
+        self._let_lock = threading.RLock()
+        self.duration = None
 
-        self.base = ''
-        self.tab = '  '
-        self.tabplus = self.tab + '  '
-
-    def let(self, name, value):
+    def let(self, name, value, factory=False):
         """
         Sets values on the test group to be parsed later when the test is ran. If an
         error is thrown in the definition of a `let`, it will be raised in any test
-        that depends upon it the let. Lets are evaluated once before any tests in the
-        group are ran & are not re-evaluated again.
+        that depends upon it the let.
+
+        If `factory` is True, `value` must be a callable that builds the let's value.
+        It isn't called until the let is first accessed, the value it returns is kept
+        for every later access, & it is released once the group finishes running so
+        large values don't stay in memory for the rest of the run. Otherwise, `value`
+        is used as-is.
         """
-        self.lets[name] = value
+        if factory:
+            self.let_factories[name] = value
+            self.lets.pop(name, None)
+        else:
+            self.lets[name] = value
+            self.let_factories.pop(name, None)
 
-    def before(self, name, value):
+    def before(self, name, value, factory=False, after=None):
         """
         Sets values on the test group to be parsed later when the test is ran. If an error
         is thrown in the definition of a `before`, it will be raised in any test that
-        depends upon it the before. Befores are evaluated right before each test is ran &
-        are re-evaluated for each test.
+        depends upon it the before. Befores are evaluated for each test that uses them, so
+        assigning a new value to a before in one test is never seen by another. A value
+        given directly is the same object in every test though, so changes made to a
+        mutable value such as a list are; use `factory` to give each test its own. Befores
+        set on an outer group are also seen by tests in inner groups.
+
+        If `factory` is True, `value` must be a callable that is called to build a new
+        value the first time each test accesses the before. If given, `after` is called
+        with the test's value once each test that used the before finishes, to tear it
+        down; a test fails if its `after` raises an error.
         """
         self.befores[name] = value
 
+        if factory:
+            self.before_factories[name] = value
+        else:
+            self.before_factories.pop(name, None)
+
+        if after is not None:
+            self.before_afters[name] = after
+        else:
+            self.before_afters.pop(name, None)
+
     # A short name is chosen as the method will be referenced very often by the
     # end user of this test runner; the pylint warning about name snake case
     # has been disabled.
@@ -111,11 +239,27 @@ class Describe:
         An instance of Test()
         """
 
-        test_obj = Test(description)
+        # remember where the test was declared, for reporters
+        caller = sys._getframe(1) # pylint: disable=protected-access
+        test_obj = Test(description, (caller.f_code.co_filename, caller.f_lineno), self)
         self.tests.append(test_obj)
 
         return test_obj
 
+    def concurrent(self, workers=8):
+        """
+        Runs the tests in this group on a pool of up to `workers` threads instead
+        of one after another, useful for tests that spend most of their time
+        waiting on sockets or disk. Results are still reported in the order the
+        tests were declared & every test gets its own copy of the group's befores.
+        Nested groups are not affected.
+
+        Returns the test group, so it can be chained onto `describe()`.
+        """
+        self.concurrency = workers
+
+        return self
+
     def describe(self, description):
         """
         Similar to the top-level pyspec.describe, but for creating a new test group
@@ -129,10 +273,6 @@ class Describe:
         self.inners.append(inner)
         inner.outer = self
 
-        inner.base = self.tab
-        inner.tab += '  '
-        inner.tabplus = inner.tab + '  '
-
         return inner
 
     @property
@@ -149,98 +289,249 @@ class Describe:
         else:
             raise TypeError(f'{outer} is not an instance of {Describe}')
 
-    def run(self, verbose=False, muted=False):
+    @property
+    def description_path(self):
+        """
+        Property containing the descriptions of the group's outers & the group
+        itself, outermost first
+        """
+        path = []
+        group = self
+
+        while group is not None:
+            path.append(group.description)
+            group = group.outer
+
+        return path[::-1]
+
+    def run(self, verbose=False, muted=False, reporter=None, keyword=None, only=None):
         """
         Runs all tests within a group, so long as it is not an inner group.
+        Results are written to stdout as each test finishes, unless muted, or
+        are passed to the given reporter instead (see pyspec.lib.reporter).
+        Given a `keyword` expression, only the tests whose description path
+        matches it are ran (see pyspec.lib.selection), & given `only`, a
+        collection of description paths as tuples, only the tests it holds are
+        ran. Returns the test group.
         """
 
         if self.outer is not None:
             return None
 
-        return self._run(verbose, muted)
+        if reporter is None:
+            reporter = Reporter() if muted else TextReporter(verbose)
+
+        matchers = [] if keyword is None else [selection.parse(keyword)]
+
+        if only is not None:
+            matchers.append(lambda path: tuple(path) in only)
+
+        selected = selection.select(
+            self,
+            lambda path: all(matches(path) for matches in matchers)
+        ) if matchers else None
+
+        return self._run(reporter, selected=selected)
 
-    def _run(self, verbose=False, muted=False):
+    def _run(self, reporter, depth=0, selected=None):
         """
         A method used to run the test group & any inners, accessed via the
         Describe.run attribute (which will only exist for instances with no
-        Describe.outer attribute).
-
-        Describe._run accepts no arguments & has no returns.
+        Describe.outer attribute). Emits an event to the given reporter as the
+        group starts, as each test finishes & as the group finishes.
+
+        Once the reporter has stopped the run, no further test starts & groups
+        that haven't started are skipped without any events, so none of their
+        lets or befores are built. The same goes for groups left out of
+        `selected`, the tests to run in each group as chosen by
+        `selection.select`, when given.
         """
-        self.results = []
+        if stopped(reporter) or (selected is not None and self not in selected):
+            return self
 
-        self.results.append(f'{self.base}{self.description}')
+        tests = self.tests if selected is None else selected[self]
 
-        for inner in self.inners:
-            # pass outer befores to inner
-            for key, value in self.befores.items():
-                # only if not already defined on the inner
-                if key not in inner.befores:
-                    inner.befores[key] = value
+        started = time.perf_counter_ns()
+        reporter.group_started(self.description, depth)
+        self._resolved_befores = self._resolve_befores()
 
+        for inner in self.inners:
             # call to inner's protected run() method first to display any nested
             # test group's results before displaying the outer class results last
-            inner._run(verbose, True) # pylint: disable=protected-access
+            inner._run(reporter, depth + 1, selected) # pylint: disable=protected-access
+
+        def run_tests():
+            for test in self._run_tests(tests, lambda: stopped(reporter)):
+                reporter.test_finished(test.description, depth, test.result)
 
-            for line in inner.results:
-                self.results.append(line)
+        # only the group's own tests are profiled, each inner has its own profile
+        profiling.profiled('group', self.description_path, run_tests)
 
-        for test in self.tests:
-            # setup befores
-            for key, value in self.befores.items():
-                setattr(self, key, value)
+        self.duration = time.perf_counter_ns() - started
+        reporter.group_finished(self.description, depth, self.duration)
 
-            # run test
-            test._run() # pylint: disable=protected-access
+        self._release_lets()
+        self._resolved_befores = None
 
-            # tear down befores
-            # for key in self.befores:
-            #     del get
+        # publish the finished group to any listener
+        PUB_SUB.topic('test group results').pub(self)
+
+        return self
+
+    def _run_tests(self, tests, stop):
+        """
+        Runs the given tests from the group, on a pool of threads if the group
+        was made concurrent, yielding each test in declaration order once it has
+        finished. Tests that haven't started once `stop` returns True are
+        skipped & not yielded.
+        """
+        if self.concurrency and self.concurrency > 1 and len(tests) > 1:
+            async_tests = [test for test in tests if test.is_async]
 
-            test_title = f'{self.tab}- {test.description}'
+            # await async tests together on the shared loop first, their
+            # comparisons are then made against the awaited results below
+            scopes = aio.run(self._await_tests(async_tests)) if async_tests and not stop() else {}
 
-            # parse results & generate human readable results strings
-            if test.result['success'] and verbose:
-                self.results.append(f'{test_title}: {COLOR_GREEN}ok{COLOR_RESET}')
-            elif not test.result['success']:
-                self.results.append(f'{test_title}: {COLOR_RED}fail{COLOR_RESET}')
+            # imported here, as concurrent.futures is slow to import & only
+            # needed by concurrent groups
+            from concurrent.futures import ( # pylint: disable=import-outside-toplevel
+                ThreadPoolExecutor
+            )
 
-                self.results.append(f'{self.tabplus}{COLOR_RED}* STACK TRACE{COLOR_RESET}')
+            def run_test(test):
+                if stop():
+                    # an awaited test's befores still need tearing down
+                    if test in scopes:
+                        scopes[test].tear_down()
 
-                for line in test.result['stack_trace']:
-                    self.results.append(f'{self.tabplus}{COLOR_RED}|{COLOR_RESET} {line}')
+                    return None
 
-                err_text = test.result['err']
-                err_name = err_text.__class__.__name__
+                return self._run_test(test, scopes.get(test))
 
-                self.results.append(
-                    f'{self.tabplus}{COLOR_RED}* {err_name}: {err_text}{COLOR_RESET}'
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                # map yields in declaration order, as soon as each test & all
+                # those declared before it have finished
+                yield from (
+                    test for test in executor.map(run_test, tests) if test is not None
                 )
+        else:
+            for test in tests:
+                if stop():
+                    return
+
+                yield self._run_test(test)
+
+    def _run_test(self, test, scope=None):
+        """
+        Runs a single test with its own befores, visible only to the thread
+        running it, then tears those befores down. Async tests awaited by
+        `_await_tests` pass in the scope their actual was awaited with.
+        """
+        if scope is None:
+            scope = BeforeScope(self, self._resolved_befores)
 
-        def total_num_nested(inners):
-            """
-            helper function to count number of inners in describe groups of an
-            arbitrary nesting depth
-            """
-            if not inners:
-                return 1
-            return 1 + sum(total_num_nested(inner.inners) for inner in inners)
+        token = BEFORE_SCOPE.set(scope)
 
-        recursive_length = total_num_nested(self.inners)
-        # check if all tests passed & append 'ok' if true
-        if len(self.results) == recursive_length:
-            self.results[0] += f': {COLOR_GREEN}ok{COLOR_RESET}'
+        try:
+            profiling.profiled(
+                'test',
+                self.description_path + [test.description],
+                test._run # pylint: disable=protected-access
+            )
+        finally:
+            BEFORE_SCOPE.reset(token)
+            error = scope.tear_down()
 
-        # hide output if muted
-        if not muted:
-            for line in self.results:
-                print(line)
+        if error is not None:
+            test._fail(error) # pylint: disable=protected-access
 
-        # publish results to any listener
-        PUB_SUB.topic('test group results').pub(self.results)
+        return test
 
-        # return results to any handler that may have called _run
-        return self.results
+    async def _await_tests(self, tests):
+        """
+        Awaits the actual value of every given async test, with no more than
+        `self.concurrency` of them in flight at once. Returns the BeforeScope
+        used by each test, to be torn down once its comparison is made.
+        """
+        import asyncio # pylint: disable=import-outside-toplevel
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        scopes = {}
+
+        async def await_test(test):
+            async with semaphore:
+                # each task runs in its own copy of the context, so this scope
+                # is only visible to this test
+                scopes[test] = BeforeScope(self, self._resolved_befores)
+                BEFORE_SCOPE.set(scopes[test])
+                await test._await_actual() # pylint: disable=protected-access
+
+        await asyncio.gather(*(await_test(test) for test in tests))
+
+        return scopes
+
+    def _resolve_befores(self):
+        """
+        Returns every before visible to tests in this group as `(value, factory,
+        after)` tuples by name, with befores set on this group replacing any of
+        the same name from outer groups. The outer group's resolved befores are
+        reused when it is running, so the chain is only walked once per run.
+        """
+        if self.outer is None:
+            resolved = {}
+        elif self.outer._resolved_befores is not None: # pylint: disable=protected-access
+            resolved = dict(self.outer._resolved_befores) # pylint: disable=protected-access
+        else:
+            resolved = self.outer._resolve_befores() # pylint: disable=protected-access
+
+        for name, value in self.befores.items():
+            resolved[name] = (
+                value,
+                name in self.before_factories,
+                self.before_afters.get(name)
+            )
+
+        return resolved
+
+    def _build_let(self, name):
+        """
+        Calls the factory for the given let, unless it has already been built
+        since the group last ran, & returns its value.
+        """
+        # hold the lock so tests running at the same time build it only once
+        with self._let_lock:
+            if name not in self.lets:
+                self.lets[name] = self.let_factories[name]()
+
+            return self.lets[name]
+
+    def _release_lets(self):
+        """
+        Drops every value built by a let factory, leaving the factories in place
+        to build them again should the group be ran again.
+        """
+        for name in self.let_factories:
+            self.lets.pop(name, None)
+
+    def _scoped_befores(self):
+        """
+        Returns the BeforeScope for the test currently running on this group, if any
+        """
+        scope = BEFORE_SCOPE.get()
+
+        if scope is not None and scope.group is self:
+            return scope
+
+        return None
+
+    def __setattr__(self, name, value):
+        befores = self._scoped_befores()
+
+        # assigning to a before inside a test only changes that test's value
+        if befores is not None and name in befores:
+            befores.set(name, value)
+        else:
+            super().__setattr__(name, value)
 
     def __getattr__(self, method_name):
         def doesnt_exist():
@@ -249,16 +540,24 @@ class Describe:
         if method_name in ('run', 'outer'):
             return doesnt_exist()
 
-        try:
-            return self.lets[method_name]
-        except KeyError:
-            if self.outer:
-                try:
-                    return self.outer.lets[method_name]
-                except KeyError:
-                    return doesnt_exist()
+        befores = self._scoped_befores()
 
-            return doesnt_exist()
+        if befores is not None and method_name in befores:
+            return befores.get(method_name)
+
+        group = self
+
+        # look for the let on this group, then on each outer group in turn
+        while group is not None:
+            try:
+                return group.lets[method_name]
+            except KeyError:
+                if method_name in group.let_factories:
+                    return group._build_let(method_name) # pylint: disable=protected-access
+
+            group = group.outer
+
+        return doesnt_exist()
 
 class Test:
     """
@@ -267,33 +566,47 @@ class Test:
     On initialization, it takes:
     - description   (STRING)                a description to print when running the test,
                                             should be descriptive, readable, & concise
+    - [location]    (TUPLE)                 the (file name, line number) where the test was
+                                            declared, optional
+    - [group]       (Describe)              the test group the test belongs to, optional
 
     A test object also has the following attribute:
     - comparison    (pyspec.Comparisons)    the method to be used for comparing the actual
                                             result to the expected value of the Test
     - actual        (FUNCTION)              a function to be executed when evaluating the test,
-                                            returns the 'actual' value
+                                            returns the 'actual' value, or an awaitable that
+                                            resolves to it
     - expected      (EXPRESSION)            an expression that evaluates to the expected value
                                             that will be compared to `actual`
+    - negated       (BOOLEAN)               True if the test was set up with `to_not`
     - self.error    (EXCEPTION)             used to store any error that is raised before
                                             a test is ran; this error will later be re-raised at
                                             test run time
-    - results       (DICT)                  a dictionary for storing the results when a
-                                            test is run
+    - result        (TestResult)            the result of the test, filled in when it is ran
     """
 
-    def __init__(self, description):
+    __slots__ = (
+        'description',
+        'comparison',
+        'actual',
+        'expected',
+        'negated',
+        'error',
+        'result',
+        'group',
+        '_outcome',
+    )
+
+    def __init__(self, description, location=None, group=None):
         self.description = description
+        self.group = group
         self.comparison = None
         self.actual = None
         self.expected = None
+        self.negated = False
         self.error = None
-        self._set_result = None
-        self.result = {
-            'success': None,
-            'err': None,
-            'stack_trace': None
-        }
+        self._outcome = None
+        self.result = TestResult(location)
 
     def expect(self, actual):
         """
@@ -305,7 +618,8 @@ class Test:
         - `actual` (FUNCTION) a function to be evaluated at test runtime; this is the code
                               that you are testing & the results will compared to their
                               expected value; `Test.expect` will throw an Exception if this
-                              argument is not callable
+                              argument is not callable; coroutine functions (or functions
+                              returning an awaitable) are awaited on a shared event loop
 
         Returns:
         The Test object expect was called on.
@@ -338,19 +652,9 @@ class Test:
         The instance of Test that `Test.to` was called on.
         """
 
-        def set_result(**kwargs):
-            if kwargs['success']:
-                self.result['success'] = True
-            else:
-                self.result['success'] = False
-                self.result['err'] = kwargs['err']
-                self.result['stack_trace'] = kwargs['stack_trace']
-
-            return self
-
         self.comparison = comparison_method
         self.expected = args
-        self._set_result = set_result
+        self.negated = False
 
         return self
 
@@ -371,40 +675,145 @@ class Test:
         The instance of Test that `Test.to` was called on.
         """
 
-        def set_result(**kwargs):
-            incorrect_success = (
-                f'The test passed when it should have failed in a should_not statement'
-            )
+        self.comparison = comparison_method
+        self.expected = args
+        self.negated = True
 
-            if kwargs['success']:
-                self.result['success'] = False
-                self.result['err'] = incorrect_success
-                self.result['stack_trace'] = [incorrect_success]
-            else:
-                self.result['success'] = True
+        return self
+    def benchmark(self, target, tolerance=.2, **settings):
+        """
+        Makes the test a micro-benchmark of `target`, used instead of `expect` &
+        `to`. `target` is called repeatedly after a warm-up, with the number of
+        calls per round calibrated automatically & garbage collection turned off
+        while rounds are timed. The mean, standard deviation & fastest time per
+        call are stored on the test's result.
+
+        The test fails if the fastest call is slower than the baseline recorded
+        for the test by more than `tolerance` (a fraction, so .2 allows 20%).
+        Baselines are kept in `.pyspec_cache/pyspec_baselines.json` in the
+        current $PWD by default; a benchmark without a baseline records one &
+        passes.
 
-            return self
+        Accepts:
+        - `target`      (FUNCTION)  the code to benchmark, called with no arguments
+        - `tolerance`   (FLOAT)     how much slower than the baseline is allowed
+        - `**settings`              `warmup`, `rounds`, `round_time` & `disable_gc`,
+                                    see pyspec.lib.benchmark.measure
 
-        self.comparison = comparison_method
-        self.expected = args
-        self._set_result = set_result
+        Returns:
+        The Test object benchmark was called on.
+        """
+        if inspect.iscoroutinefunction(target):
+            self.error = TypeError('Benchmark targets must be regular functions, not coroutines.')
 
-    def _run(self):
+        self.expect(target)
+        self.comparison = benchmark.compare
+        self.expected = (tolerance, settings)
+        self.negated = False
+
+        return self
+
+    @property
+    def description_path(self):
+        """
+        The descriptions of the test's groups & the test itself, outermost first
+        """
+        if self.group is None:
+            return [self.description]
+
+        return self.group.description_path + [self.description]
+
+    @property
+    def is_async(self):
+        """
+        True if `actual` is a coroutine function
+        """
+        return inspect.iscoroutinefunction(self.actual)
+
+    async def _await_actual(self):
+        """
+        Awaits `actual` ahead of the comparison, storing either its result or
+        the error it raised to be handed to the comparison by `_run`.
+        """
         try:
-            if isinstance(self.comparison, Exception):
-                raise self.comparison
-            if self.error:
-                raise self.error
-
-            self.comparison(self, self.actual, self.expected)
-            self._set_result(success=True)
-        # all Exceptions must be caught to allow the test runner to keep going
-        except Exception: # pylint: disable=broad-except
-            exc_obj = sys.exc_info()[1]
-            exc_tb = sys.exc_info()[2]
-
-            self._set_result(
-                success=False,
-                err=exc_obj,
-                stack_trace=traceback.format_tb(exc_tb)
+            self._outcome = (await self.actual(), None)
+        # errors are kept so the comparison sees them exactly as if raised by actual
+        except Exception as err: # pylint: disable=broad-except
+            self._outcome = (None, err)
+
+    def _runtime_actual(self):
+        """
+        Wraps `actual` so comparisons can always call it synchronously: any
+        awaitable it returns is run to completion on the shared event loop, &
+        an outcome already awaited by `_await_actual` is handed back as-is.
+        """
+        if self._outcome is not None:
+            value, err = self._outcome
+
+            def awaited_actual():
+                if err is not None:
+                    raise err
+
+                return value
+
+            return awaited_actual
+
+        actual = self.actual
+
+        def run_actual():
+            result = actual()
+
+            if inspect.isawaitable(result):
+                return aio.run(result)
+
+            return result
+
+        return run_actual
+
+    def _fail(self, err):
+        """
+        Marks the test as failed with the given error, regardless of whether
+        its comparison passed, such as when tearing down its befores raises.
+        """
+        self.result.failed(err, err.__traceback__)
+
+        return self
+
+    def _run(self):
+        exc_obj = None
+        exc_tb = None
+
+        # memory is measured outside the timed section, so taking snapshots
+        # doesn't count towards the test's duration
+        with memory.tracked(self.result):
+            started = time.perf_counter_ns()
+
+            try:
+                if isinstance(self.comparison, Exception):
+                    raise self.comparison
+                if self.error:
+                    raise self.error
+
+                self.comparison(self, self._runtime_actual(), self.expected)
+                compared = True
+            # all Exceptions must be caught to allow the test runner to keep going
+            except Exception: # pylint: disable=broad-except
+                exc_obj = sys.exc_info()[1]
+                exc_tb = sys.exc_info()[2]
+                compared = False
+            finally:
+                self._outcome = None
+
+            duration = time.perf_counter_ns() - started
+
+        if compared and self.negated:
+            incorrect_success = (
+                'The test passed when it should have failed in a should_not statement'
             )
+            self.result.failed(incorrect_success)
+        elif compared or self.negated:
+            self.result.passed()
+        else:
+            self.result.failed(exc_obj, exc_tb)
+
+        self.result.duration = duration
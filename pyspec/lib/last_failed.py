@@ -0,0 +1,202 @@
+"""
+Remember the tests that failed, so the next run can re-run only those
+(`last_failed`) or run them before any other (`failed_first`).
+
+Failures are kept in a JSON file in the project's `.pyspec_cache` directory,
+mapping each spec file, relative to the project root, to the description paths
+of its failed tests. A run only updates the tests it ran: a test that passed is
+removed & one that failed is added, so tests skipped by a keyword, a shard or
+`maxfail` keep what earlier runs found. Once every test of a spec file has ran,
+the spec file's failures are replaced, dropping tests that no longer exist.
+
+A spec file is the file a test was declared in, so a group is matched to its
+failures by the first test found in it or its inners.
+"""
+
+import os
+import json
+from pyspec.lib.reporter import Reporter
+
+FAILURES_FILE = os.path.join('.pyspec_cache', 'failures.json')
+
+def read_failures(path):
+    """
+    Returns the failures recorded in a failures file, or an empty dict if it is
+    missing or unreadable
+    """
+    try:
+        with open(path, encoding='utf-8') as failures_file:
+            data = json.load(failures_file)
+    # a missing or corrupt failures file is treated as empty
+    except (OSError, ValueError):
+        return {}
+
+    return data if isinstance(data, dict) else {}
+
+def group_file(group):
+    """
+    Returns the file the first test in a group or its inners was declared in,
+    or None if none of them knows where it was declared
+    """
+    pending = [group]
+
+    while pending:
+        current = pending.pop(0)
+
+        for test in current.tests:
+            if test.result.location is not None:
+                return test.result.location[0]
+
+        pending.extend(current.inners)
+
+    return None
+
+def _key(spec_file, root):
+    # paths are relative to the project, with forward slashes, as in sharding
+    return os.path.relpath(spec_file, root).replace(os.sep, '/')
+
+class Failures(Reporter):
+    """
+    The failures recorded by earlier runs, & a reporter keeping whether each
+    test of this run passed, to update them with `save` once the run is over.
+    Tests without a known location are ignored.
+
+    On initialization, accepts:
+    - [settings]    (DICT)  the `failures` run parameter, which may hold a `path` to
+                            the failures file, `last_failed`, `failed_first` & the
+                            project `root` spec files are kept relative to, the
+                            current $PWD by default
+    """
+
+    def __init__(self, settings=None):
+        settings = settings or {}
+        self.root = settings.get('root') or os.getcwd()
+        self.path = settings.get('path') or os.path.join(self.root, FAILURES_FILE)
+        self.last_failed = settings.get('last_failed', False)
+        self.failed_first = settings.get('failed_first', False)
+        self.recorded = read_failures(self.path)
+        self.outcomes = {}
+        self._open_groups = []
+
+    @property
+    def selecting(self):
+        """
+        Property that is True if only the tests that failed last time are ran,
+        which needs `last_failed` & at least one recorded failure; without any,
+        every test runs
+        """
+        return self.last_failed and any(self.recorded.values())
+
+    def narrow(self, files):
+        """
+        Turns `last_failed` off if none of the given spec files has a recorded
+        failure, so a run of only those files runs every test. Returns the
+        `failures` run parameter to pass on to worker processes.
+        """
+        if not any(self.recorded.get(_key(spec_file, self.root)) for spec_file in files):
+            self.last_failed = False
+
+        return {
+            'root': self.root,
+            'path': self.path,
+            'last_failed': self.last_failed,
+            'failed_first': self.failed_first,
+        }
+
+    def spec_files(self, files):
+        """
+        Returns the given spec files in the order to run them: only those with
+        recorded failures when `selecting`, or else those first with
+        `failed_first`, each keeping their order
+        """
+        if not (self.selecting or self.failed_first):
+            return list(files)
+
+        failed = [
+            spec_file for spec_file in files if self.recorded.get(_key(spec_file, self.root))
+        ]
+
+        if self.selecting:
+            return failed
+
+        return failed + [spec_file for spec_file in files if spec_file not in failed]
+
+    def groups(self, test_groups):
+        """
+        Returns the given top-level test groups in the order to run them, those
+        holding a recorded failure first with `failed_first` or when `selecting`
+        """
+        if not (self.selecting or self.failed_first):
+            return list(test_groups)
+
+        failed = [group for group in test_groups if self.failed_paths(group)]
+
+        return failed + [group for group in test_groups if group not in failed]
+
+    def failed_paths(self, group):
+        """
+        Returns the description paths, as tuples, of the tests in a group & its
+        inners that failed last time
+        """
+        spec_file = group_file(group)
+
+        if spec_file is None:
+            return set()
+
+        path = group.description_path
+
+        return {
+            tuple(failed) for failed in self.recorded.get(_key(spec_file, self.root), ())
+            if failed[:len(path)] == path
+        }
+
+    def group_started(self, description, depth):
+        del self._open_groups[depth:]
+        self._open_groups.append(description)
+
+    def test_finished(self, description, depth, result):
+        if result.location is None:
+            return
+
+        path = tuple(self._open_groups[:depth + 1]) + (description,)
+        self.outcomes.setdefault(_key(result.location[0], self.root), {})[path] = result.success
+
+    def group_finished(self, description, depth, duration=None):
+        del self._open_groups[depth:]
+
+    def save(self, complete=False):
+        """
+        Updates the failures file with the outcome of every test seen, keeping
+        the failures of tests that didn't run. If `complete`, every test of each
+        spec file seen has ran, so their earlier failures are replaced instead.
+        Spec files that no longer exist are dropped.
+
+        Returns the failures written.
+        """
+        # read again, in case another run updated the file since this one began
+        failures = read_failures(self.path)
+
+        for spec_file, outcomes in self.outcomes.items():
+            kept = [] if complete else [
+                failed for failed in failures.get(spec_file, ())
+                if tuple(failed) not in outcomes
+            ]
+            failures[spec_file] = kept + [
+                list(test) for test, success in outcomes.items() if not success
+            ]
+
+        failures = {
+            spec_file: failed for spec_file, failed in failures.items()
+            if failed and os.path.exists(os.path.join(self.root, spec_file))
+        }
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp_path = f'{self.path}.{os.getpid()}.tmp'
+
+        with open(temp_path, 'w', encoding='utf-8') as failures_file:
+            json.dump(failures, failures_file, indent=2, sort_keys=True)
+
+        os.replace(temp_path, self.path)
+        self.recorded = failures
+
+        return failures
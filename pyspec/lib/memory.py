@@ -0,0 +1,133 @@
+"""
+Optional per-test memory accounting with tracemalloc. While enabled, each test
+records the peak memory traced while it ran, the memory it still held once it
+finished (its net retained memory) & the source lines that allocated most of
+that retained memory.
+
+tracemalloc only has a single, process-wide peak, so tests in concurrent groups
+take turns while memory is being measured. It is only imported once memory
+accounting is turned on.
+"""
+
+import functools
+import threading
+from contextlib import contextmanager
+
+# pylint: disable=import-outside-toplevel
+
+# the memory settings used by the current process, see configure
+MEMORY = {'enabled': False, 'allocators': 3}
+
+_LOCK = threading.RLock()
+
+@functools.lru_cache(maxsize=None)
+def snapshot_filters():
+    """
+    Returns the tracemalloc filters leaving allocations made by tracemalloc
+    itself, this module & the import system out of the allocators listed for
+    a test
+    """
+    import tracemalloc
+
+    return (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    )
+
+class MemoryBudgetError(Exception):
+    """
+    Raised on a test whose peak memory went over the per-test memory budget
+    """
+
+    def __init__(self, peak, budget):
+        super().__init__(
+            f'The test used {format_size(peak)} of memory at its peak, '
+            f'over the budget of {format_size(budget)}'
+        )
+
+def configure(settings):
+    """
+    Turns memory accounting on for this process with the `memory` run parameter,
+    a dict that may hold how many `allocators` to keep for each test, or turns it
+    off if it is None. Tracing is started the first time it is turned on.
+    """
+    MEMORY['enabled'] = settings is not None
+
+    if settings is not None:
+        MEMORY['allocators'] = settings.get('allocators', 3)
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    return MEMORY['enabled']
+
+@contextmanager
+def tracked(result):
+    """
+    Measures the memory used by the code ran inside the `with` block & stores
+    it on the given TestResult as a `(peak, net, allocators)` tuple, where
+    `allocators` lists the `[file:line, size]` of the lines that allocated the
+    most retained memory. Does nothing while memory accounting is off.
+    """
+    if not MEMORY['enabled']:
+        yield
+        return
+
+    import tracemalloc
+
+    if not tracemalloc.is_tracing():
+        yield
+        return
+
+    with _LOCK:
+        before = tracemalloc.take_snapshot()
+        started, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            result.memory = (
+                max(peak - started, 0),
+                current - started,
+                top_allocators(before, after, MEMORY['allocators']),
+            )
+
+def top_allocators(before, after, count, filters=None):
+    """
+    Returns the `[file:line, size]` of the `count` source lines whose retained
+    memory grew the most between two snapshots, largest first, leaving out
+    allocations matched by the given tracemalloc filters, or by
+    snapshot_filters if none are given
+    """
+    filters = snapshot_filters() if filters is None else filters
+    differences = after.filter_traces(filters).compare_to(
+        before.filter_traces(filters),
+        'lineno'
+    )
+    allocators = []
+
+    for difference in differences[:count]:
+        if difference.size_diff <= 0:
+            break
+
+        frame = difference.traceback[0]
+        allocators.append([f'{frame.filename}:{frame.lineno}', difference.size_diff])
+
+    return allocators
+
+def format_size(size):
+    """
+    Returns a number of bytes as a short, human-readable string, e.g. `1.50MB`
+    """
+    for unit, unit_size in (('GB', 1024 ** 3), ('MB', 1024 ** 2), ('KB', 1024)):
+        if abs(size) >= unit_size:
+            return f'{size / unit_size:.2f}{unit}'
+
+    return f'{size}B'
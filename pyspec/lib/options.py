@@ -0,0 +1,29 @@
+"""
+The choices & parsers behind the command line's options. Only `os` is imported
+here, so arguments can be parsed without importing the modules that use them.
+"""
+
+import os
+
+# the ways a TextReporter can write the stack trace of a failed test
+TB_STYLES = ('long', 'short', 'none')
+
+# what a profile covers, see pyspec.lib.profiling
+GRANULARITIES = ('test', 'group', 'run')
+PROFILE_DIR = os.path.join('.pyspec_cache', 'profiles')
+
+# the formats of report files, see pyspec.lib.report_files
+REPORT_FORMATS = ('jsonl', 'junit')
+
+def parse_size(text):
+    """
+    Returns the number of bytes in a size such as `512`, `64KB`, `1.5MB` or `2GB`
+    """
+    units = {'GB': 1024 ** 3, 'MB': 1024 ** 2, 'KB': 1024, 'B': 1}
+    text = text.strip().upper()
+
+    for unit, size in units.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * size)
+
+    return int(text)
@@ -0,0 +1,371 @@
+"""
+Optional profiling of tests, test groups or whole runs. Each profiled call is
+written to its own file, named after the description path of the test or group,
+& a table of the functions that took the most time is printed after the run.
+
+Two modes are available:
+- cProfile (the default) profiles every call at the chosen granularity & writes
+  a `.pstats` file for each, readable with the standard `pstats` module
+- sampling, enabled by giving a threshold, reads the profiled thread's stack at
+  a fixed interval from a background thread, which costs far less than cProfile.
+  Only calls that took at least the threshold are kept, written as a `.folded`
+  file of `outer;inner;innermost count` lines, as used by flame graph tools
+"""
+
+import io
+import os
+import re
+import sys
+import time
+import hashlib
+import threading
+from collections import Counter
+from pyspec.lib.options import PROFILE_DIR
+
+# the profiler used by the current process & the settings it was made with,
+# see configure
+PROFILE = {'profiler': None, 'settings': None}
+
+def configure(settings):
+    """
+    Sets the profiler used by this process from the `profile` run parameter,
+    a dict of keyword arguments for Profiler, or turns profiling off if it is
+    None. A profiler with the same settings is kept, so a whole-run profile
+    keeps collecting across every spec file ran by a worker process.
+    """
+    replaced = PROFILE['profiler'] is not None and PROFILE['settings'] != settings
+
+    if replaced:
+        PROFILE['profiler'].close()
+
+    if settings is None:
+        PROFILE['profiler'] = None
+    elif PROFILE['profiler'] is None or replaced:
+        PROFILE['profiler'] = Profiler(**settings)
+
+    PROFILE['settings'] = settings
+
+    return PROFILE['profiler']
+
+def profiled(granularity, path, call):
+    """
+    Calls `call` & returns its result, profiling the call if this process is
+    profiling at the given granularity.
+
+    Accepts:
+    - granularity   (STRING)    'test', 'group' or 'run'
+    - path          (LIST)      the descriptions naming what is being profiled
+    - call          (FUNCTION)  called with no arguments
+    """
+    profiler = PROFILE['profiler']
+
+    if profiler is None or profiler.granularity != granularity:
+        return call()
+
+    return profiler.run(path, call)
+
+def finish():
+    """
+    Writes the whole-run profile collected by this process, if any, & stops
+    sampling; called once the run is over
+    """
+    profiler = PROFILE['profiler']
+
+    if profiler is not None:
+        profiler.finish()
+
+def take_written():
+    """
+    Returns the paths of the profile files written by this process since the
+    last call, each listed once
+    """
+    profiler = PROFILE['profiler']
+
+    if profiler is None:
+        return []
+
+    return profiler.take_written()
+
+class Profiler:
+    """
+    Profiles calls & writes a profile file for each. With cProfile, calls at
+    the 'run' granularity are collected into a single profile for the process,
+    only written by `finish`.
+
+    On initialization, accepts:
+    - [granularity] (STRING)    'test', 'group' or 'run', see `profiled`
+    - [directory]   (STRING)    where profile files are written
+    - [threshold]   (INTEGER)   if given, sample calls instead of using cProfile &
+                                only keep calls that took at least this many
+                                nanoseconds
+    - [interval]    (FLOAT)     seconds between samples, when sampling
+    - [top]         (INTEGER)   how many functions `summary` lists
+    """
+
+    def __init__(
+            self, granularity='test', directory=PROFILE_DIR, threshold=None, interval=.001,
+            top=20
+    ):
+        self.granularity = granularity
+        self.directory = directory
+        self.threshold = threshold
+        self.top = top
+        self.sampler = None if threshold is None else Sampler(interval)
+        self.written = []
+        # cProfile can only profile one call at a time, so profiled tests in
+        # concurrent groups take turns
+        self._lock = threading.Lock()
+        self._run_profile = None
+        self._run_pending = False
+        self._local = threading.local()
+
+    def run(self, path, call):
+        """
+        Calls `call` under this profiler & returns its result. A call made
+        while another is profiled on the same thread, such as a group ran by a
+        test, is already in that profile, so it is called through.
+        """
+        if getattr(self._local, 'active', False):
+            return call()
+
+        self._local.active = True
+
+        try:
+            return self._run(path, call)
+        finally:
+            self._local.active = False
+
+    def _run(self, path, call):
+        if self.granularity == 'run':
+            # named after the process, so worker processes don't overwrite
+            # each other's profiles
+            path = ['run', str(os.getpid())]
+
+        if self.sampler is not None:
+            return self._sample(path, call)
+
+        import cProfile # pylint: disable=import-outside-toplevel
+
+        with self._lock:
+            if self.granularity == 'run':
+                # a single profile collects every call made by this process
+                if self._run_profile is None:
+                    self._run_profile = cProfile.Profile()
+
+                self._run_pending = True
+
+                return self._run_profile.runcall(call)
+
+            profile = cProfile.Profile()
+
+            try:
+                return profile.runcall(call)
+            finally:
+                file_path = self._file_path(path, '.pstats')
+                profile.dump_stats(file_path)
+                self._wrote(file_path)
+
+    def finish(self):
+        """
+        Writes the whole-run profile, if calls were profiled since it was last
+        written, & stops the sampling thread
+        """
+        with self._lock:
+            if self._run_pending:
+                file_path = self._file_path(['run', str(os.getpid())], '.pstats')
+                self._run_profile.dump_stats(file_path)
+                self._wrote(file_path)
+                self._run_pending = False
+
+        self.close()
+
+    def close(self):
+        """
+        Stops the sampling thread, if any; it is started again if more calls
+        are sampled
+        """
+        if self.sampler is not None:
+            self.sampler.close()
+
+    def take_written(self):
+        """
+        Returns the paths written since the last call, each listed once
+        """
+        with self._lock:
+            written = list(dict.fromkeys(self.written))
+            self.written = []
+
+        return written
+
+    def _sample(self, path, call):
+        ident = threading.get_ident()
+        samples = self.sampler.start(ident)
+        started = time.perf_counter_ns()
+
+        try:
+            return call()
+        finally:
+            self.sampler.stop(ident)
+
+            if time.perf_counter_ns() - started >= self.threshold and samples:
+                file_path = self._file_path(path, '.folded')
+
+                with open(file_path, 'w', encoding='utf-8') as folded:
+                    for stack, count in samples.most_common():
+                        folded.write(f'{";".join(stack)} {count}\n')
+
+                with self._lock:
+                    self._wrote(file_path)
+
+    def _file_path(self, path, extension):
+        os.makedirs(self.directory, exist_ok=True)
+
+        return os.path.join(self.directory, profile_name(path) + extension)
+
+    def _wrote(self, file_path):
+        self.written.append(os.path.abspath(file_path))
+
+class Sampler:
+    """
+    Counts the stacks seen on registered threads, reading every registered
+    thread's current frame from one background thread at a fixed interval.
+    The thread is started with the first registered thread & runs until
+    `close`.
+
+    On initialization, accepts:
+    - interval  (FLOAT) seconds to wait between samples
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._targets = {}
+        self._thread = None
+        self._stopping = None
+        self._pid = None
+
+    def start(self, ident):
+        """
+        Starts sampling the thread with the given ident, returning the Counter
+        its stacks are counted in
+        """
+        samples = Counter()
+
+        with self._lock:
+            self._targets[ident] = samples
+
+            # a sampler inherited by a forked worker process has lost its thread
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._stopping = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._loop,
+                    args=(self._stopping,),
+                    name='pyspec-sampler',
+                    daemon=True
+                )
+                self._thread.start()
+
+        return samples
+
+    def stop(self, ident):
+        """
+        Stops sampling the thread with the given ident
+        """
+        with self._lock:
+            self._targets.pop(ident, None)
+
+    def close(self):
+        """
+        Stops the background thread
+        """
+        with self._lock:
+            if self._thread is not None:
+                self._stopping.set()
+                self._thread = None
+
+    def _loop(self, stopping):
+        while not stopping.wait(self.interval):
+            # counted while holding the lock, so a thread's samples never
+            # change once `stop` returns
+            with self._lock:
+                if not self._targets:
+                    continue
+
+                frames = sys._current_frames() # pylint: disable=protected-access
+
+                for ident, samples in self._targets.items():
+                    frame = frames.get(ident)
+
+                    if frame is not None:
+                        samples[stack_of(frame)] += 1
+
+def stack_of(frame):
+    """
+    Returns the functions on a frame's stack, outermost first, as
+    `file:function` strings
+    """
+    stack = []
+
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+        frame = frame.f_back
+
+    return tuple(reversed(stack))
+
+def profile_name(path):
+    """
+    Returns a file name for a description path, readable but safe to use on
+    any file system, with a short hash so similar paths never collide
+    """
+    parts = [re.sub(r'[^A-Za-z0-9]+', '-', part).strip('-')[:40] for part in path]
+    digest = hashlib.sha1('\0'.join(path).encode()).hexdigest()[:8]
+
+    return '.'.join(part for part in parts if part) + '-' + digest
+
+def summary(paths, top=20):
+    """
+    Returns a table of the `top` functions by cumulative time across every
+    given profile file. `.pstats` files are combined with pstats, & `.folded`
+    files by counting the samples each function appears in.
+    """
+    stats_files = [path for path in paths if path.endswith('.pstats')]
+    folded_files = [path for path in paths if path.endswith('.folded')]
+    stream = io.StringIO()
+
+    if not paths:
+        return '\nNo calls were profiled\n'
+
+    stream.write(f'\nProfiled {len(paths)} call(s), written to {os.path.dirname(paths[0])}\n')
+
+    if stats_files:
+        import pstats # pylint: disable=import-outside-toplevel
+
+        stats = pstats.Stats(*stats_files, stream=stream)
+        stats.sort_stats('cumulative').print_stats(top)
+
+    if folded_files:
+        stream.write(f'\n{"samples":>10}  function\n')
+
+        for function, count in folded_counts(folded_files).most_common(top):
+            stream.write(f'{count:>10}  {function}\n')
+
+    return stream.getvalue()
+
+def folded_counts(paths):
+    """
+    Returns a Counter of the samples each function appears in, across the
+    given `.folded` files
+    """
+    counts = Counter()
+
+    for path in paths:
+        with open(path, encoding='utf-8') as folded:
+            for line in folded:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+
+                for function in set(stack.split(';')):
+                    counts[function] += int(count)
+
+    return counts
@@ -0,0 +1,240 @@
+"""
+Reporters writing machine-readable results to files, for CI systems & other
+tools. Each test's result is written & flushed as soon as it finishes, so a
+report is readable while the run goes on & keeps every result up to a crash.
+Only the groups currently running are held, so memory use doesn't grow with
+the number of tests ran.
+
+Two formats are written:
+- jsonl     one JSON object per line for each test, holding its description
+            `path`, the `file` & `line` it was declared at, relative to the
+            project root, & its result (see TestResult.to_data)
+- junit     JUnit XML, with a `testsuite` for each top-level group & a
+            `testcase` for each test; since results are written as they come,
+            suites don't hold test counts, which readers of the format count
+
+Reports written by separate processes, such as one per CI shard, are combined
+into one with `merge`, which also accepts reports cut short by an interrupted
+run.
+"""
+
+import os
+import re
+import json
+from pyspec.lib.reporter import Reporter, format_frames
+from pyspec.lib.result import error_details
+
+JUNIT_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n'
+JUNIT_FOOTER = '</testsuites>\n'
+
+# characters XML doesn't allow, even escaped
+INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+ESCAPES = str.maketrans({
+    '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;',
+    '\n': '&#10;', '\r': '&#13;', '\t': '&#9;',
+})
+
+def open_report(report_format, path):
+    """
+    Returns a new reporter writing the given format to the file at `path`,
+    replacing any file already there
+
+    Accepts:
+    - report_format (STRING)    one of pyspec.lib.options.REPORT_FORMATS
+    - path          (STRING)    the file to write
+    """
+    reporters = {'jsonl': JsonLinesReporter, 'junit': JUnitReporter}
+
+    return reporters[report_format](path)
+
+def merge(report_format, path, sources):
+    """
+    Writes the results from several reports of the same format into one,
+    reading a line at a time. A line left unfinished at the end of a report is
+    dropped & any JUnit suite left open is closed.
+
+    Accepts:
+    - report_format (STRING)    one of pyspec.lib.options.REPORT_FORMATS
+    - path          (STRING)    the file to write
+    - sources       (LIST)      the paths of the reports to merge, in order
+
+    Returns:
+    - The number of test results written
+    """
+    junit = report_format == 'junit'
+    count = 0
+
+    with _open(path) as output:
+        if junit:
+            output.write(JUNIT_HEADER)
+
+        for source in sources:
+            with open(source, encoding='utf-8') as report:
+                count += _copy(report, output, junit)
+
+        if junit:
+            output.write(JUNIT_FOOTER)
+
+    return count
+
+def _copy(report, output, junit):
+    count = 0
+    suite_open = False
+
+    for line in report:
+        # the last line of an interrupted report may be cut off
+        if not line.endswith('\n'):
+            break
+
+        stripped = line.strip()
+
+        if not junit:
+            count += 1
+        elif stripped.startswith('<?xml') or stripped in ('<testsuites>', '</testsuites>'):
+            continue
+        elif stripped.startswith('<testsuite '):
+            suite_open = True
+        elif stripped == '</testsuite>':
+            suite_open = False
+        elif stripped.startswith('<testcase '):
+            count += 1
+
+        output.write(line)
+
+    if suite_open:
+        output.write('  </testsuite>\n')
+
+    return count
+
+def _open(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    # line buffered, so every finished line is flushed right away
+    return open(path, 'w', buffering=1, encoding='utf-8')
+
+def _relative(file_name):
+    # relative to the project, with forward slashes, so reports written on
+    # machines with different checkout directories agree
+    return os.path.relpath(file_name).replace(os.sep, '/')
+
+class ReportFile(Reporter):
+    """
+    The base class for reporters writing to a file. Keeps the descriptions of
+    the groups currently running, so each test's description path is known.
+
+    On initialization, accepts:
+    - path  (STRING)    the file to write, replaced if it exists
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = _open(path)
+        self._open_groups = []
+
+    def group_started(self, description, depth):
+        del self._open_groups[depth:]
+        self._open_groups.append(description)
+
+    def group_finished(self, description, depth, duration=None):
+        del self._open_groups[depth:]
+
+    def test_path(self, description, depth):
+        """
+        Returns the description path of a finished test as a list
+        """
+        return self._open_groups[:depth + 1] + [description]
+
+    def close(self):
+        """
+        Finishes the report & closes its file
+        """
+        self.file.close()
+
+class JsonLinesReporter(ReportFile):
+    """
+    Writes a JSON object on its own line for each finished test
+    """
+
+    def test_finished(self, description, depth, result):
+        record = {'path': self.test_path(description, depth), 'file': None, 'line': None}
+        data = result.to_data()
+        location = data.pop('location')
+
+        if location is not None:
+            record['file'], record['line'] = _relative(location[0]), location[1]
+
+        record.update(data)
+        self.file.write(json.dumps(record) + '\n')
+
+class JUnitReporter(ReportFile):
+    """
+    Writes JUnit XML, one element per line, so reports can be merged a line at
+    a time. Failure messages & stack traces have their line breaks escaped.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._suite_open = False
+        self.file.write(JUNIT_HEADER)
+
+    def group_started(self, description, depth):
+        if depth == 0:
+            self._close_suite()
+            self.file.write(f'  <testsuite name={_attribute(description)}>\n')
+            self._suite_open = True
+
+        super().group_started(description, depth)
+
+    def group_finished(self, description, depth, duration=None):
+        if depth == 0:
+            self._close_suite()
+
+        super().group_finished(description, depth, duration)
+
+    def test_finished(self, description, depth, result):
+        attributes = {
+            'classname': ' > '.join(self._open_groups[:depth + 1]),
+            'name': description,
+        }
+
+        if result.location is not None:
+            attributes['file'] = _relative(result.location[0])
+            attributes['line'] = result.location[1]
+
+        if result.duration is not None:
+            attributes['time'] = f'{result.duration / 1e9:.6f}'
+
+        testcase = '<testcase ' + ' '.join(
+            f'{name}={_attribute(value)}' for name, value in attributes.items()
+        )
+
+        if result.success:
+            self.file.write(f'    {testcase}/>\n')
+            return
+
+        err_name, err_text = error_details(result.error)
+        trace = '\n'.join(format_frames(result.frames, 'short')) if result.frames else ''
+        failure = (
+            f'<failure type={_attribute(err_name)} message={_attribute(err_text)}>'
+            f'{_text(trace)}</failure>'
+        )
+        self.file.write(f'    {testcase}>{failure}</testcase>\n')
+
+    def close(self):
+        if not self.file.closed:
+            self._close_suite()
+            self.file.write(JUNIT_FOOTER)
+
+        super().close()
+
+    def _close_suite(self):
+        if self._suite_open:
+            self.file.write('  </testsuite>\n')
+            self._suite_open = False
+
+def _attribute(value):
+    return f'"{_text(str(value))}"'
+
+def _text(value):
+    # line breaks are escaped too, keeping every element on a single line
+    return INVALID_XML.sub('', value).translate(ESCAPES)
@@ -0,0 +1,211 @@
+"""
+Reporters consume the events emitted while test groups run & write results out
+as they arrive, instead of collecting every line until the run is over.
+
+Three events are emitted, always in this order for a group:
+- group_started     (description, depth)            before any tests in a group run
+- test_finished     (description, depth, result)    as each test's result is ready
+- group_finished    (description, depth, duration)  once a group & its inners are done
+
+`depth` is 0 for a top-level group & increases by 1 for each level of nesting,
+`result` is a TestResult (see pyspec.lib.result) & `duration` is the nanoseconds
+spent running the group, including its inners.
+
+A reporter can also end a run early: groups & tests that haven't started yet
+are skipped once its `stopped` attribute is True (see `stopped`).
+"""
+
+import sys
+from pyspec.lib.result import TestResult, error_details
+
+COLOR_GREEN = "\033[32m"
+COLOR_RED = "\033[31m"
+COLOR_RESET = "\033[0m"
+
+class Reporter:
+    """
+    A reporter that ignores every event, used when output is muted & as the
+    base class for all other reporters
+    """
+
+    # set to True to skip every group & test that hasn't started yet
+    stopped = False
+
+    def group_started(self, description, depth):
+        """
+        Called before any test in a group runs
+        """
+
+    def test_finished(self, description, depth, result):
+        """
+        Called with a test's result as soon as it is ready
+        """
+
+    def group_finished(self, description, depth, duration=None):
+        """
+        Called once every test in a group & its inners has finished
+        """
+
+class Reporters(Reporter):
+    """
+    Passes every event on to each of the given reporters, in order
+    """
+
+    def __init__(self, *reporters):
+        self.reporters = reporters
+
+    @property
+    def stopped(self):
+        """
+        Property that is True once any of the reporters has stopped the run
+        """
+        return any(stopped(reporter) for reporter in self.reporters)
+
+    def group_started(self, description, depth):
+        for reporter in self.reporters:
+            reporter.group_started(description, depth)
+
+    def test_finished(self, description, depth, result):
+        for reporter in self.reporters:
+            reporter.test_finished(description, depth, result)
+
+    def group_finished(self, description, depth, duration=None):
+        for reporter in self.reporters:
+            reporter.group_finished(description, depth, duration)
+
+class TextReporter(Reporter):
+    """
+    Writes human-readable, colored results to a stream (stdout by default) as
+    each event arrives.
+
+    Unless `verbose` is set, only failing tests are written. Stack traces are
+    written with each frame's source line when `tb` is 'long', as one line per
+    frame when it is 'short', & not at all when it is 'none'.
+
+    A group header
+    is held back until something is written inside the group, so a group whose
+    tests all pass is written as a single `description: ok` line, which also
+    covers any passing groups nested inside it. Only the headers of the groups
+    currently running are ever held, so memory use doesn't grow with the
+    number of tests ran.
+    """
+
+    def __init__(self, verbose=False, stream=None, tb='long'):
+        self.verbose = verbose
+        self.stream = stream
+        self.tb = tb
+        self._pending = []
+
+    def group_started(self, description, depth):
+        self._pending.append((description, depth))
+
+    def test_finished(self, description, depth, result):
+        if result.success and not self.verbose:
+            return
+
+        self._write_pending()
+        title = f'{indent(depth + 1)}- {description}'
+
+        if result.success:
+            self._write(f'{title}: {COLOR_GREEN}ok{COLOR_RESET}')
+            return
+
+        tabplus = indent(depth + 2)
+        err_name, err_text = error_details(result.error)
+
+        self._write(f'{title}: {COLOR_RED}fail{COLOR_RESET}')
+
+        if result.frames and self.tb != 'none':
+            self._write(f'{tabplus}{COLOR_RED}* STACK TRACE{COLOR_RESET}')
+
+            for line in format_frames(result.frames, self.tb):
+                self._write(f'{tabplus}{COLOR_RED}|{COLOR_RESET} {line}')
+
+        self._write(f'{tabplus}{COLOR_RED}* {err_name}: {err_text}{COLOR_RESET}')
+
+    def group_finished(self, description, depth, duration=None):
+        if not self._pending or self._pending[-1] != (description, depth):
+            return
+
+        self._pending.pop()
+
+        # nothing was written for this group, so it passed; if the outer
+        # group's header is still held back, this is folded into its `ok`
+        if not self._pending:
+            self._write(f'{indent(depth)}{description}: {COLOR_GREEN}ok{COLOR_RESET}')
+
+    def _write_pending(self):
+        for description, depth in self._pending:
+            self._write(f'{indent(depth)}{description}')
+
+        self._pending = []
+
+    def _write(self, line):
+        stream = self.stream or sys.stdout
+        stream.write(line + '\n')
+
+class Recorder(Reporter):
+    """
+    Records every event as plain, JSON-safe data in `events`, so results can be
+    sent back from a worker process or cached on disk, then passed to another
+    reporter later using `replay`.
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def group_started(self, description, depth):
+        self.events.append(['group_started', description, depth])
+
+    def test_finished(self, description, depth, result):
+        self.events.append(['test_finished', description, depth, result.to_data()])
+
+    def group_finished(self, description, depth, duration=None):
+        self.events.append(['group_finished', description, depth, duration])
+
+def stopped(reporter):
+    """
+    Returns True if the given reporter has stopped the run, allowing for
+    reporters that don't inherit from Reporter
+    """
+    return getattr(reporter, 'stopped', False)
+
+def replay(events, reporter):
+    """
+    Passes events recorded by a Recorder to the given reporter, in order
+    """
+    for event in events:
+        if event[0] == 'test_finished':
+            reporter.test_finished(event[1], event[2], TestResult.from_data(event[3]))
+        else:
+            getattr(reporter, event[0])(*event[1:])
+
+    return reporter
+
+def format_frames(frames, tb='long'):
+    """
+    Returns the lines for a stack trace from a summary of its frames. Source
+    lines are only read here, & only for the 'long' style.
+
+    Accepts:
+    - frames    (StackSummary)  the frames of a failed test's result
+    - [tb]      (STRING)        'long' or 'short', see TextReporter
+
+    Returns:
+    - A list of lines, outermost frame first
+    """
+    lines = []
+
+    for frame in frames:
+        lines.append(f'File "{frame.filename}", line {frame.lineno}, in {frame.name}')
+
+        if tb == 'long' and frame.line:
+            lines.append(f'  {frame.line}')
+
+    return lines
+
+def indent(depth):
+    """
+    Returns the leading whitespace for a line at the given depth
+    """
+    return '  ' * depth
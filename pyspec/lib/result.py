@@ -0,0 +1,171 @@
+"""
+Compact records for the result of each test. Results hold only raw data; all
+formatting for output is left to reporters (see pyspec.lib.reporter).
+"""
+
+import traceback
+
+PASSED = 'passed'
+FAILED = 'failed'
+
+# settings for capturing the frames of failed tests, see set_frame_limit
+CAPTURE = {'frame_limit': None}
+
+def set_frame_limit(limit):
+    """
+    Sets how many frames are kept from the traceback of each failed test,
+    keeping the innermost frames. None keeps every frame & 0 keeps none.
+    """
+    CAPTURE['frame_limit'] = limit
+
+def capture_frames(tb):
+    """
+    Returns a lightweight summary of the frames in a traceback, holding only
+    the file name, line number & function name for each. Source lines aren't
+    read until a reporter formats the frames, & the traceback itself (along
+    with every local variable it holds on to) is not kept.
+    """
+    limit = CAPTURE['frame_limit']
+
+    if limit == 0:
+        return None
+
+    return traceback.StackSummary.extract(
+        traceback.walk_tb(tb),
+        limit=None if limit is None else -limit,
+        lookup_lines=False
+    )
+
+def release_frames(error):
+    """
+    Drops the tracebacks of an error & of the errors it was raised from or
+    while handling, so the frames they reference (& every local variable in
+    them) can be collected once a summary of them has been captured
+    """
+    errors = [error]
+    released = set()
+
+    while errors:
+        error = errors.pop()
+
+        if isinstance(error, BaseException) and id(error) not in released:
+            released.add(id(error))
+            error.__traceback__ = None
+            errors.extend((error.__cause__, error.__context__))
+
+class TestResult:
+    """
+    The result of running a single test.
+
+    On initialization, accepts:
+    - [location]    (TUPLE)     the (file name, line number) where the test was declared
+
+    A TestResult has the following attributes:
+    - status        (STRING)    PASSED or FAILED, or None if the test hasn't ran yet
+    - error         (EXCEPTION) the error that failed the test, or a plain message
+    - frames        (StackSummary)  the frames from `error`'s traceback, see
+                                    capture_frames, or None
+    - duration      (INTEGER)   nanoseconds spent running the test
+    - location      (TUPLE)     see above
+    - memory        (TUPLE)     `(peak, net, allocators)` measured while the test ran,
+                                see pyspec.lib.memory, or None if memory wasn't measured
+    - benchmark     (DICT)      the measurement taken by a benchmark test, see
+                                pyspec.lib.benchmark, or None for other tests
+    """
+
+    __slots__ = ('status', 'error', 'frames', 'duration', 'location', 'memory', 'benchmark')
+
+    def __init__(self, location=None):
+        self.status = None
+        self.error = None
+        self.frames = None
+        self.duration = None
+        self.location = location
+        self.memory = None
+        self.benchmark = None
+
+    @property
+    def success(self):
+        """
+        True if the test passed
+        """
+        return self.status == PASSED
+
+    def passed(self):
+        """
+        Marks the result as passed, clearing any previous error
+        """
+        self.status = PASSED
+        self.error = None
+        self.frames = None
+
+        return self
+
+    def failed(self, error, tb=None):
+        """
+        Marks the result as failed with the given error, keeping a summary of
+        the frames in the given traceback, if any. The error's own traceback is
+        released, see release_frames
+        """
+        self.status = FAILED
+        self.error = error
+        self.frames = None if tb is None else capture_frames(tb)
+        release_frames(error)
+
+        return self
+
+    def to_data(self):
+        """
+        Returns the result as plain, JSON-safe data, with the error reduced to
+        its name & message
+        """
+        return {
+            'status': self.status,
+            'error': None if self.error is None else list(error_details(self.error)),
+            'frames': None if self.frames is None else [
+                [frame.filename, frame.lineno, frame.name] for frame in self.frames
+            ],
+            'duration': self.duration,
+            'location': None if self.location is None else list(self.location),
+            'memory': None if self.memory is None else list(self.memory),
+            'benchmark': self.benchmark,
+        }
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        Rebuilds a result from data returned by `to_data`, with the error
+        replaced by a RecordedError
+        """
+        result = cls(None if data['location'] is None else tuple(data['location']))
+        result.status = data['status']
+        result.error = None if data['error'] is None else RecordedError(*data['error'])
+        result.frames = None if data['frames'] is None else traceback.StackSummary([
+            traceback.FrameSummary(filename, lineno, name, lookup_line=False)
+            for filename, lineno, name in data['frames']
+        ])
+        result.duration = data['duration']
+        result.memory = None if data['memory'] is None else tuple(data['memory'])
+        result.benchmark = data['benchmark']
+
+        return result
+
+class RecordedError(Exception):
+    """
+    Stands in for an error from a recorded result, keeping the original
+    error's class name along with its message
+    """
+
+    def __init__(self, name, message):
+        self.name = name
+        super().__init__(message)
+
+def error_details(error):
+    """
+    Returns the name & message for an error stored on a result, which may be
+    an exception, a RecordedError, or a plain message.
+    """
+    if isinstance(error, RecordedError):
+        return error.name, str(error)
+
+    return error.__class__.__name__, str(error)
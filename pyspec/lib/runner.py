@@ -6,6 +6,13 @@ running all test groups in a Runner.
 
 from pub_sub import stable
 from pyspec.lib.stats import StatsObj
+from pyspec.lib.reporter import Reporter, Reporters, TextReporter, replay
+from pyspec.lib.result import set_frame_limit
+from pyspec.lib import profiling
+from pyspec.lib import memory
+from pyspec.lib import benchmark
+from pyspec.lib import last_failed
+from pyspec.lib import report_files
 
 PUB_SUB = stable.event('pyspec')
 
@@ -39,8 +46,11 @@ class Runner:
     def __init__(self, passed_pub_sub):
         self.pub_sub = passed_pub_sub
         self.test_groups = []
-        self.results = []
         self.stats = StatsObj()
+        self.reporter = None
+        self.failures = None
+        self.reports = []
+        self.profiles = []
 
     def add_group(self, group):
         """
@@ -60,59 +70,187 @@ class Runner:
 
         return self.test_groups
 
+    def reset(self):
+        """
+        Empties the Runner of all test groups, stats & reporters, so it can be
+        reused for a new run.
+        """
+        self.test_groups = []
+        self.stats = StatsObj()
+        self.reporter = None
+        self.failures = None
+        self.reports = []
+        self.profiles = []
+
+        return self
+
     def run_all(self, parms):
         """
         This function is the single entry point for running all tests held in
         test_groups. This allows any other program interfacing with the library
         to not need to know anything about how individual test groups are
         structured.
+
+        Groups holding tests that failed last time run first with the
+        `failures` parameter's `failed_first` or `last_failed` settings (see
+        pyspec.lib.last_failed).
         """
         # start time tracking for stats
         self.stats.start_time_tracking()
+        self.get_reporter(parms)
+        test_groups = self.test_groups
 
-        muted = parms['muted']
+        if self.failures is not None:
+            test_groups = self.failures.groups(test_groups)
+
+        self.run_groups(test_groups, parms)
 
-        for group in self.test_groups:
-            self.run_one(group, parms)
+        return self.finish(parms)
+
+    def run_groups(self, test_groups, parms):
+        """
+        Runs the given top-level groups in order with `run_one`, until the run
+        is stopped (see `maxfail`). When profiling the whole run, every group
+        is profiled as one call.
+        """
+        # sets up profiling, before deciding whether to profile
+        self.get_reporter(parms)
+
+        def run_each():
+            for group in test_groups:
+                if self.stats.stopped:
+                    break
+
+                self.run_one(group, parms)
+
+        profiling.profiled('run', ['run'], run_each)
+
+        return self
+
+    def finish(self, parms):
+        """
+        Stops time tracking, records the tests that failed (with the `failures`
+        parameter), finishes any report files, prints the stats (unless muted)
+        & publishes this Runner on the 'run results' topic. Called at the end of
+        `run_all`, or directly once all results from worker processes have been
+        merged in with `merge`.
+        """
+        muted = parms['muted']
 
         # end time tracking for stats
         self.stats.stop_time_tracking()
-        # compile stats into final line & append for printout
-        self.results.append(self.stats.get_stats_string())
+        # report files are written even if no test ran
+        self.get_reporter(parms)
+
+        for report in self.reports:
+            report.close()
+
+        if self.failures is not None:
+            # every test of the spec files seen ran, unless some were left out
+            self.failures.save(complete=not (
+                parms.get('keyword') or self.failures.selecting or self.stats.stopped
+            ))
 
         if not muted:
-            for line in self.results:
-                print(line)
+            print(self.stats.get_stats_string())
+
+            if self.stats.benchmarks:
+                print(self.stats.get_benchmarks_string())
+
+            if parms.get('durations') is not None:
+                print(self.stats.get_durations_string(parms['durations']))
+
+            if parms.get('import_times') is not None:
+                print(self.stats.get_import_times_string(parms['import_times']))
+
+            if parms.get('memory') is not None:
+                print(self.stats.get_memory_string(parms['memory'].get('top', 10)))
+
+        profiling.finish()
+        self.profiles.extend(profiling.take_written())
+
+        if not muted and parms.get('profile') is not None:
+            print(profiling.summary(list(dict.fromkeys(self.profiles)), parms['profile']['top']))
 
         self.pub_sub.topic('run results').pub(self)
         return self
 
+    def merge(self, payload, parms):
+        """
+        Replays the events recorded in a payload from another Runner (such as
+        one in a worker process) into this Runner's stats & output, preserving
+        the order that payloads are merged in.
+        """
+        replay(payload['events'], self.get_reporter(parms))
+        self.profiles.extend(payload.get('profiles', ()))
+
+        if payload.get('import_time') is not None:
+            self.stats.import_times.append((payload['path'], payload['import_time']))
+
+        return self
+
+    def get_reporter(self, parms):
+        """
+        Returns the reporter this Runner passes test group events to, creating
+        it on first use from the `verbose` & `muted` parameters. Events always
+        reach this Runner's stats, & also go to `parms['reporter']` if given, or
+        else to stdout unless muted.
+
+        The optional `tb` & `tb_limit` parameters set how stack traces are
+        written & how many frames are kept from each failed test's traceback,
+        `profile` sets how tests are profiled (see pyspec.lib.profiling) &
+        `memory` turns on memory accounting (see pyspec.lib.memory), along
+        with an optional per-test memory `budget`, `benchmarks` sets where
+        benchmark baselines are kept (see pyspec.lib.benchmark), `failures`
+        sets where failed tests are recorded & whether only those run (see
+        pyspec.lib.last_failed), `reports` lists the report files to write as
+        dicts holding their `format` & `path` (see pyspec.lib.report_files),
+        `durations` keeps that many of the slowest tests & groups (see
+        StatsObj) & `maxfail` stops the run once that many tests have failed.
+        """
+        if self.reporter is None:
+            tb = parms.get('tb', 'long')
+            set_frame_limit(0 if tb == 'none' else parms.get('tb_limit'))
+            profiling.configure(parms.get('profile'))
+            benchmark.configure(parms.get('benchmarks'))
+            self.stats.maxfail = parms.get('maxfail')
+            self.stats.durations = parms.get('durations')
+            reporters = [self.stats]
+
+            if memory.configure(parms.get('memory')):
+                self.stats.memory_budget = parms['memory'].get('budget')
+
+            output = parms.get('reporter')
+
+            if output is None:
+                output = Reporter() if parms['muted'] else TextReporter(parms['verbose'], tb=tb)
+
+            if parms.get('failures') is not None:
+                self.failures = last_failed.Failures(parms['failures'])
+                reporters.append(self.failures)
+
+            self.reports = [
+                report_files.open_report(report['format'], report['path'])
+                for report in parms.get('reports') or ()
+            ]
+            self.reporter = Reporters(*reporters, *self.reports, output)
+
+        return self.reporter
+
     def run_one(self, group, parms):
         """
         A simple wrapper to a Describe object's `run()` method. Includes a
         guard against calling `run()` on an inner test group since this would
-        result in an AttributeError.
+        result in an AttributeError. Only the tests matching the `keyword`
+        parameter are ran, if given, & only those that failed last time when
+        selecting by failures (see pyspec.lib.last_failed).
         """
-        muted = parms['muted']
-        verbose = parms['verbose']
-
-        # increment number of tests counter by number of tests in group
-        self.stats.number_of_tests += len(group.tests)
         if not group.outer:
-            group.run(verbose, True)
-
-            for line in group.results:
-                self.results.append(line)
-
-        # parse for failed tests & increment failure counter
-        for test in group.tests:
-            if not test.result['success']:
-                self.stats.number_of_failed_tests += 1
+            reporter = self.get_reporter(parms)
+            keyword = parms.get('keyword')
+            only = None
 
-        # also increment both stats for tests in inner groups
-        for inner in group.inners:
-            self.stats.number_of_tests += len(inner.tests)
+            if self.failures is not None and self.failures.selecting:
+                only = self.failures.failed_paths(group)
 
-            for test in inner.tests:
-                if not test.result['success']:
-                    self.stats.number_of_failed_tests += 1
+            group.run(reporter=reporter, keyword=keyword, only=only)
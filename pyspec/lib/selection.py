@@ -0,0 +1,161 @@
+"""
+Select tests by name. A keyword expression is matched against each test's
+description path: the descriptions of its groups & itself, joined as
+`outer > inner > test`. Selection only reads descriptions, so it is made on the
+collected groups before any of them run & never builds a let or before.
+
+An expression is made of terms combined with `and`, `or`, `not` & parentheses.
+A term matches if it appears anywhere in the description path, ignoring case.
+Words next to each other form a single term, as do quoted strings, which can
+also hold the words `and`, `or` & `not`:
+
+    cache and not slow test
+    (watch or leaks) and "re-runs when saved"
+"""
+
+import re
+import functools
+
+TOKENS = re.compile(r'\s*(?:(\()|(\))|\'([^\']*)\'|"([^"]*)"|([^\s()\'"]+))')
+KEYWORDS = ('and', 'or', 'not')
+
+class SelectionError(ValueError):
+    """
+    Raised on a keyword expression that can't be parsed
+    """
+
+    def __init__(self, expression, reason):
+        super().__init__(f'Invalid keyword expression {expression!r}: {reason}')
+
+@functools.lru_cache(maxsize=None)
+def parse(expression):
+    """
+    Parses a keyword expression.
+
+    Accepts:
+    - expression    (STRING)    see above
+
+    Returns:
+    - A function called with a description path (a list of descriptions) that
+      returns True if the path matches the expression
+    """
+    tokens = _tokenize(expression)
+
+    if not tokens:
+        raise SelectionError(expression, 'it is empty')
+
+    matcher, position = _parse_or(expression, tokens, 0)
+
+    if position < len(tokens):
+        raise SelectionError(expression, f'unexpected {tokens[position][1]!r}')
+
+    return lambda path: matcher(' > '.join(path).lower())
+
+def select(group, matches):
+    """
+    Returns the tests to run in a group & every group nested in it, as a dict
+    mapping each group with at least one selected test, directly or in its
+    inners, to its own selected tests in declaration order. Groups without any
+    are left out.
+    """
+    selected = {}
+    _select(group, group.description_path, matches, selected)
+
+    return selected
+
+def _select(group, path, matches, selected):
+    tests = [test for test in group.tests if matches(path + [test.description])]
+    found = bool(tests)
+
+    for inner in group.inners:
+        found = _select(inner, path + [inner.description], matches, selected) or found
+
+    if found:
+        selected[group] = tests
+
+    return found
+
+def _tokenize(expression):
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+
+    while position < len(expression):
+        match = TOKENS.match(expression, position)
+
+        if match is None:
+            raise SelectionError(expression, f'unmatched quote at {position}')
+
+        opened, closed, single, double, word = match.groups()
+        position = match.end()
+
+        if opened or closed:
+            tokens.append(('paren', opened or closed))
+        elif word is not None and word.lower() in KEYWORDS:
+            tokens.append(('keyword', word.lower()))
+        elif word is not None and tokens and tokens[-1][0] == 'words':
+            # words next to each other are matched as one phrase
+            tokens[-1] = ('words', f'{tokens[-1][1]} {word}')
+        elif word is not None:
+            tokens.append(('words', word))
+        else:
+            tokens.append(('term', single if single is not None else double))
+
+    return tokens
+
+def _parse_or(expression, tokens, position):
+    matchers = []
+    matcher, position = _parse_and(expression, tokens, position)
+    matchers.append(matcher)
+
+    while position < len(tokens) and tokens[position] == ('keyword', 'or'):
+        matcher, position = _parse_and(expression, tokens, position + 1)
+        matchers.append(matcher)
+
+    if len(matchers) == 1:
+        return matchers[0], position
+
+    return lambda text: any(matcher(text) for matcher in matchers), position
+
+def _parse_and(expression, tokens, position):
+    matchers = []
+    matcher, position = _parse_not(expression, tokens, position)
+    matchers.append(matcher)
+
+    while position < len(tokens) and tokens[position] == ('keyword', 'and'):
+        matcher, position = _parse_not(expression, tokens, position + 1)
+        matchers.append(matcher)
+
+    if len(matchers) == 1:
+        return matchers[0], position
+
+    return lambda text: all(matcher(text) for matcher in matchers), position
+
+def _parse_not(expression, tokens, position):
+    if position < len(tokens) and tokens[position] == ('keyword', 'not'):
+        negated, position = _parse_not(expression, tokens, position + 1)
+
+        return lambda text: not negated(text), position
+
+    return _parse_term(expression, tokens, position)
+
+def _parse_term(expression, tokens, position):
+    if position >= len(tokens):
+        raise SelectionError(expression, 'it ends too early')
+
+    kind, value = tokens[position]
+
+    if (kind, value) == ('paren', '('):
+        inner, position = _parse_or(expression, tokens, position + 1)
+
+        if position >= len(tokens) or tokens[position] != ('paren', ')'):
+            raise SelectionError(expression, 'a parenthesis is never closed')
+
+        return inner, position + 1
+
+    if kind not in ('term', 'words'):
+        raise SelectionError(expression, f'unexpected {value!r}')
+
+    term = value.lower()
+
+    return lambda text: term in text, position + 1
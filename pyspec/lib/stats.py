@@ -1,13 +1,56 @@
-import datetime
+import os
+import time
+import heapq
+from pyspec.lib.reporter import Reporter
+from pyspec.lib.memory import MemoryBudgetError, format_size
 
-class StatsObj:
+PERCENTILES = (50, 90, 99)
+
+class StatsObj(Reporter):
     """
-    A class for creating & tracking statistics for the Runner class
+    A class for creating & tracking statistics for the Runner class. As a
+    reporter, it counts tests & failures from each test_finished event & times
+    every test & group.
+
+    All durations are monotonic nanosecond counts from time.perf_counter_ns.
+    Memory use doesn't grow with the number of tests: test durations are
+    counted in a histogram of DurationBuckets for the percentiles, & the
+    slowest tests are only kept when `durations` is set. The following
+    attributes hold what is collected:
+    - test_durations    (OBJECT)    the DurationBuckets counting every test's duration
+    - total_test_time   (INTEGER)   the sum of every test's duration
+    - group_durations   (LIST)  a dict for each finished group, see slowest_groups
+    - test_memory       (LIST)  a `(peak, net, path, location, allocators)` tuple for each
+                                test whose memory was measured (see pyspec.lib.memory)
+    - benchmarks        (LIST)  a `(path, measurement)` tuple for each benchmark test
+                                (see pyspec.lib.benchmark)
+    - import_times      (LIST)  a `(file, duration)` tuple for each spec file imported
+                                for the run, added by whatever imported them
+
+    On initialization, accepts:
+    - [memory_budget]   (INTEGER)   the most bytes a test may use at its peak; tests
+                                    measured going over it are failed, optional
+    - [maxfail]         (INTEGER)   the number of failed tests that stops the run,
+                                    optional; see `stopped`
+    - [durations]       (INTEGER)   how many of the slowest tests to keep, or 0 for all
+                                    of them, optional; see `slowest_tests`
     """
 
-    def __init__(self):
+    def __init__(self, memory_budget=None, maxfail=None, durations=None):
+        self.memory_budget = memory_budget
+        self.maxfail = maxfail
+        self.durations = durations
+        self.test_memory = []
+        self.benchmarks = []
+        self.import_times = []
         self.number_of_tests = 0
         self.number_of_failed_tests = 0
+        self.test_durations = DurationBuckets()
+        self.total_test_time = 0
+        self.group_durations = []
+        self._slowest_tests = []
+        self._finished = 0
+        self._open_groups = []
         self._time_started = None
         self._time_ended = None
 
@@ -16,7 +59,7 @@ class StatsObj:
         Method used to start tracking time for total elapsed
         """
         if self._time_started is None:
-            self._time_started = datetime.datetime.now()
+            self._time_started = time.perf_counter_ns()
 
         return self
 
@@ -24,31 +67,293 @@ class StatsObj:
         """
         Method used to stop time tracking
         """
-        self._time_ended = datetime.datetime.now()
+        self._time_ended = time.perf_counter_ns()
 
         return self
 
+    def group_started(self, description, depth):
+        # a group at the same depth or above as an open one means the open
+        # one's finished event was never seen, so it is dropped
+        del self._open_groups[depth:]
+        self._open_groups.append([description, 0, None])
+
+    def test_finished(self, description, depth, result):
+        if result.memory is not None:
+            self._check_memory(description, depth, result)
+
+        self.number_of_tests += 1
+
+        if not result.success:
+            self.number_of_failed_tests += 1
+
+        if result.duration is None:
+            return
+
+        path = tuple(group[0] for group in self._open_groups[:depth + 1]) + (description,)
+        self.test_durations.add(result.duration)
+        self.total_test_time += result.duration
+        self._keep_slowest(self._slowest_tests, result.duration, (path, result.location))
+
+        if result.benchmark is not None:
+            self.benchmarks.append((path, result.benchmark))
+
+        for group in self._open_groups:
+            group[1] += result.duration
+
+            if group[2] is None and result.location is not None:
+                group[2] = result.location[0]
+
+    def group_finished(self, description, depth, duration=None):
+        if len(self._open_groups) <= depth:
+            return
+
+        path = [group[0] for group in self._open_groups[:depth + 1]]
+        _, tests_duration, file_name = self._open_groups[depth]
+        del self._open_groups[depth:]
+
+        if duration is not None:
+            self.group_durations.append({
+                'path': path,
+                'duration': duration,
+                'tests': tests_duration,
+                'file': file_name,
+            })
+
+    def _keep_slowest(self, slowest, duration, record):
+        if self.durations is None:
+            return
+
+        # a min-heap of the slowest so far, where the fastest of them is
+        # replaced once it holds `durations` records; the count breaks ties, so
+        # records themselves are never compared
+        self._finished += 1
+        entry = (duration, self._finished, record)
+
+        if not self.durations or len(slowest) < self.durations:
+            heapq.heappush(slowest, entry)
+        else:
+            heapq.heappushpop(slowest, entry)
+
+    def _check_memory(self, description, depth, result):
+        peak, net, allocators = result.memory
+        path = tuple(group[0] for group in self._open_groups[:depth + 1]) + (description,)
+        self.test_memory.append((peak, net, path, result.location, allocators))
+
+        # reporters after this one see the test as failed
+        if self.memory_budget is not None and peak > self.memory_budget and result.success:
+            result.failed(MemoryBudgetError(peak, self.memory_budget))
+
+    @property
+    def stopped(self):
+        """
+        Property that is True once `maxfail` tests have failed, which stops the
+        run (see pyspec.lib.reporter)
+        """
+        return self.maxfail is not None and self.number_of_failed_tests >= self.maxfail
+
     def get_stats_string(self):
         """
         Compiles stats into a human-readable string for printing with
         test results.
         """
+        percentiles = ', '.join(
+            f'p{percent} {format_duration(self.percentile(percent))}'
+            for percent in PERCENTILES
+        )
+        groups = ''.join(
+            f'Slowest group: {" > ".join(group["path"])} {format_duration(group["duration"])}, '
+            f'{format_duration(group["tests"])} in its tests ({len(self.group_durations)} timed)\n'
+            for group in self.slowest_groups(1)
+        )
+        stopped = (
+            f'Stopped after {self.number_of_failed_tests} failed test(s), '
+            f'the remaining tests were not ran\n'
+        ) if self.stopped else ''
+
         return (
             f'\n'
             f'Tests ran: {self.number_of_tests}\n'
             f'Success rate: {self.success_failure_rate * 100}%\n'
-            f'Total time: {self.total_time_elapsed} microseconds\n'
+            f'Total time: {format_duration(self.total_time_ns)}\n'
+            f'Test time: {format_duration(self.total_test_time)} ({percentiles})\n'
+            f'{groups}'
+            f'{stopped}'
+        )
+
+    def get_durations_string(self, count):
+        """
+        Compiles the slowest tests & groups into a human-readable string, with
+        the file & description path of each.
+
+        Accepts:
+        - count     (INTEGER)   how many tests & groups to list, or 0 for all of them
+
+        Returns:
+        - A string listing the slowest tests, then the slowest groups, slowest first
+        """
+        heading = f'Slowest {count}' if count else 'All'
+        lines = ['', f'{heading} tests:']
+
+        for duration, path, location in self.slowest_tests(count):
+            where = '' if location is None else f'{relative_path(location[0])}:{location[1]}  '
+            lines.append(f'  {format_duration(duration):>10}  {where}{" > ".join(path)}')
+
+        lines.append(f'{heading} groups:')
+
+        for group in self.slowest_groups(count):
+            where = '' if group['file'] is None else f'{relative_path(group["file"])}  '
+            lines.append(
+                f'  {format_duration(group["duration"]):>10}  {where}{" > ".join(group["path"])}'
+            )
+
+        return '\n'.join(lines) + '\n'
+
+    def get_memory_string(self, count):
+        """
+        Compiles the tests that used the most memory into a human-readable
+        string, with the peak & net retained memory of each & the source lines
+        that allocated the memory it retained.
+
+        Accepts:
+        - count     (INTEGER)   how many tests to list, or 0 for all of them
+
+        Returns:
+        - A string listing the tests with the highest peak memory, highest first
+        """
+        heading = f'Top {count} tests' if count else 'All tests'
+        lines = ['', f'{heading} by peak memory:']
+        measured = sorted(self.test_memory, key=lambda measure: measure[0], reverse=True)
+
+        for peak, net, path, location, allocators in measured[:count or None]:
+            where = '' if location is None else f'{relative_path(location[0])}:{location[1]}  '
+            lines.append(
+                f'  {format_size(peak):>10} peak {format_size(net):>10} net  '
+                f'{where}{" > ".join(path)}'
+            )
+
+            for allocator, size in allocators:
+                lines.append(f'      {format_size(size):>10}  {relative_path(allocator)}')
+
+        return '\n'.join(lines) + '\n'
+
+    def get_benchmarks_string(self):
+        """
+        Compiles the measurements of every benchmark test into a human-readable
+        table, in the order they ran. Measurements taken while tracemalloc was
+        tracing aren't compared with their baselines
+        """
+        lines = ['', 'Benchmarks (per call):']
+
+        for path, measured in self.benchmarks:
+            if measured['traced']:
+                change = 'not compared'
+            elif measured['baseline'] is None:
+                change = 'new baseline'
+            else:
+                change = f'{(measured["min"] / measured["baseline"] - 1) * 100:+.1f}% vs baseline'
+
+            lines.append(
+                f'  mean {format_duration(measured["mean"]):>10}'
+                f' ± {format_duration(measured["stddev"]):>10}'
+                f'  min {format_duration(measured["min"]):>10}'
+                f'  {change:>18}  {" > ".join(path)}'
+            )
+
+        return '\n'.join(lines) + '\n'
+
+    def get_import_times_string(self, count):
+        """
+        Compiles the spec files that took longest to import into a human-readable
+        string. Importing a spec file declares its test groups, so this is the
+        time taken to collect its tests.
+
+        Accepts:
+        - count     (INTEGER)   how many spec files to list, or 0 for all of them
+
+        Returns:
+        - A string listing the slowest spec files to import, slowest first
+        """
+        heading = f'Slowest {count}' if count else 'All'
+        total = sum(duration for _, duration in self.import_times)
+        lines = [
+            '',
+            f'{heading} spec file imports '
+            f'({len(self.import_times)} files in {format_duration(total)}):'
+        ]
+        slowest = sorted(self.import_times, key=lambda timing: timing[1], reverse=True)
+
+        for file_name, duration in slowest[:count or None]:
+            lines.append(f'  {format_duration(duration):>10}  {relative_path(file_name)}')
+
+        return '\n'.join(lines) + '\n'
+
+    def slowest_tests(self, count):
+        """
+        Returns `(duration, path, location)` tuples for the `count` slowest
+        tests, slowest first, or for every test kept if `count` is 0. Tests are
+        only kept when `durations` is set, & no more than `durations` of them.
+        """
+        slowest = heapq.nlargest(count or len(self._slowest_tests), self._slowest_tests)
+
+        return [(duration, *record) for duration, _, record in slowest]
+
+    def slowest_groups(self, count):
+        """
+        Returns a dict for each of the `count` slowest groups, slowest first, or
+        for every group if `count` is 0, holding the group's `path` (the
+        descriptions of its outers & itself), its `duration`, `tests`, the sum
+        of the durations of every test in the group & its inners, & the `file`
+        it was declared in (taken from its tests, so None for a group without
+        any). Every group is kept, whether or not `durations` is set.
+        """
+        return heapq.nlargest(
+            count or len(self.group_durations),
+            self.group_durations,
+            key=lambda group: group['duration']
         )
 
     @property
-    def total_time_elapsed(self):
+    def timings(self):
         """
-        Property getter for total_time_elapsed in microseconds
+        Property getter for every timing collected, as a dict of nanoseconds
+        holding the `total` run time, the sum of all `tests`, the `p50`, `p90`
+        & `p99` test durations & every one of the `groups`, slowest first (see
+        slowest_groups)
+        """
+        timings = {
+            'total': self.total_time_ns,
+            'tests': self.total_test_time,
+            'groups': self.slowest_groups(0),
+        }
+
+        for percent in PERCENTILES:
+            timings[f'p{percent}'] = self.percentile(percent)
+
+        return timings
+
+    def percentile(self, percent):
+        """
+        Returns the test duration at the given percentile, using the nearest
+        rank, or 0 if no tests were timed (see DurationBuckets)
+        """
+        return self.test_durations.percentile(percent)
+
+    @property
+    def total_time_ns(self):
+        """
+        Property getter for total time elapsed in nanoseconds
         """
         if self._time_started is None or self._time_ended is None:
-            return datetime.timedelta(0)
+            return 0
 
-        return (self._time_ended - self._time_started).microseconds
+        return self._time_ended - self._time_started
+
+    @property
+    def total_time_elapsed(self):
+        """
+        Property getter for total_time_elapsed in microseconds
+        """
+        return self.total_time_ns // 1000
 
     @property
     def success_failure_rate(self):
@@ -60,3 +365,66 @@ class StatsObj:
             return (self.number_of_tests - self.number_of_failed_tests) / self.number_of_tests
         except ZeroDivisionError:
             return 0
+
+class DurationBuckets:
+    """
+    A histogram counting durations by their leading SIGNIFICANT_BITS binary
+    digits, so the number of buckets stays small however many durations are
+    added, while any percentile is still found to within 1%. Durations below
+    2 ** SIGNIFICANT_BITS nanoseconds are counted exactly.
+    """
+
+    SIGNIFICANT_BITS = 8
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+
+    def add(self, duration):
+        """
+        Counts a duration in nanoseconds, in the bucket of the durations
+        sharing its leading digits
+        """
+        shift = max(duration.bit_length() - self.SIGNIFICANT_BITS, 0)
+        bucket = duration >> shift << shift
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+
+    def __len__(self):
+        return self.total
+
+    def percentile(self, percent):
+        """
+        Returns the lowest duration in the bucket holding the given percentile,
+        using the nearest rank, or 0 if no durations were added
+        """
+        rank = max(-(-percent * self.total // 100), 1)
+        seen = 0
+
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+
+            if seen >= rank:
+                return bucket
+
+        return 0
+
+def relative_path(path):
+    """
+    Returns a path relative to the current $PWD if it is inside it, or else
+    the path unchanged
+    """
+    relative = os.path.relpath(path)
+
+    return path if relative.startswith('..') else relative
+
+def format_duration(nanoseconds):
+    """
+    Returns a duration in nanoseconds as a short, human-readable string in the
+    largest unit that keeps it above 1, e.g. `1.50s` or `12.30ms`
+    """
+    for unit, size in (('s', 10 ** 9), ('ms', 10 ** 6), ('µs', 10 ** 3)):
+        if nanoseconds >= size:
+            return f'{nanoseconds / size:.2f}{unit}'
+
+    return f'{round(nanoseconds, 1):g}ns'
@@ -0,0 +1,97 @@
+#! /usr/bin/env python
+"""tests for micro-benchmark tests"""
+
+import os
+import json
+import tempfile
+import tracemalloc
+import pyspec
+from pyspec.lib import benchmark
+from pub_sub import stable
+
+C = pyspec.Comparisons
+
+BENCHMARK = pyspec.describe('benchmark code in tests, against a baseline')
+
+QUICK = {'warmup': 0, 'rounds': 3, 'round_time': .001}
+BASELINES = os.path.join(tempfile.mkdtemp(), 'baselines.json')
+
+SORTING = pyspec.describe('sorting', stable.event('benchmark spec'))
+SORTING.it('sorts a short list').benchmark(lambda: sorted([3, 1, 2]), .5, **QUICK)
+
+def run_against(baselines):
+    if baselines is None and os.path.exists(BASELINES):
+        os.remove(BASELINES)
+    elif baselines is not None:
+        with open(BASELINES, 'w') as baseline_file:
+            json.dump(baselines, baseline_file)
+
+    benchmark.configure({'path': BASELINES})
+
+    try:
+        SORTING.run(muted=True)
+    finally:
+        benchmark.configure(None)
+
+    return SORTING.tests[0].result
+
+def recorded_baseline():
+    run_against(None)
+
+    with open(BASELINES) as baseline_file:
+        return list(json.load(baseline_file))
+
+def status_against_baseline(fastest):
+    return run_against({'sorting > sorts a short list': {'min': fastest}}).status
+
+def traced_against_baseline(fastest):
+    started_tracing = not tracemalloc.is_tracing()
+
+    if started_tracing:
+        tracemalloc.start()
+
+    try:
+        result = run_against({'sorting > sorts a short list': {'min': fastest}})
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    with open(BASELINES) as baseline_file:
+        return [result.status, result.benchmark['traced'], json.load(baseline_file)]
+
+BENCHMARK.it(
+    'measures the mean, standard deviation & fastest call'
+).expect(lambda: sorted(run_against(None).benchmark)).to(
+    C.eq, ['baseline', 'loops', 'mean', 'min', 'rounds', 'stddev', 'traced']
+)
+
+BENCHMARK.it(
+    'calibrates the number of calls per round'
+).expect(lambda: benchmark.measure(lambda: None, **QUICK)['loops'] > 1).to(C.eq, True)
+
+BENCHMARK.it(
+    'records a baseline for a new benchmark, keyed by its description path'
+).expect(recorded_baseline).to(C.eq, ['sorting > sorts a short list'])
+
+BENCHMARK.it(
+    'passes while within the tolerance of the baseline'
+).expect(lambda: status_against_baseline(10 ** 9)).to(C.eq, 'passed')
+
+BENCHMARK.it(
+    'fails when slower than the baseline by more than the tolerance'
+).expect(lambda: status_against_baseline(.001)).to(C.eq, 'failed')
+
+BENCHMARK.it(
+    'neither records nor compares baselines while tracemalloc is tracing'
+).expect(lambda: traced_against_baseline(.001)).to(
+    C.eq, ['passed', True, {'sorting > sorts a short list': {'min': .001}}]
+)
+
+BENCHMARK.it(
+    'keeps baselines in the project cache directory by default'
+).expect(lambda: os.path.relpath(benchmark.baseline_path())).to(
+    C.eq, os.path.join('.pyspec_cache', 'pyspec_baselines.json')
+)
+
+if __name__ == '__main__':
+    BENCHMARK.run()
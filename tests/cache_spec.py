@@ -0,0 +1,99 @@
+#! /usr/bin/env python
+"""tests for the incremental results cache"""
+
+import os
+import sys
+import tempfile
+from types import ModuleType
+import pyspec
+from pyspec.cli.cache import ResultsCache, project_dependencies
+
+C = pyspec.Comparisons
+
+CACHE = pyspec.describe('cache spec file results between runs')
+
+ROOT = tempfile.mkdtemp()
+SPEC_FILE = os.path.join(ROOT, 'example_spec.py')
+DEPENDENCY = os.path.join(ROOT, 'example.py')
+
+def write(path, text):
+    with open(path, 'w') as source:
+        source.write(text)
+
+write(SPEC_FILE, 'import example\n')
+write(DEPENDENCY, 'def two():\n    return 2\n')
+
+PAYLOAD = {
+    'path': SPEC_FILE,
+    'events': [['group_started', 'example', 0], ['group_finished', 'example', 0]],
+    'dependencies': [DEPENDENCY],
+}
+
+ResultsCache(ROOT).record(SPEC_FILE, PAYLOAD).save()
+
+def lookup_after_changing(path):
+    write(path, '# changed\n')
+
+    return ResultsCache(ROOT).lookup(SPEC_FILE)
+
+CACHE.it(
+    'replays the results of an unchanged spec file'
+).expect(lambda: ResultsCache(ROOT).lookup(SPEC_FILE)).to(C.eq, PAYLOAD)
+
+CACHE.it(
+    'does not replay results for a spec file that was never ran'
+).expect(lambda: ResultsCache(ROOT).lookup(os.path.join(ROOT, 'other_spec.py'))).to(C.eq, None)
+
+CACHE.it(
+    'does not replay results once a dependency changes'
+).expect(lambda: lookup_after_changing(DEPENDENCY)).to(C.eq, None)
+
+CACHE.it(
+    'does not replay results once the spec file changes'
+).expect(lambda: lookup_after_changing(SPEC_FILE)).to(C.eq, None)
+
+DEPENDENCY_MODULE = ModuleType('example')
+DEPENDENCY_MODULE.__file__ = DEPENDENCY
+SPEC_MODULE = ModuleType('example_spec')
+SPEC_MODULE.example = DEPENDENCY_MODULE
+SPEC_MODULE.os = os
+
+CACHE.it(
+    'finds the project modules a spec module depends on'
+).expect(lambda: project_dependencies(SPEC_MODULE, ROOT)).to(C.eq, [DEPENDENCY])
+
+CACHE.it(
+    'ignores modules outside of the project'
+).expect(lambda: project_dependencies(SPEC_MODULE, ROOT)).to_not(C.include, os.__file__)
+
+def imported_dependencies():
+    """
+    Returns the dependencies of a spec module that only took a value from a
+    project module, which is found through the imports recorded for it
+    """
+    sys.modules['example'] = DEPENDENCY_MODULE
+    spec_module = ModuleType('example_values_spec')
+    spec_module.TWO = 2
+
+    try:
+        return project_dependencies(
+            spec_module,
+            ROOT,
+            {'example_values_spec': {'example', 'example.TWO'}}
+        )
+    finally:
+        del sys.modules['example']
+
+CACHE.it(
+    'finds the project modules a spec module imported names from'
+).expect(imported_dependencies).to(C.eq, [DEPENDENCY])
+
+CACHE.it(
+    'does not replay results recorded with other settings'
+).expect(lambda: [
+    ResultsCache(ROOT, settings={'tb': 'short'}).record(SPEC_FILE, PAYLOAD).lookup(SPEC_FILE),
+    ResultsCache(ROOT, settings={'tb': 'long'}).lookup(SPEC_FILE)
+]).to(C.eq, [PAYLOAD, None])
+
+if __name__ == '__main__':
+    CACHE.run()
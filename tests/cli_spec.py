@@ -17,6 +17,12 @@ COMMANDS.it(
     'can run all tests in a given directory'
 ).expect(lambda: COMMANDS.cli_run.all_tests('tests/test_examples', False, True)).to(C.be_a, Runner)
 
+COMMANDS.it(
+    'can run all tests in a given directory across worker processes'
+).expect(
+    lambda: COMMANDS.cli_run.all_tests('tests/test_examples', False, True, jobs=2)
+).to(C.be_a, Runner)
+
 COMMANDS.it(
     'can run just the tests for one file'
 ).expect(
@@ -2,9 +2,13 @@
 """tests for python test runner"""
 
 import random
+import asyncio
+import threading
+import time
 from pyspec import describe
 from pyspec import comparisons as C
 from pyspec.lib.comparisons import AssertionError
+from pyspec.lib import aio
 from pub_sub import stable
 
 ### EXPECTATIONS ###
@@ -83,13 +87,13 @@ FAILURES.fail_group.run(False, True)
 def failed():
     """this mehod will fail"""
     # & grab the error off the test result object & re-raise it
-    raise FAILURES.fail_group.tests[0].result['err']
+    raise FAILURES.fail_group.tests[0].result.error
 
 # then assign that function to a method on common state for the test group
 FAILURES.failed = failed
 # you can grab just the error message from the args attribute of the returned error
-FAILURES.failed_msg = FAILURES.fail_group.tests[0].result['err']
-FAILURES.raise_error_failed_msg = FAILURES.fail_group.tests[1].result['err']
+FAILURES.failed_msg = FAILURES.fail_group.tests[0].result.error
+FAILURES.raise_error_failed_msg = FAILURES.fail_group.tests[1].result.error
 
 # lastly, call it on the common method as the expected value with
 # AssertionError as the error that should be raised by the failing test
@@ -110,6 +114,22 @@ FAILURES.it(
     "expected <class 'TypeError'>, but got <class 'ZeroDivisionError'>"
 )
 
+RESULTS = describe('record test results')
+
+RESULTS.it(
+    'records where each test was declared'
+).expect(
+    lambda: FAILURES.fail_group.tests[0].result.location[0].endswith('describe_spec.py')
+).to(C.eq, True)
+
+RESULTS.it(
+    'records how long each test took to run'
+).expect(lambda: FAILURES.fail_group.tests[0].result.duration).to(C.be_a, int)
+
+RESULTS.it(
+    'keeps tests compact by not giving them an attribute dictionary'
+).expect(lambda: hasattr(FAILURES.fail_group.tests[0], '__dict__')).to(C.eq, False)
+
 LET = describe('let')
 
 # # this is done by creating new attributes on the test group
@@ -161,6 +181,43 @@ LET.it(
     'raises the correct error when an attribute on the Test Group does not exist'
 ).expect(lambda: LET.does_not_exist).to(C.raise_error, AttributeError)
 
+LAZY_LET = describe('lazy let')
+
+FACTORY_CALLS = []
+
+def build_list():
+    FACTORY_CALLS.append(True)
+
+    return [1, 2, 3]
+
+LAZY_LET.let('built', build_list, factory=True)
+LAZY_LET.let('will_error', lambda: 1/0, factory=True)
+
+LAZY_LET.it(
+    'does not call a factory until the let is accessed'
+).expect(lambda: len(FACTORY_CALLS)).to(C.eq, 0)
+
+LAZY_LET.it(
+    'uses the value returned by the factory'
+).expect(lambda: LAZY_LET.built).to(C.eq, [1, 2, 3])
+
+LAZY_LET.it(
+    'calls the factory only once'
+).expect(lambda: LAZY_LET.built is LAZY_LET.built and len(FACTORY_CALLS)).to(C.eq, 1)
+
+LAZY_LET.it(
+    'raises errors from the factory in the test that accesses the let'
+).expect(lambda: LAZY_LET.will_error).to(C.raise_error, ZeroDivisionError)
+
+RELEASED = describe('released', stable.event('released'))
+RELEASED.let('value', list, factory=True)
+RELEASED.it('builds the value').expect(lambda: RELEASED.value).to(C.eq, [])
+RELEASED.run(False, True)
+
+LAZY_LET.it(
+    'releases the value built by a factory once the group has ran'
+).expect(lambda: 'value' in RELEASED.lets).to(C.eq, False)
+
 
 BEFORE = describe('before')
 
@@ -203,11 +260,44 @@ BEFORE.it(
     'raises the correct error when an attribute on the Test Group does not exist'
 ).expect(lambda: BEFORE.does_not_exist).to(C.raise_error, AttributeError)
 
+BEFORE_FACTORY = describe('before factory')
+
+TORN_DOWN = []
+
+BEFORE_FACTORY.before('items', list, factory=True, after=TORN_DOWN.append)
+
+def add_item():
+    BEFORE_FACTORY.items.append(1)
+
+    return BEFORE_FACTORY.items
+
+BEFORE_FACTORY.it(
+    'builds a new value for a test'
+).expect(add_item).to(C.eq, [1])
+
+BEFORE_FACTORY.it(
+    'builds a new value for every test'
+).expect(add_item).to(C.eq, [1])
+
+BEFORE_FACTORY.it(
+    'tears down the value after each test that used it'
+).expect(lambda: TORN_DOWN).to(C.eq, [[1], [1]])
+
+FAILED_TEARDOWN = describe('failed teardown', stable.event('failed teardown'))
+FAILED_TEARDOWN.before('value', 1, after=lambda value: 1/0)
+FAILED_TEARDOWN.it('would pass').expect(lambda: FAILED_TEARDOWN.value).to(C.eq, 1)
+FAILED_TEARDOWN.run(False, True)
+
+BEFORE_FACTORY.it(
+    'fails a test when tearing down one of its befores raises an error'
+).expect(lambda: FAILED_TEARDOWN.tests[0].result.success).to(C.eq, False)
+
 
 OUTER = describe('outer')
 
 OUTER.let('five', 5)
 OUTER.before('six', 6)
+OUTER.before('seven', lambda: 7, factory=True)
 
 INNER = OUTER.describe('inner')
 
@@ -219,16 +309,107 @@ def changed():
 INNER.let('changed', changed)
 
 INNER.it('can view befores on the outer group').expect(lambda: INNER.six).to(C.eq, 6)
+INNER.it(
+    'can view before factories on the outer group'
+).expect(lambda: INNER.seven).to(C.eq, 7)
 INNER.it('can view lets on the outer group').expect(lambda: INNER.five).to(C.eq, 5)
 INNER.it('can change the value of lets defined by outer').expect(INNER.changed).to(C.eq, 6)
 
 OUTER.it('but the value on outer will remain the same').expect(lambda: OUTER.five).to(C.eq, 5)
 
 
+CONCURRENT = describe('concurrent', concurrency=4)
+
+CONCURRENT.before('count', 0)
+
+def increment_count():
+    CONCURRENT.count += 1
+    # give any other test running at the same time a chance to see the change
+    time.sleep(.01)
+
+    return CONCURRENT.count
+
+CONCURRENT.it(
+    'gives each test its own befores'
+).expect(increment_count).to(C.eq, 1)
+
+CONCURRENT.it(
+    'does not share befores between tests running at the same time'
+).expect(increment_count).to(C.eq, 1)
+
+CONCURRENT.it(
+    'runs tests on a pool of threads'
+).expect(lambda: threading.current_thread() is threading.main_thread()).to(C.eq, False)
+
+CONCURRENT.it(
+    'can be made concurrent after it is described'
+).expect(lambda: describe('later', stable.event('later')).concurrent(2).concurrency).to(C.eq, 2)
+
+
+ASYNC = describe('async')
+
+async def async_two():
+    await asyncio.sleep(0)
+
+    return 2
+
+async def async_divide_by_zero():
+    await asyncio.sleep(0)
+
+    return 1/0
+
+async def running_loop():
+    return asyncio.get_running_loop()
+
+ASYNC.it(
+    'can expect coroutine functions'
+).expect(async_two).to(C.eq, 2)
+
+ASYNC.it(
+    'can expect functions that return an awaitable'
+).expect(lambda: async_two()).to(C.eq, 2)
+
+ASYNC.it(
+    'can expect exceptions raised by a coroutine'
+).expect(async_divide_by_zero).to(C.raise_error, ZeroDivisionError)
+
+ASYNC.it(
+    'runs every coroutine on the same event loop'
+).expect(running_loop).to(C.eq, aio.shared_loop())
+
+ASYNC_CONCURRENT = describe('async concurrent', concurrency=2)
+
+ASYNC_CONCURRENT.before('count', 0)
+
+async def increment_count_later():
+    ASYNC_CONCURRENT.count += 1
+    await asyncio.sleep(.01)
+
+    return ASYNC_CONCURRENT.count
+
+ASYNC_CONCURRENT.it(
+    'gives each async test its own befores'
+).expect(increment_count_later).to(C.eq, 1)
+
+ASYNC_CONCURRENT.it(
+    'does not share befores between async tests awaited at the same time'
+).expect(increment_count_later).to(C.eq, 1)
+
+ASYNC_CONCURRENT.it(
+    'can expect exceptions raised by a coroutine awaited with others'
+).expect(async_divide_by_zero).to(C.raise_error, ZeroDivisionError)
+
+
 if __name__ == '__main__':
     EXPECTATIONS.run()
     BOOLEANS.run()
     FAILURES.run()
+    RESULTS.run()
     LET.run()
+    LAZY_LET.run()
     BEFORE.run()
+    BEFORE_FACTORY.run()
     OUTER.run()
+    CONCURRENT.run()
+    ASYNC.run()
+    ASYNC_CONCURRENT.run()
@@ -0,0 +1,121 @@
+#! /usr/bin/env python
+"""tests for recursive, cached spec file discovery"""
+
+import os
+import time
+import tempfile
+import pyspec
+from pyspec.cli.discovery import Discovery
+
+C = pyspec.Comparisons
+
+DISCOVERY = pyspec.describe('find spec files in nested directories')
+
+ROOT = tempfile.mkdtemp()
+
+def write(*parts):
+    path = os.path.join(ROOT, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, 'w') as source:
+        source.write('')
+
+    return path
+
+for parts in (
+        ('tests', 'top_spec.py'),
+        ('tests', 'helpers.py'),
+        ('tests', 'unit', 'nested_spec.py'),
+        ('tests', 'unit', 'deeper', 'deep_spec.py'),
+        ('tests', 'slow', 'slow_spec.py'),
+        ('tests', '.git', 'hooks_spec.py'),
+        ('tests', 'node_modules', 'package_spec.py'),
+        ('tests', 'env', 'pyvenv.cfg'),
+        ('tests', 'env', 'lib', 'installed_spec.py'),
+):
+    write(*parts)
+
+def age_directories():
+    """
+    Moves every directory's modification time back, so the manifest trusts it
+    """
+    past = time.time() - 60
+
+    for directory, _, _ in os.walk(ROOT):
+        os.utime(directory, (past, past))
+
+age_directories()
+
+def found(include=None, exclude=None, manifest=None):
+    files = Discovery(ROOT, include, exclude, manifest).find(os.path.join(ROOT, 'tests'))
+
+    return [os.path.relpath(path, ROOT) for path in files]
+
+def reused_manifest():
+    Discovery(ROOT).find(os.path.join(ROOT, 'tests'))
+    discovery = Discovery(ROOT)
+    discovery._scan = lambda directory: ([], []) # pylint: disable=protected-access
+
+    return [os.path.relpath(path, ROOT) for path in discovery.find(os.path.join(ROOT, 'tests'))]
+
+def added_after_manifest():
+    Discovery(ROOT).find(os.path.join(ROOT, 'tests'))
+    write('tests', 'unit', 'added_spec.py')
+    files = found(manifest='discovery.json')
+    os.remove(os.path.join(ROOT, 'tests', 'unit', 'added_spec.py'))
+    age_directories()
+
+    return os.path.join('tests', 'unit', 'added_spec.py') in files
+
+DISCOVERY.it(
+    'finds spec files in every nested directory, sorted by path'
+).expect(found).to(C.eq, [
+    os.path.join('tests', 'slow', 'slow_spec.py'),
+    os.path.join('tests', 'top_spec.py'),
+    os.path.join('tests', 'unit', 'deeper', 'deep_spec.py'),
+    os.path.join('tests', 'unit', 'nested_spec.py'),
+])
+
+DISCOVERY.it(
+    'skips version control, dependency & virtualenv directories'
+).expect(lambda: [path for path in found() if 'hooks' in path or 'package' in path
+                  or 'installed' in path]).to(C.eq, [])
+
+DISCOVERY.it(
+    'skips files & directories matching an exclude pattern'
+).expect(lambda: found(exclude=['slow', '*/deeper/*'])).to(C.eq, [
+    os.path.join('tests', 'top_spec.py'),
+    os.path.join('tests', 'unit', 'nested_spec.py'),
+])
+
+DISCOVERY.it(
+    'finds files matching an include pattern instead of *_spec.py'
+).expect(lambda: found(include=['helpers.py'])).to(C.eq, [
+    os.path.join('tests', 'helpers.py'),
+])
+
+DISCOVERY.it(
+    'reuses the manifest for directories that have not changed'
+).expect(reused_manifest).to(C.eq, found())
+
+DISCOVERY.it(
+    'lists a directory again once a file is added to it'
+).expect(added_after_manifest).to(C.eq, True)
+
+def outside_keys():
+    """
+    Finds spec files in a directory outside the root, returning the keys of
+    the manifest saved afterwards that lead outside the root
+    """
+    root = os.path.join(ROOT, 'tests', 'unit')
+    Discovery(root).find(os.path.join(ROOT, 'tests'))
+    directories = Discovery(root).directories
+
+    return [key for key in directories if key.startswith(os.pardir)]
+
+DISCOVERY.it(
+    'keeps no directories outside the root in the manifest'
+).expect(outside_keys).to(C.eq, [])
+
+if __name__ == '__main__':
+    DISCOVERY.run()
@@ -0,0 +1,120 @@
+#! /usr/bin/env python
+"""tests for loading spec files as registered modules"""
+
+import os
+import sys
+import tempfile
+import pyspec
+from pyspec.cli.importer import SpecImporter, module_name
+
+C = pyspec.Comparisons
+
+IMPORTER = pyspec.describe('load spec files as real modules')
+
+ROOT = tempfile.mkdtemp()
+OUTSIDE = tempfile.mkdtemp()
+sys.path.append(ROOT)
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, 'w') as source:
+        source.write(text)
+
+    return path
+
+SHARED = write(
+    os.path.join(ROOT, 'importer_specs', 'shared_spec.py'),
+    'import importer_spec_runs\nimporter_spec_runs.RUNS.append("shared")\nVALUE = object()\n'
+)
+USER = write(
+    os.path.join(ROOT, 'importer_specs', 'user_spec.py'),
+    'import importer_specs.shared_spec\nSHARED = importer_specs.shared_spec\n'
+)
+BROKEN = write(os.path.join(ROOT, 'importer_specs', 'broken_spec.py'), 'raise ValueError()\n')
+VALUES = write(
+    os.path.join(ROOT, 'importer_specs', 'values_spec.py'),
+    'from importer_spec_runs import RUNS\n'
+)
+# counts how many times the shared spec file runs
+write(os.path.join(ROOT, 'importer_spec_runs.py'), 'RUNS = []\n')
+
+def collect(*paths):
+    """
+    Loads the given spec files in one pass, returning the number of times the
+    shared spec ran
+    """
+    import importer_spec_runs # pylint: disable=import-outside-toplevel,import-error
+    importer_spec_runs.RUNS = []
+    importer = SpecImporter(ROOT).begin()
+
+    for path in paths:
+        importer.load(path)
+
+    return len(importer_spec_runs.RUNS)
+
+def registered():
+    module = SpecImporter(ROOT).begin().load(USER)
+
+    return sys.modules['importer_specs.user_spec'] is module
+
+def failed_import():
+    try:
+        SpecImporter(ROOT).begin().load(BROKEN)
+    except ValueError:
+        pass
+
+    return 'importer_specs.broken_spec' in sys.modules
+
+def import_times(*paths):
+    importer = SpecImporter(ROOT).begin()
+
+    for path in paths:
+        importer.load(path)
+
+    return [os.path.basename(path) for path, _ in importer.import_times]
+
+IMPORTER.it(
+    'names a spec file by its dotted path relative to the project root'
+).expect(lambda: module_name(USER, ROOT)).to(C.eq, 'importer_specs.user_spec')
+
+IMPORTER.it(
+    'names a spec file outside the project root after its directory & file name'
+).expect(
+    lambda: module_name(os.path.join(OUTSIDE, 'user_spec.py'), ROOT).endswith('_user_spec')
+).to(C.eq, True)
+
+IMPORTER.it(
+    'registers each spec file in sys.modules under its name'
+).expect(
+    registered
+).to(C.eq, True)
+
+IMPORTER.it(
+    'runs a spec file imported by another spec file only once per pass'
+).expect(lambda: collect(USER, SHARED)).to(C.eq, 1)
+
+IMPORTER.it(
+    'runs every spec file again on a new pass'
+).expect(lambda: collect(SHARED) + collect(SHARED)).to(C.eq, 2)
+
+IMPORTER.it(
+    'does not keep a spec file that failed to import in sys.modules'
+).expect(failed_import).to(C.eq, False)
+
+def recorded_imports():
+    importer = SpecImporter(ROOT).begin()
+    importer.load(VALUES)
+
+    return sorted(importer.imports['importer_specs.values_spec'])
+
+IMPORTER.it(
+    'records the modules a spec file imported names from'
+).expect(recorded_imports).to(C.eq, ['importer_spec_runs', 'importer_spec_runs.RUNS'])
+
+IMPORTER.it(
+    'times the import of each spec file'
+).expect(lambda: import_times(SHARED, USER)).to(C.eq, ['shared_spec.py', 'user_spec.py'])
+
+if __name__ == '__main__':
+    IMPORTER.run()
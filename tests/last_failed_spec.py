@@ -0,0 +1,147 @@
+#! /usr/bin/env python
+"""tests for re-running the tests that failed last time"""
+
+import os
+import json
+import tempfile
+import pyspec
+from pub_sub import stable
+from pyspec.lib import last_failed
+from pyspec.lib.describe import Describe
+from pyspec.lib.reporter import Recorder
+from pyspec.lib.runner import Runner
+
+C = pyspec.Comparisons
+
+LAST_FAILED = pyspec.describe('re-run the tests that failed last time')
+
+SPEC_FILE = os.path.relpath(__file__).replace(os.sep, '/')
+
+def failures_file(recorded=None):
+    """
+    Returns the path of a new failures file holding the given failures
+    """
+    path = os.path.join(tempfile.mkdtemp(), 'failures.json')
+
+    if recorded is not None:
+        with open(path, 'w', encoding='utf-8') as failures:
+            json.dump(recorded, failures)
+
+    return path
+
+def example_groups(broken):
+    """
+    Returns two groups, each with a passing test & a test failing if its group
+    is in `broken`
+    """
+    groups = []
+
+    for name in ('first', 'second'):
+        group = Describe(name)
+        group.it('passes').expect(lambda: 1).to(C.eq, 1)
+        group.it('breaks').expect(lambda name=name: name in broken).to(C.eq, False)
+        groups.append(group)
+
+    return groups
+
+def run(path, broken=(), keyword=None, **settings):
+    """
+    Runs the example groups with failures kept at `path`, returning the
+    descriptions of the groups & tests ran & the failures recorded
+    """
+    runner = Runner(stable.event('last failed spec'))
+    recorder = Recorder()
+
+    for group in example_groups(broken):
+        runner.add_group(group)
+
+    runner.run_all({
+        'verbose': False,
+        'muted': True,
+        'reporter': recorder,
+        'keyword': keyword,
+        'failures': dict(settings, path=path),
+    })
+    ran = [
+        (event[1], event[2]) for event in recorder.events
+        if event[0] in ('group_started', 'test_finished')
+    ]
+
+    return ran, last_failed.read_failures(path)
+
+def rerun(broken, **settings):
+    """
+    Runs the example groups once with the `broken` groups failing, then again
+    with every test passing, returning what the second run ran & recorded
+    """
+    path = failures_file()
+    run(path, broken)
+
+    return run(path, **settings)
+
+LAST_FAILED.it(
+    'records failed tests by spec file & description path'
+).expect(lambda: run(failures_file(), ['second'])[1]).to(
+    C.eq, {SPEC_FILE: [['second', 'breaks']]}
+)
+
+LAST_FAILED.it(
+    'only runs the tests that failed last time with last_failed'
+).expect(lambda: rerun(['second'], last_failed=True)[0]).to(
+    C.eq, [('second', 0), ('breaks', 0)]
+)
+
+LAST_FAILED.it(
+    'runs every test with last_failed when none failed last time'
+).expect(lambda: len(rerun([], last_failed=True)[0])).to(C.eq, 6)
+
+LAST_FAILED.it(
+    'runs the groups holding failed tests first with failed_first'
+).expect(
+    lambda: [ran[0] for ran in rerun(['second'], failed_first=True)[0] if ran[0] != 'passes']
+).to(C.eq, ['second', 'breaks', 'first', 'breaks'])
+
+LAST_FAILED.it(
+    'forgets the failures of tests that pass'
+).expect(lambda: rerun(['first', 'second'], last_failed=True)[1]).to(C.eq, {})
+
+LAST_FAILED.it(
+    'keeps the failures of tests left out of the run'
+).expect(
+    lambda: run(failures_file({SPEC_FILE: [['second', 'breaks']]}), keyword='first')[1]
+).to(C.eq, {SPEC_FILE: [['second', 'breaks']]})
+
+LAST_FAILED.it(
+    'forgets tests that no longer exist once every test of their spec file ran'
+).expect(lambda: run(failures_file({SPEC_FILE: [['first', 'gone']]}))[1]).to(C.eq, {})
+
+LAST_FAILED.it(
+    'drops the failures of spec files that no longer exist'
+).expect(
+    lambda: run(failures_file({'tests/removed_spec.py': [['removed', 'fails']]}))[1]
+).to(C.eq, {})
+
+LAST_FAILED.it(
+    'keeps spec files relative to the project root'
+).expect(
+    lambda: run(failures_file(), ['second'], root=os.path.dirname(os.path.abspath(__file__)))[1]
+).to(C.eq, {os.path.basename(SPEC_FILE): [['second', 'breaks']]})
+
+LAST_FAILED.it(
+    'only runs the spec files with failures to re-run'
+).expect(
+    lambda: last_failed.Failures({
+        'path': failures_file({SPEC_FILE: [['first', 'breaks']]}),
+        'last_failed': True,
+    }).spec_files(['tests/other_spec.py', SPEC_FILE])
+).to(C.eq, [SPEC_FILE])
+
+LAST_FAILED.it(
+    'runs every spec file when none of them has a failure to re-run'
+).expect(lambda: last_failed.Failures({
+    'path': failures_file({SPEC_FILE: [['first', 'breaks']]}),
+    'last_failed': True,
+}).narrow(['tests/other_spec.py'])['last_failed']).to(C.eq, False)
+
+if __name__ == '__main__':
+    LAST_FAILED.run()
@@ -0,0 +1,57 @@
+#! /usr/bin/env python
+"""tests for finding test groups that leak memory"""
+
+import tracemalloc
+import pyspec
+from pyspec.cli.run_tests import RunTests
+from pyspec.cli.leaks import LeakFinder
+from pub_sub import stable
+
+C = pyspec.Comparisons
+
+LEAKS = pyspec.describe('find test groups that leak memory')
+
+LEAKED = []
+
+def leak():
+    LEAKED.append(bytearray(64 * 1024))
+
+    return True
+
+LEAKING = pyspec.describe('leaking group', stable.event('leaks spec'))
+LEAKING.it('holds on to memory').expect(leak).to(C.eq, True)
+
+STEADY = pyspec.describe('steady group', stable.event('leaks spec'))
+STEADY.it('lets go of memory').expect(lambda: len(bytearray(64 * 1024))).to(C.eq, 64 * 1024)
+
+FINDER = LeakFinder(RunTests(stable.event('leaks spec')), 'tests/test_examples')
+
+def check(group):
+    tracemalloc.start()
+
+    try:
+        return FINDER.check(group)
+    finally:
+        tracemalloc.stop()
+        LEAKED.clear()
+
+LEAKS.it(
+    'reports a group whose retained memory keeps growing'
+).expect(lambda: check(LEAKING)['leaks']).to(C.eq, True)
+
+LEAKS.it(
+    'lists the source lines that allocated the leaked memory'
+).expect(lambda: 'leaks_spec.py:' in check(LEAKING)['allocators'][0][0]).to(C.eq, True)
+
+LEAKS.it(
+    'does not report a group that lets go of its memory'
+).expect(lambda: check(STEADY)['leaks']).to(C.eq, False)
+
+LEAKS.it(
+    'needs at least 3 iterations'
+).expect(
+    lambda: LeakFinder(RunTests(stable.event('leaks spec')), 'tests/test_examples', 2)
+).to(C.raise_error, ValueError)
+
+if __name__ == '__main__':
+    LEAKS.run()
@@ -0,0 +1,67 @@
+#! /usr/bin/env python
+"""tests for measuring the memory used by each test"""
+
+import pyspec
+from pyspec.lib import memory, options
+from pyspec.lib.reporter import Recorder, Reporters
+from pyspec.lib.stats import StatsObj
+from pub_sub import stable
+
+C = pyspec.Comparisons
+
+MEMORY = pyspec.describe('measure the memory used by each test')
+
+RETAINED = []
+
+def allocate(size):
+    RETAINED.append(bytearray(size))
+
+    return True
+
+HUNGRY = pyspec.describe('hungry group', stable.event('memory spec'))
+HUNGRY.it('allocates a megabyte').expect(lambda: allocate(2 ** 20)).to(C.eq, True)
+
+def run_measured(budget=None):
+    memory.configure({})
+    stats = StatsObj(budget)
+    recorder = Recorder()
+
+    try:
+        HUNGRY.run(reporter=Reporters(stats, recorder))
+    finally:
+        memory.configure(None)
+        RETAINED.clear()
+
+    return stats, recorder.events
+
+def measured_memory():
+    stats, _ = run_measured()
+    peak, net, _, _, allocators = stats.test_memory[0]
+
+    return peak >= 2 ** 20 and net >= 2 ** 20 and 'memory_spec.py:' in allocators[0][0]
+
+def status_with_budget(budget):
+    _, events = run_measured(budget)
+
+    return [event[3]['status'] for event in events if event[0] == 'test_finished']
+
+MEMORY.it(
+    'records the peak & retained memory of a test & what allocated it'
+).expect(measured_memory).to(C.eq, True)
+
+MEMORY.it(
+    'fails tests that go over the memory budget'
+).expect(lambda: status_with_budget(2 ** 10)).to(C.eq, ['failed'])
+
+MEMORY.it(
+    'passes tests within the memory budget'
+).expect(lambda: status_with_budget(2 ** 30)).to(C.eq, ['passed'])
+
+MEMORY.it(
+    'reads sizes with units'
+).expect(lambda: [options.parse_size(size) for size in ('512', '2KB', '1.5mb')]).to(
+    C.eq, [512, 2048, 1572864]
+)
+
+if __name__ == '__main__':
+    MEMORY.run()
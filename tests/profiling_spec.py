@@ -0,0 +1,115 @@
+#! /usr/bin/env python
+"""tests for profiling tests, groups & runs"""
+
+import os
+import time
+import tempfile
+import pyspec
+from pyspec.lib import profiling
+
+C = pyspec.Comparisons
+
+PROFILING = pyspec.describe('profile tests, groups or whole runs')
+
+def written_by(settings, granularity, path, call):
+    directory = tempfile.mkdtemp()
+    profiling.configure(dict(settings, directory=directory))
+
+    try:
+        profiling.profiled(granularity, path, call)
+        return [os.path.basename(written) for written in profiling.take_written()]
+    finally:
+        profiling.configure(None)
+
+def sleep_for(milliseconds):
+    return lambda: time.sleep(milliseconds / 1000)
+
+def whole_run_written():
+    """
+    Profiles two calls for a whole run, returning the number of files written
+    before & after the run is finished
+    """
+    profiling.configure({'granularity': 'run', 'directory': tempfile.mkdtemp()})
+
+    try:
+        profiling.profiled('run', ['run'], sleep_for(1))
+        profiling.profiled('run', ['run'], sleep_for(1))
+        before = len(profiling.take_written())
+        profiling.finish()
+
+        return [before, len(profiling.take_written())]
+    finally:
+        profiling.configure(None)
+
+def sampling_after_finish():
+    """
+    Samples a call, then finishes, returning whether the sampling thread is
+    still running
+    """
+    profiling.configure({'threshold': 1, 'directory': tempfile.mkdtemp()})
+
+    try:
+        profiling.profiled('test', ['group', 'sampled'], sleep_for(5))
+        thread = profiling.PROFILE['profiler'].sampler._thread # pylint: disable=protected-access
+        profiling.finish()
+        thread.join(1)
+
+        return thread.is_alive()
+    finally:
+        profiling.configure(None)
+
+PROFILING.it(
+    'calls through when profiling is off'
+).expect(lambda: profiling.profiled('test', ['group', 'test'], lambda: 2)).to(C.eq, 2)
+
+PROFILING.it(
+    'writes a pstats file named after the description path'
+).expect(
+    lambda: written_by({'granularity': 'test'}, 'test', ['group', 'a test'], sleep_for(1))
+).to(C.eq, [profiling.profile_name(['group', 'a test']) + '.pstats'])
+
+PROFILING.it(
+    'only profiles calls at the chosen granularity'
+).expect(
+    lambda: written_by({'granularity': 'group'}, 'test', ['group', 'a test'], sleep_for(1))
+).to(C.eq, [])
+
+PROFILING.it(
+    'skips sampled calls faster than the threshold'
+).expect(
+    lambda: written_by({'threshold': 10 ** 9}, 'test', ['group', 'fast'], sleep_for(5))
+).to(C.eq, [])
+
+PROFILING.it(
+    'keeps the samples of calls slower than the threshold'
+).expect(
+    lambda: written_by({'threshold': 1}, 'test', ['group', 'slow'], sleep_for(50))
+).to(C.eq, [profiling.profile_name(['group', 'slow']) + '.folded'])
+
+PROFILING.it(
+    'calls through for calls made while another is profiled'
+).expect(
+    lambda: written_by(
+        {'granularity': 'test'},
+        'test',
+        ['group', 'outer'],
+        lambda: profiling.profiled('test', ['group', 'inner'], sleep_for(1))
+    )
+).to(C.eq, [profiling.profile_name(['group', 'outer']) + '.pstats'])
+
+PROFILING.it(
+    'writes a single profile for the whole run once it is over'
+).expect(whole_run_written).to(C.eq, [0, 1])
+
+PROFILING.it(
+    'stops the sampling thread once profiling is over'
+).expect(sampling_after_finish).to(C.eq, False)
+
+PROFILING.it(
+    'gives similar description paths different file names'
+).expect(
+    lambda: profiling.profile_name(['a b']) == profiling.profile_name(['a-b'])
+).to(C.eq, False)
+
+if __name__ == '__main__':
+    PROFILING.run()
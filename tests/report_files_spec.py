@@ -0,0 +1,153 @@
+#! /usr/bin/env python
+"""tests for writing machine-readable report files"""
+
+import os
+import json
+import tempfile
+import xml.etree.ElementTree as ElementTree
+import pyspec
+from pub_sub import stable
+from pyspec.lib import options, report_files
+from pyspec.lib.describe import Describe
+from pyspec.lib.result import TestResult
+from pyspec.lib.runner import Runner
+
+C = pyspec.Comparisons
+
+REPORT_FILES = pyspec.describe('write results to report files as tests finish')
+
+def report_path(name):
+    return os.path.join(tempfile.mkdtemp(), name)
+
+def result(error=None):
+    """
+    Returns the result of a test declared in a spec file, failed with `error`
+    if given
+    """
+    outcome = TestResult((os.path.join('tests', 'example_spec.py'), 3))
+    outcome.duration = 2500000
+
+    return outcome.passed() if error is None else outcome.failed(error)
+
+def write(report_format, close=True):
+    """
+    Writes the events of a group holding a passing test & a failing test in an
+    inner group, returning the lines of the report
+    """
+    reporter = report_files.open_report(report_format, report_path(f'report.{report_format}'))
+    reporter.group_started('outer', 0)
+    reporter.test_finished('passes', 0, result())
+    reporter.group_started('inner <group>', 1)
+    reporter.test_finished('fails', 1, result(AssertionError('expected "a",\nbut got <b>')))
+    reporter.group_finished('inner <group>', 1)
+    reporter.group_finished('outer', 0)
+
+    if close:
+        reporter.close()
+
+    with open(reporter.path) as report:
+        return report.readlines()
+
+def junit(lines):
+    return ElementTree.fromstring(''.join(lines))
+
+def merged(report_format, *reports):
+    """
+    Merges reports holding the given lines, returning the number of results
+    merged & the lines written
+    """
+    sources = []
+
+    for lines in reports:
+        sources.append(report_path(f'source.{report_format}'))
+
+        with open(sources[-1], 'w') as source:
+            source.write(''.join(lines))
+
+    path = report_path(f'merged.{report_format}')
+    count = report_files.merge(report_format, path, sources)
+
+    with open(path) as report:
+        return count, report.readlines()
+
+def run_with_reports():
+    """
+    Runs a group through a Runner writing both report formats, returning the
+    number of lines in each report
+    """
+    group = Describe('reported')
+    group.it('passes').expect(lambda: 1).to(C.eq, 1)
+    runner = Runner(stable.event('report files spec'))
+    runner.add_group(group)
+    reports = [
+        {'format': report_format, 'path': report_path(f'run.{report_format}')}
+        for report_format in options.REPORT_FORMATS
+    ]
+    runner.run_all({'verbose': False, 'muted': True, 'reports': reports})
+    lines = []
+
+    for report in reports:
+        with open(report['path']) as written:
+            lines.append(len(written.readlines()))
+
+    return lines
+
+REPORT_FILES.it(
+    'writes a JSON line for each test before the report is closed'
+).expect(lambda: len(write('jsonl', close=False))).to(C.eq, 2)
+
+REPORT_FILES.it(
+    'writes the description path, location & result of each test as JSON'
+).expect(lambda: [
+    {key: record[key] for key in ('path', 'file', 'line', 'status', 'error', 'duration')}
+    for record in map(json.loads, write('jsonl'))
+]).to(C.eq, [
+    {
+        'path': ['outer', 'passes'], 'file': 'tests/example_spec.py', 'line': 3,
+        'status': 'passed', 'error': None, 'duration': 2500000,
+    },
+    {
+        'path': ['outer', 'inner <group>', 'fails'], 'file': 'tests/example_spec.py', 'line': 3,
+        'status': 'failed', 'error': ['AssertionError', 'expected "a",\nbut got <b>'],
+        'duration': 2500000,
+    },
+])
+
+REPORT_FILES.it(
+    'writes each test as a JUnit testcase as soon as it finishes'
+).expect(lambda: len(write('junit', close=False))).to(C.eq, 6)
+
+REPORT_FILES.it(
+    'writes valid JUnit XML, escaping descriptions & messages'
+).expect(lambda: [
+    (case.get('classname'), case.get('name'), case.get('time'), case.find('failure') is not None)
+    for case in junit(write('junit')).iter('testcase')
+]).to(C.eq, [
+    ('outer', 'passes', '0.002500', False),
+    ('outer > inner <group>', 'fails', '0.002500', True),
+])
+
+REPORT_FILES.it(
+    'keeps the line breaks of failure messages in JUnit reports'
+).expect(
+    lambda: junit(write('junit')).find('.//failure').get('message')
+).to(C.eq, 'expected "a",\nbut got <b>')
+
+REPORT_FILES.it(
+    'merges JUnit reports, closing what an interrupted report left open'
+).expect(lambda: len(list(
+    junit(merged('junit', write('junit'), write('junit'), write('junit')[:-2])[1]).iter('testsuite')
+))).to(C.eq, 3)
+
+REPORT_FILES.it(
+    'drops a line an interrupted report left unfinished when merging'
+).expect(
+    lambda: merged('jsonl', write('jsonl'), write('jsonl') + ['{"path": ["cut'])[0]
+).to(C.eq, 4)
+
+REPORT_FILES.it(
+    'writes the reports given to a Runner'
+).expect(run_with_reports).to(C.eq, [1, 6])
+
+if __name__ == '__main__':
+    REPORT_FILES.run()
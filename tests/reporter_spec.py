@@ -0,0 +1,133 @@
+#! /usr/bin/env python
+"""tests for streaming test results to reporters"""
+
+import gc
+import io
+import json
+import weakref
+import pyspec
+from pyspec.lib.describe import Describe
+from pyspec.lib.reporter import TextReporter, Recorder, replay
+from pyspec.lib.result import set_frame_limit
+from pub_sub import stable
+
+C = pyspec.Comparisons
+
+REPORTER = pyspec.describe('stream results to reporters as tests finish')
+
+PASSING = pyspec.describe('passing group', stable.event('reporter spec'))
+PASSING.it('passes').expect(lambda: 1).to(C.eq, 1)
+PASSING.describe('passing inner').it('also passes').expect(lambda: 1).to(C.eq, 1)
+
+FAILING = pyspec.describe('failing group', stable.event('reporter spec'))
+FAILING.it('passes').expect(lambda: 1).to(C.eq, 1)
+FAILING.it('fails').expect(lambda: 1).to(C.eq, 2)
+
+def output_of(group, verbose=False, tb='long'):
+    stream = io.StringIO()
+    group.run(reporter=TextReporter(verbose, stream, tb))
+
+    return stream.getvalue().splitlines()
+
+def recorded_events_of(group):
+    recorder = Recorder()
+    group.run(reporter=recorder)
+
+    return recorder.events
+
+def frames_kept(limit):
+    set_frame_limit(limit)
+
+    try:
+        failed = [event for event in recorded_events_of(FAILING) if event[0] == 'test_finished']
+        return len(failed[-1][3]['frames'])
+    finally:
+        set_frame_limit(None)
+
+class Local:
+    """
+    An object only referenced by a local variable of a failing test
+    """
+
+def local_released():
+    """
+    Returns True if the local variables of a failed test are collected while
+    its result is still kept
+    """
+    locals_made = []
+
+    def fails():
+        local = Local()
+        locals_made.append(weakref.ref(local))
+
+        try:
+            raise KeyError('missing')
+        except KeyError:
+            raise ValueError('fails while handling an error')
+
+    group = Describe('releasing group')
+    group.it('fails').expect(fails).to(C.eq, None)
+    group.run(reporter=Recorder())
+    gc.collect()
+
+    return group.tests[0].result.status == 'failed' and locals_made[0]() is None
+
+def round_trips(events):
+    """
+    Returns True if the events are unchanged by a round trip through JSON
+    """
+    return json.loads(json.dumps(events)) == events
+
+def replayed_output_of(group):
+    stream = io.StringIO()
+    replay(recorded_events_of(group), TextReporter(False, stream))
+
+    return stream.getvalue().splitlines()
+
+REPORTER.it(
+    'writes a single line for a group where every test passes'
+).expect(lambda: len(output_of(PASSING))).to(C.eq, 1)
+
+REPORTER.it(
+    'writes a line for every test in verbose mode'
+).expect(lambda: len(output_of(PASSING, True))).to(C.eq, 4)
+
+REPORTER.it(
+    'writes the group & the failing test when a test fails'
+).expect(lambda: output_of(FAILING)[:2]).to(C.eq, [
+    'failing group',
+    '  - fails: \033[31mfail\033[0m'
+])
+
+REPORTER.it(
+    'records events that can be replayed into another reporter'
+).expect(lambda: replayed_output_of(FAILING) == output_of(FAILING)).to(C.eq, True)
+
+REPORTER.it(
+    'records events as plain data'
+).expect(
+    lambda: round_trips(recorded_events_of(FAILING))
+).to(C.eq, True)
+
+REPORTER.it(
+    'writes the source line of each frame for long stack traces'
+).expect(lambda: len(output_of(FAILING, tb='long')) > len(output_of(FAILING, tb='short'))).to(
+    C.eq, True
+)
+
+REPORTER.it(
+    'writes no stack trace when tracebacks are turned off'
+).expect(lambda: [line for line in output_of(FAILING, tb='none') if 'STACK TRACE' in line]).to(
+    C.eq, []
+)
+
+REPORTER.it(
+    'keeps only the innermost frames up to the frame limit'
+).expect(lambda: frames_kept(1)).to(C.eq, 1)
+
+REPORTER.it(
+    'releases the local variables of failed tests once their frames are kept'
+).expect(local_released).to(C.eq, True)
+
+if __name__ == '__main__':
+    REPORTER.run()
@@ -2,6 +2,7 @@
 """tests for SpecStruct metastructure"""
 
 import pyspec
+from pub_sub import stable
 
 C = pyspec.Comparisons
 
@@ -27,5 +28,50 @@ RUNNER.it(
     'can remove specified test groups'
 ).expect(lambda: RUNNER.struct.remove_group(RUNNER.test_group)).to_not(C.include, RUNNER.test_group)
 
+MAXFAIL = RUNNER.describe('stop once enough tests have failed')
+
+# the lets built by each group, to check skipped groups never build theirs
+BUILT = []
+
+def failing_run(maxfail, concurrency=None):
+    """
+    Runs three groups of two failing tests each, returning the runner's stats
+    """
+    BUILT.clear()
+    runner = pyspec.lib.runner.Runner(stable.event('maxfail spec'))
+
+    for number in range(3):
+        group = pyspec.lib.describe.Describe(f'group {number}', concurrency)
+        group.let('built', lambda number=number: BUILT.append(number), True)
+
+        for _ in range(2):
+            group.it('fails').expect(lambda group=group: group.built).to(C.eq, 'never')
+
+        runner.add_group(group)
+
+    runner.run_all({'verbose': False, 'muted': True, 'maxfail': maxfail})
+
+    return runner.stats
+
+MAXFAIL.it(
+    'runs every test without a maxfail'
+).expect(lambda: failing_run(None).number_of_tests).to(C.eq, 6)
+
+MAXFAIL.it(
+    'stops scheduling tests once maxfail tests have failed'
+).expect(lambda: failing_run(3).number_of_tests).to(C.eq, 3)
+
+MAXFAIL.it(
+    'does not build the lets of groups it skips'
+).expect(lambda: failing_run(1) and BUILT).to(C.eq, [0])
+
+MAXFAIL.it(
+    'reports that the run stopped early in its stats'
+).expect(lambda: 'Stopped after 1 failed' in failing_run(1).get_stats_string()).to(C.eq, True)
+
+MAXFAIL.it(
+    'stops concurrent groups too, without running more than it started'
+).expect(lambda: failing_run(1, 2).number_of_tests <= 2).to(C.eq, True)
+
 if __name__ == '__main__':
     RUNNER.run()
@@ -0,0 +1,94 @@
+#! /usr/bin/env python
+"""tests for selecting tests by name"""
+
+import pyspec
+from pyspec.lib import selection
+from pyspec.lib.describe import Describe
+from pyspec.lib.reporter import Recorder
+
+C = pyspec.Comparisons
+
+SELECTION = pyspec.describe('select tests by their description path')
+
+PATH = ['results cache', 'replays results', 'of a slow test']
+
+def matches(expression):
+    return selection.parse(expression)(PATH)
+
+def error(expression):
+    try:
+        selection.parse(expression)
+    except selection.SelectionError:
+        return True
+
+    return False
+
+# the lets & befores built while running, to check deselected groups build none
+BUILT = []
+
+def example_group():
+    group = Describe('results cache')
+    group.let('cache', lambda: BUILT.append('cache let'), True)
+    group.it('replays results').expect(lambda: group.cache).to(C.eq, None)
+
+    slow = group.describe('slow')
+    slow.before('file', lambda: BUILT.append('slow before'), True)
+    slow.it('writes a large file').expect(lambda: slow.file).to(C.eq, None)
+
+    other = group.describe('other')
+    other.it('is never selected').expect(lambda: 1).to(C.eq, 1)
+
+    return group
+
+def ran(keyword):
+    """
+    Runs the example group with a keyword, returning the tests that ran & what
+    they built
+    """
+    BUILT.clear()
+    recorder = Recorder()
+    example_group().run(reporter=recorder, keyword=keyword)
+    tests = [event[1] for event in recorder.events if event[0] == 'test_finished']
+
+    return tests, list(BUILT)
+
+SELECTION.it(
+    'matches a term anywhere in the description path, ignoring case'
+).expect(lambda: [matches('Cache'), matches('replays results > of'), matches('nothing')]).to(
+    C.eq, [True, True, False]
+)
+
+SELECTION.it(
+    'combines terms with and, or, not & parentheses'
+).expect(
+    lambda: [matches('cache and not fast'), matches('(fast or ow) and replays'), matches('not w')]
+).to(C.eq, [True, True, False])
+
+SELECTION.it(
+    'matches words next to each other as one phrase'
+).expect(lambda: [matches('slow test'), matches('test slow')]).to(C.eq, [True, False])
+
+SELECTION.it(
+    'matches quoted terms, which may hold and, or & not'
+).expect(lambda: [matches("'of a slow'"), matches('"cache or"')]).to(C.eq, [True, False])
+
+SELECTION.it(
+    'rejects expressions it cannot parse'
+).expect(lambda: [error(''), error('(cache'), error('cache and'), error('"cache')]).to(
+    C.eq, [True, True, True, True]
+)
+
+SELECTION.it(
+    'runs only the tests matching a keyword'
+).expect(lambda: ran('large file')[0]).to(C.eq, ['writes a large file'])
+
+SELECTION.it(
+    'builds no lets or befores for groups without a selected test'
+).expect(lambda: ran('replays')).to(C.eq, (['replays results'], ['cache let']))
+
+SELECTION.it(
+    'runs every test without a keyword'
+).expect(lambda: len(ran(None)[0])).to(C.eq, 3)
+
+if __name__ == '__main__':
+    SELECTION.run()
@@ -0,0 +1,54 @@
+#! /usr/bin/env python
+"""tests for the self-benchmark harness in benchmarks/"""
+
+import tempfile
+import pyspec
+from pyspec.lib.describe import Describe
+from benchmarks import run, suites
+
+C = pyspec.Comparisons
+
+SELF_BENCHMARK = pyspec.describe('benchmark pyspec itself on synthetic suites')
+
+def count_tests(group):
+    return len(group.tests) + sum(count_tests(inner) for inner in group.inners)
+
+def written_tests(scenario):
+    count = 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        for path in suites.write_suite(scenario, directory):
+            with open(path, encoding='utf-8') as spec_file:
+                count += spec_file.read().count('.it(')
+
+    return count
+
+def registered_tests(scenario):
+    groups = run.register(Describe, suites.SCENARIOS[scenario])
+
+    return sum(count_tests(group) for group in groups)
+
+def timings(**phases):
+    return {'scenarios': [{
+        'scenario': 'deep-nesting',
+        'phases': {name: {'ns': ns} for name, ns in phases.items()},
+    }]}
+
+SELF_BENCHMARK.it(
+    'writes spec files holding every test in a scenario'
+).expect(lambda: written_tests('deep-nesting')).to(C.eq, suites.test_count('deep-nesting'))
+
+SELF_BENCHMARK.it(
+    'registers the same tests in memory'
+).expect(lambda: registered_tests('deep-nesting')).to(C.eq, suites.test_count('deep-nesting'))
+
+SELF_BENCHMARK.it(
+    'reports phases that got slower than the tolerance'
+).expect(
+    lambda: len(
+        run.find_regressions(timings(run=100, format=100), timings(run=150, format=105), .1)
+    )
+).to(C.eq, 1)
+
+if __name__ == '__main__':
+    SELF_BENCHMARK.run()
@@ -0,0 +1,153 @@
+#! /usr/bin/env python
+"""tests for splitting spec files across shards"""
+
+import os
+import json
+import tempfile
+import pyspec
+from pub_sub import stable
+from pyspec.cli import sharding
+from pyspec.cli.run_tests import RunTests
+
+C = pyspec.Comparisons
+
+SHARDING = pyspec.describe('split spec files across shards')
+
+ROOT = tempfile.mkdtemp()
+SPEC_FILES = [os.path.join(ROOT, 'tests', f'example_{number}_spec.py') for number in range(20)]
+
+def shards(total, durations=None):
+    return [
+        sharding.select(SPEC_FILES, index, total, durations, ROOT)
+        for index in range(1, total + 1)
+    ]
+
+def key(spec_file):
+    return os.path.relpath(spec_file, ROOT).replace(os.sep, '/')
+
+# one slow file & many fast ones, so a split by count would be unbalanced
+DURATIONS = {key(spec_file): 10 for spec_file in SPEC_FILES}
+DURATIONS[key(SPEC_FILES[0])] = 100
+
+def loads(split):
+    return [sum(DURATIONS[key(spec_file)] for spec_file in shard) for shard in split]
+
+def recorded():
+    path = os.path.join(ROOT, 'durations.json')
+    sharding.record_durations(path, {SPEC_FILES[0]: 5}, ROOT)
+    sharding.record_durations(path, {SPEC_FILES[1]: 7}, ROOT)
+
+    return sharding.read_durations(path)
+
+def example_project(count):
+    """
+    Writes a project holding `count` spec files, each with a group on the
+    'sharding spec' event, returning the project's root
+    """
+    root = tempfile.mkdtemp()
+    os.makedirs(os.path.join(root, 'tests'))
+
+    for number in range(count):
+        with open(os.path.join(root, 'tests', f's{number}_spec.py'), 'w') as spec_file:
+            spec_file.write(
+                'import pyspec\n'
+                'from pub_sub import stable\n'
+                f"GROUP = pyspec.describe('group {number}', stable.event('sharding spec'))\n"
+                "GROUP.it('passes').expect(lambda: 1).to(pyspec.Comparisons.eq, 1)\n"
+            )
+
+    return root
+
+def run_every_shard(total):
+    """
+    Runs every shard of an example project in turn, last first, each balanced
+    by the same partial durations file, returning the spec files each shard
+    ran, whether the durations file was left as it was & the project's root
+    """
+    root = example_project(6)
+    durations_path = os.path.join(root, 'durations.json')
+    durations = {'tests/s1_spec.py': 50, 'tests/s4_spec.py': 10}
+
+    with open(durations_path, 'w') as durations_file:
+        json.dump(durations, durations_file)
+
+    ran = []
+
+    for index in range(total, 0, -1):
+        run_tests = RunTests(stable.event('sharding spec'))
+        run_tests.CWD = root
+        shard = {'index': index, 'total': total, 'durations': durations_path}
+        run_tests.all_tests('tests', False, True, shard=shard)
+        ran.extend(path for path, _ in run_tests.runner.stats.import_times)
+
+    return ran, sharding.read_durations(durations_path) == durations, root
+
+def union_of_shards(total):
+    ran, _, _ = run_every_shard(total)
+
+    return [os.path.basename(path) for path in sorted(ran)]
+
+def recorded_by_shards(total):
+    """
+    Returns the spec files whose times each shard recorded in its own file
+    """
+    ran, _, root = run_every_shard(total)
+    recorded = [
+        sharding.read_durations(os.path.join(root, sharding.shard_durations_file(index, total)))
+        for index in range(total, 0, -1)
+    ]
+
+    return sorted(sum((list(durations) for durations in recorded), [])) == sorted(
+        os.path.relpath(path, root).replace(os.sep, '/') for path in ran
+    )
+
+SHARDING.it(
+    'runs every spec file exactly once across the shards of a run'
+).expect(lambda: union_of_shards(2)).to(
+    C.eq, [f's{number}_spec.py' for number in range(6)]
+)
+
+SHARDING.it(
+    'runs every spec file exactly once across shards ran in any order'
+).expect(lambda: union_of_shards(3)).to(
+    C.eq, [f's{number}_spec.py' for number in range(6)]
+)
+
+SHARDING.it(
+    'never writes to the durations file shards are balanced by'
+).expect(lambda: run_every_shard(2)[1]).to(C.eq, True)
+
+SHARDING.it(
+    'records the times of each shard\'s spec files in a file of its own'
+).expect(lambda: recorded_by_shards(2)).to(C.eq, True)
+
+SHARDING.it(
+    'gives every spec file to exactly one shard'
+).expect(lambda: sorted(sum(shards(4), []))).to(C.eq, sorted(SPEC_FILES))
+
+SHARDING.it(
+    'keeps spec files in their original order within a shard'
+).expect(
+    lambda: all(shard == [path for path in SPEC_FILES if path in shard] for shard in shards(3))
+).to(C.eq, True)
+
+SHARDING.it(
+    'splits the same way every time without recorded durations'
+).expect(lambda: shards(3) == shards(3)).to(C.eq, True)
+
+SHARDING.it(
+    'balances shards by recorded durations'
+).expect(lambda: loads(shards(3, DURATIONS))).to(C.eq, [100, 100, 90])
+
+SHARDING.it(
+    'expects spec files without a recorded duration to take an average time'
+).expect(
+    lambda: len(shards(2, {key(SPEC_FILES[0]): 10, key(SPEC_FILES[1]): 10})[0])
+).to(C.eq, 10)
+
+SHARDING.it(
+    'keeps the durations recorded by earlier runs'
+).expect(recorded).to(C.eq, {'tests/example_0_spec.py': 5, 'tests/example_1_spec.py': 7})
+
+if __name__ == '__main__':
+    SHARDING.run()
@@ -0,0 +1,82 @@
+#! /usr/bin/env python
+"""tests for the startup time of the pyspec command"""
+
+import sys
+import time
+import subprocess
+import pyspec
+
+C = pyspec.Comparisons
+
+STARTUP = pyspec.describe('start the pyspec command quickly')
+
+# the most seconds `pyspec --version` & `pyspec one` on a small spec file may
+# take on top of starting a bare interpreter; editor integrations run `one` on
+# every save
+STARTUP_BUDGET = .25
+
+# modules only needed by some commands or by some tests
+DEFERRED = (
+    'asyncio', 'concurrent.futures', 'cProfile', 'pstats', 'statistics', 'pkg_resources',
+    'tracemalloc', 'pyspec.cli.run_tests', 'pyspec.cli.watch', 'pyspec.cli.leaks',
+    'pyspec.lib.describe',
+)
+
+def command(*args):
+    return f'from pyspec.cli.entry import entry_point\nentry_point({list(args)!r})\n'
+
+def fastest(code, runs=3):
+    """
+    Returns the fewest seconds taken to run the given code in a new interpreter
+    """
+    times = []
+
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], stdout=subprocess.DEVNULL, check=False)
+        times.append(time.perf_counter() - started)
+
+    return min(times)
+
+def overhead(*args):
+    return fastest(command(*args)) - fastest('pass')
+
+def imported_by(*args):
+    """
+    Returns the modules from DEFERRED imported by running pyspec with the given
+    arguments, as printed by a new interpreter
+    """
+    code = (
+        'import sys\n'
+        'from pyspec.cli.entry import entry_point\n'
+        f'entry_point.main(args={list(args)!r}, standalone_mode=False)\n'
+        f'print([name for name in {DEFERRED!r} if name in sys.modules])\n'
+    )
+    output = subprocess.run(
+        [sys.executable, '-c', code],
+        stdout=subprocess.PIPE,
+        check=False
+    ).stdout.decode()
+
+    return output.strip().splitlines()[-1]
+
+STARTUP.it(
+    'imports only what parsing arguments needs'
+).expect(lambda: imported_by('--help')).to(C.eq, '[]')
+
+STARTUP.it(
+    'runs a single spec file without importing modules it never uses'
+).expect(
+    lambda: imported_by('one', 'tests/test_examples/temp_spec')
+).to(C.eq, "['pyspec.cli.run_tests', 'pyspec.lib.describe']")
+
+STARTUP.it(
+    'prints its version within the startup budget'
+).expect(lambda: overhead('--version') < STARTUP_BUDGET).to(C.eq, True)
+
+STARTUP.it(
+    'runs a single spec file within the startup budget'
+).expect(lambda: overhead('one', 'tests/test_examples/temp_spec') < STARTUP_BUDGET).to(C.eq, True)
+
+if __name__ == '__main__':
+    STARTUP.run()
@@ -3,18 +3,24 @@
 
 import pyspec
 from pub_sub import stable
+from pyspec.lib.result import TestResult
 
 C = pyspec.Comparisons
 
 STATS_OBJ = pyspec.describe('generate stats info in the runner metastructure')
 
-test_run = pyspec.cli.run_tests.RunTests(stable.event('temp spec')).one_file(
-    'tests/test_examples/temp_spec',
-    False,
-    True
-)
+def isolated_run():
+    """
+    Runs the example spec file on a new Runner, returning that Runner. Other
+    specs run the same file on the same pub_sub event, which re-runs every
+    Runner made on it before, so the Runner is only made once this group runs.
+    """
+    run_tests = pyspec.cli.run_tests.RunTests(stable.event('temp spec'))
+    run_tests.one_file('tests/test_examples/temp_spec', False, True, durations=0)
+
+    return run_tests.runner
 
-STATS_OBJ.let('test_run', test_run)
+STATS_OBJ.let('test_run', isolated_run, True)
 
 STATS_OBJ.it(
     'has a stats object'
@@ -50,5 +56,104 @@ STATS_OBJ.it(
     lambda: STATS_OBJ.test_run.stats.total_time_elapsed > 0
 ).to(C.eq, True)
 
+STATS_OBJ.it(
+    'times every test'
+).expect(
+    lambda: len(STATS_OBJ.test_run.stats.test_durations)
+).to(C.eq, 2)
+
+STATS_OBJ.it(
+    'sums the test durations of each group'
+).expect(
+    lambda: [group['tests'] for group in STATS_OBJ.test_run.stats.slowest_groups(0)] == [
+        STATS_OBJ.test_run.stats.total_test_time
+    ]
+).to(C.eq, True)
+
+STATS_OBJ.it(
+    'reports test duration percentiles in its timings, to within 1%'
+).expect(
+    lambda: STATS_OBJ.test_run.stats.timings['p99'] / max(
+        duration for duration, _, _ in STATS_OBJ.test_run.stats.slowest_tests(0)
+    ) > .99
+).to(C.eq, True)
+
+def percentiles_of(durations):
+    stats = pyspec.lib.runner.StatsObj()
+
+    for duration in durations:
+        stats.test_durations.add(duration)
+
+    return [stats.percentile(50), stats.percentile(90), stats.percentile(99)]
+
+def timed_stats(durations, kept=None):
+    """
+    Returns a StatsObj keeping `kept` of the slowest tests, after a group
+    holding a test for each of the given durations finished
+    """
+    stats = pyspec.lib.runner.StatsObj(durations=kept)
+    stats.group_started('timed', 0)
+
+    for index, duration in enumerate(durations):
+        result = TestResult()
+        result.duration = duration
+        stats.test_finished(f'test {index}', 0, result.passed())
+
+    stats.group_finished('timed', 0, sum(durations))
+
+    return stats
+
+STATS_OBJ.it(
+    'picks percentiles by nearest rank'
+).expect(
+    lambda: percentiles_of(list(range(100, 0, -1)))
+).to(C.eq, [50, 90, 99])
+
+STATS_OBJ.it(
+    'finds percentiles of long durations to within 1%'
+).expect(
+    lambda: percentiles_of(range(10 ** 9, 10 ** 9 + 100000))[0] / (10 ** 9 + 49999) > .99
+).to(C.eq, True)
+
+STATS_OBJ.it(
+    'lists the slowest tests with their description path'
+).expect(
+    lambda: [path for _, path, _ in timed_stats([3, 9, 5], 0).slowest_tests(1)]
+).to(C.eq, [('timed', 'test 1')])
+
+STATS_OBJ.it(
+    'only keeps as many of the slowest tests as durations asks for'
+).expect(
+    lambda: [duration for duration, _, _ in timed_stats([3, 9, 5, 1, 7], 2).slowest_tests(0)]
+).to(C.eq, [9, 7])
+
+STATS_OBJ.it(
+    'keeps no tests without durations'
+).expect(lambda: timed_stats([3, 9]).slowest_tests(0)).to(C.eq, [])
+
+STATS_OBJ.it(
+    'sums the test durations of each group without durations'
+).expect(lambda: timed_stats([3, 9]).timings['groups']).to(
+    C.eq, [{'path': ['timed'], 'duration': 12, 'tests': 12, 'file': None}]
+)
+
+STATS_OBJ.it(
+    'shows the slowest group in the summary without durations'
+).expect(lambda: 'Slowest group: timed' in timed_stats([3, 9]).get_stats_string()).to(
+    C.eq, True
+)
+
+STATS_OBJ.it(
+    'keeps the file each group was declared in'
+).expect(
+    lambda: STATS_OBJ.test_run.stats.slowest_groups(1)[0]['file'].endswith('temp_spec.py')
+).to(C.eq, True)
+
+STATS_OBJ.it(
+    'times the import of each spec file'
+).expect(
+    lambda: [file_name[-12:] for file_name, _ in STATS_OBJ.test_run.stats.import_times]
+).to(C.eq, ['temp_spec.py'])
+
 if __name__ == '__main__':
     STATS_OBJ.run()
@@ -0,0 +1,43 @@
+#! /usr/bin/env python
+"""tests for watch mode"""
+
+import pyspec
+from pyspec.cli.run_tests import RunTests
+from pyspec.cli.watch import Watcher
+from pub_sub import stable
+
+C = pyspec.Comparisons
+
+WATCH = pyspec.describe('watch a directory for changes')
+
+WATCHER = Watcher(
+    RunTests(stable.event('temp spec')),
+    'tests/test_examples',
+    {'verbose': False, 'muted': True}
+)
+SPEC_FILE = WATCHER.spec_files()[0]
+WATCHER.dependencies[SPEC_FILE] = ['/project/example.py']
+
+def poll_twice():
+    WATCHER.poll()
+
+    return WATCHER.poll()
+
+WATCH.it(
+    'sees no changes when nothing was saved between polls'
+).expect(poll_twice).to(C.be_empty)
+
+WATCH.it(
+    're-runs a spec file that changed'
+).expect(lambda: WATCHER.affected({SPEC_FILE})).to(C.eq, [SPEC_FILE])
+
+WATCH.it(
+    're-runs a spec file when a module it depends on changed'
+).expect(lambda: WATCHER.affected({'/project/example.py'})).to(C.eq, [SPEC_FILE])
+
+WATCH.it(
+    'does not re-run spec files for unrelated changes'
+).expect(lambda: WATCHER.affected({'/project/unrelated.py'})).to(C.be_empty)
+
+if __name__ == '__main__':
+    WATCH.run()